@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CMini Python client offline, against mock_mini.py.
+
+Each benchmark starts local stand-ins for the task queue server and Ollama
+in a subprocess (so the mock's own work doesn't show up in the client's
+timings or memory) and measures:
+  overhead    - per-call client overhead over a bare keep-alive HTTP request
+  batch       - batch_analyze throughput against file count, and HTTP
+                requests the client made per file
+  completion  - delay between a job finishing on the server and the client
+                noticing, with job events and with polling only
+  streaming   - time to first token and token rate seen through
+                query_ollama_stream, against what the mock produced
+  memory      - peak Python allocations and RSS during the largest batch
+
+Results are written as JSON; --compare prints the change against an
+earlier results file:
+    python3 benchmark_client.py --output before.json
+    python3 benchmark_client.py --output after.json --compare before.json
+"""
+
+import argparse
+import http.client
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+
+from claude_mini_client import ClaudeMiniClient  # noqa: E402
+from mini_transport import MiniTransport  # noqa: E402
+
+
+class MockProcess:
+    """Run mock_mini.py in a subprocess for the duration of a with block."""
+
+    def __init__(self, **options):
+        self.args = [sys.executable, str(HERE / 'mock_mini.py')]
+        for key, value in options.items():
+            flag = '--' + key.replace('_', '-')
+            if value is True:
+                self.args.append(flag)
+            elif value is not False and value is not None:
+                self.args.extend([flag, str(value)])
+
+    def __enter__(self) -> Dict[str, str]:
+        self.process = subprocess.Popen(self.args, stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if not line:
+            self.process.kill()
+            raise RuntimeError(f"mock_mini.py failed to start: {' '.join(self.args)}")
+        self.urls = json.loads(line)
+        return self.urls
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def _get_json(base_url: str, path: str) -> Dict[str, Any]:
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=10)
+    try:
+        conn.request('GET', path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def request_count(urls: Dict[str, str]) -> int:
+    """API requests the mock queue server has handled, not counting these lookups."""
+    stats = _get_json(urls['server'], '/mock/stats')
+    return sum(n for name, n in stats['requests'].items() if not name.endswith('/mock/stats'))
+
+
+def make_client(urls: Dict[str, str]) -> ClaudeMiniClient:
+    """Client pointed at the mock, with no LAN fallback and no result cache."""
+    return ClaudeMiniClient(server=MiniTransport([urls['server']], kind='server'),
+                            ollama=MiniTransport([urls['ollama']], kind='ollama'),
+                            cache=None)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Distribution of samples given in seconds, reported in milliseconds."""
+    ms = sorted(s * 1000 for s in samples)
+    if not ms:
+        return {'n': 0}
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p50_ms': round(ms[len(ms) // 2], 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        'max_ms': round(ms[-1], 3)
+    }
+
+
+def timed(fn, calls: int) -> List[float]:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_overhead(args) -> Dict[str, Any]:
+    """Client call latency against a bare keep-alive HTTP request to the same endpoint."""
+    with MockProcess(request_latency=args.latency_ms / 1000) as urls:
+        client = make_client(urls)
+        job_id = client.submit_task('code-analysis', 'x = 1')['job_id']
+
+        url = urlparse(urls['server'])
+        conn = http.client.HTTPConnection(url.hostname, url.port)
+
+        def bare_get():
+            conn.request('GET', f'/api/job/{job_id}')
+            conn.getresponse().read()
+
+        # Warm both connection pools before measuring
+        bare_get()
+        client.check_job(job_id)
+
+        baseline = summarize(timed(bare_get, args.calls))
+        check_job = summarize(timed(lambda: client.check_job(job_id), args.calls))
+        submit = summarize(timed(lambda: client.submit_task('code-analysis', 'x = 1'), args.calls))
+        conn.close()
+
+    return {
+        'bare_get': baseline,
+        'check_job': check_job,
+        'submit_task': submit,
+        'check_job_overhead_ms': round(check_job['mean_ms'] - baseline['mean_ms'], 3)
+    }
+
+
+def _write_files(directory: Path, count: int, size: int) -> List[str]:
+    line = "def handler(event):\n    return {'status': event.get('status', 'ok')}\n"
+    body = line * max(1, size // len(line))
+    paths = []
+    for i in range(count):
+        path = directory / f"module_{i}.py"
+        path.write_text(f"# module {i}\n{body}")
+        paths.append(str(path))
+    return paths
+
+
+def bench_batch(args, directory: Path) -> Dict[str, Any]:
+    """batch_analyze wall time for each file count, against the mock's simulated compute time."""
+    results = {}
+    generation = args.ttft + args.output_tokens / args.tokens_per_sec
+    with MockProcess(tokens_per_sec=args.tokens_per_sec, output_tokens=args.output_tokens,
+                     ttft=args.ttft, slots=args.slots,
+                     request_latency=args.latency_ms / 1000) as mock_urls:
+        for count in args.files:
+            paths = _write_files(directory, count, args.file_size)
+            client = make_client(mock_urls)
+            before = request_count(mock_urls)
+
+            start = time.perf_counter()
+            items = list(client.batch_analyze(paths, timeout=600))
+            wall = time.perf_counter() - start
+
+            requests = request_count(mock_urls) - before
+            errors = sum(1 for item in items if 'error' in item)
+            # Lower bound: the mock's slots busy back to back
+            ideal = math.ceil(count / args.slots) * generation
+            results[str(count)] = {
+                'wall_s': round(wall, 3),
+                'files_per_s': round(count / wall, 2),
+                'ideal_s': round(ideal, 3),
+                'efficiency': round(ideal / wall, 3),
+                'requests': requests,
+                'requests_per_file': round(requests / count, 3),
+                'errors': errors
+            }
+    return results
+
+
+def bench_completion(args) -> Dict[str, Any]:
+    """How long after a job finishes the client returns it, with events and with polling."""
+    results = {}
+    tokens = int(args.job_seconds * args.tokens_per_sec)
+    for mode in ('events', 'polling'):
+        with MockProcess(tokens_per_sec=args.tokens_per_sec, output_tokens=tokens, ttft=0,
+                         slots=args.completion_jobs, no_events=(mode == 'polling'),
+                         request_latency=args.latency_ms / 1000) as urls:
+            client = make_client(urls)
+
+            def run(i: int) -> float:
+                # Stagger submissions so jobs finish out of phase with any poll interval
+                time.sleep(i * 0.137)
+                job_id = client.submit_task('code-analysis', f'job {i}')['job_id']
+                status = client.wait_for_job(job_id, timeout=600)
+                return time.time() - status['finishedOn'] / 1000
+
+            with ThreadPoolExecutor(max_workers=args.completion_jobs) as pool:
+                lags = list(pool.map(run, range(args.completion_jobs)))
+            results[mode] = summarize([max(0.0, lag) for lag in lags])
+    return results
+
+
+def bench_streaming(args) -> Dict[str, Any]:
+    """Token timing seen by the client against what the mock produced."""
+    ttft, tps, tokens = 0.2, args.stream_tokens_per_sec, args.stream_tokens
+    with MockProcess(tokens_per_sec=tps, output_tokens=tokens, ttft=ttft,
+                     request_latency=args.latency_ms / 1000) as urls:
+        client = make_client(urls)
+        start = time.perf_counter()
+        stream = client.query_ollama_stream('benchmark prompt', model='mock-model')
+        received = sum(1 for _ in stream)
+        wall = time.perf_counter() - start
+    return {
+        'tokens': received,
+        'wall_s': round(wall, 3),
+        'ideal_s': round(ttft + (tokens - 1) / tps, 3),
+        'time_to_first_token_ms': round((stream.stats['time_to_first_token'] or 0) * 1000, 3),
+        'configured_ttft_ms': ttft * 1000,
+        'client_tokens_per_sec': round(stream.stats['tokens_per_sec'], 2),
+        'configured_tokens_per_sec': tps
+    }
+
+
+def bench_memory(args, directory: Path) -> Dict[str, Any]:
+    """Peak Python allocations while batch_analyze handles the largest file count."""
+    count = max(args.files)
+    paths = _write_files(directory, count, args.file_size)
+    with MockProcess(tokens_per_sec=args.tokens_per_sec, output_tokens=args.output_tokens,
+                     ttft=args.ttft, slots=args.slots) as urls:
+        client = make_client(urls)
+        tracemalloc.start()
+        for _ in client.batch_analyze(paths, timeout=600):
+            pass
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    result = {
+        'files': count,
+        'input_bytes': sum(Path(p).stat().st_size for p in paths),
+        'traced_peak_kb': round(peak / 1024, 1),
+        'traced_retained_kb': round(current / 1024, 1)
+    }
+    if resource:
+        scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB elsewhere
+        result['max_rss_kb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1024, 1)
+    return result
+
+
+def _flatten(data: Any, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix] = data
+    return flat
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]):
+    """Print every numeric result that exists in both runs with its relative change."""
+    old, new = _flatten(previous.get('results', {})), _flatten(current['results'])
+    print(f"\n📊 Compared with {previous.get('meta', {}).get('timestamp', 'previous run')}")
+    print(f"{'metric':<48} {'before':>12} {'after':>12} {'change':>9}")
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+        print(f"{key:<48} {before:>12g} {after:>12g} {change:>9}")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+BENCHMARKS = ['overhead', 'batch', 'completion', 'streaming', 'memory']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the CMini Python client')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='Run only these benchmarks')
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes for a fast sanity run')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--calls', type=int, default=300, help='Calls per overhead measurement')
+    parser.add_argument('--files', type=int, nargs='+', default=[10, 50, 200, 500],
+                        help='File counts for the batch benchmark')
+    parser.add_argument('--file-size', type=int, default=4000, help='Bytes per generated file')
+    parser.add_argument('--slots', type=int, default=4, help='Mock parallel generation slots')
+    parser.add_argument('--tokens-per-sec', type=float, default=2000.0,
+                        help='Mock generation speed (high, so batches measure the client)')
+    parser.add_argument('--output-tokens', type=int, default=100)
+    parser.add_argument('--ttft', type=float, default=0.02)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added to every mock request')
+    parser.add_argument('--job-seconds', type=float, default=3.0,
+                        help='Job run time in the completion benchmark')
+    parser.add_argument('--completion-jobs', type=int, default=20)
+    parser.add_argument('--stream-tokens', type=int, default=200)
+    parser.add_argument('--stream-tokens-per-sec', type=float, default=50.0)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.calls = min(args.calls, 50)
+        args.files = [f for f in args.files if f <= 50] or [10]
+        args.job_seconds = min(args.job_seconds, 1.5)
+        args.completion_jobs = min(args.completion_jobs, 6)
+        args.stream_tokens = min(args.stream_tokens, 50)
+
+    selected = args.only or BENCHMARKS
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix='cmini-bench-') as tmp:
+        directory = Path(tmp)
+        for name in selected:
+            print(f"⏱️  {name}...", flush=True)
+            start = time.perf_counter()
+            if name == 'overhead':
+                results[name] = bench_overhead(args)
+            elif name == 'batch':
+                results[name] = bench_batch(args, directory)
+            elif name == 'completion':
+                results[name] = bench_completion(args)
+            elif name == 'streaming':
+                results[name] = bench_streaming(args)
+            elif name == 'memory':
+                results[name] = bench_memory(args, directory)
+            print(f"   done in {time.perf_counter() - start:.1f}s")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args)
+        },
+        'results': results
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Async Claude Mini Client - asyncio-native counterpart of ClaudeMiniClient.
+
+Use this when fanning out many Mini tasks at once: asyncio.gather over
+hundreds of jobs runs on one event loop instead of one thread per job.
+
+Requires aiohttp (pip3 install --user aiohttp).
+
+Example:
+    async with AsyncClaudeMiniClient(max_concurrency=16) as client:
+        results = await asyncio.gather(
+            *(client.analyze_code(src) for src in sources))
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, Union
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from mini_transport import RATE_LIMIT_WAIT, retry_after, server_headers, shared_transport
+
+# Status-only view of a job; see ClaudeMiniClient.check_job
+JOB_STATUS_FIELDS = 'id,lane,state,progress,failedReason,processedOn,finishedOn'
+
+
+class AsyncClaudeMiniClient:
+    """Asyncio client for the M4 Pro Mini development server."""
+
+    def __init__(self,
+                 server_url: Optional[str] = None,
+                 ollama_url: Optional[str] = None,
+                 max_concurrency: int = 32,
+                 poll_interval: float = 2.0):
+        """
+        Args:
+            server_url: Task queue URL (defaults to the fastest configured address)
+            ollama_url: Ollama URL (defaults to the fastest configured address)
+            max_concurrency: Max HTTP requests in flight at once
+            poll_interval: Seconds between status checks in wait_for_job
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncClaudeMiniClient requires aiohttp: pip3 install --user aiohttp")
+
+        # Defaults are resolved on first use, after probing which address answers
+        self.server_url = server_url.rstrip('/') if server_url else None
+        self.ollama_url = ollama_url.rstrip('/') if ollama_url else None
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._resolving: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> 'AsyncClaudeMiniClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying connection pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        # Created lazily so the client can be constructed outside a running loop
+        if self._session is None or self._session.closed:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency))
+        return self._session
+
+    async def _base_url(self, kind: str) -> str:
+        """URL of the server or Ollama, probing the configured addresses on first use."""
+        attr = f"{kind}_url"
+        if getattr(self, attr) is None:
+            if self._resolving is None:
+                self._resolving = asyncio.Lock()
+            async with self._resolving:
+                if getattr(self, attr) is None:
+                    # Until probed, the sync transport ranks addresses in config order;
+                    # probe off the loop so the fastest reachable one is used
+                    transport = shared_transport(kind)
+                    await asyncio.get_running_loop().run_in_executor(None, transport.probe)
+                    setattr(self, attr, transport.base_url.rstrip('/'))
+        return getattr(self, attr)
+
+    async def _request(self, method: str, kind: str, path: str, timeout: float = 30,
+                       **kwargs) -> Dict[str, Any]:
+        url = f"{await self._base_url(kind)}{path}"
+        session = self._get_session()
+        if kind == 'server':
+            kwargs['headers'] = {**server_headers(), **kwargs.get('headers', {})}
+        deadline = time.monotonic() + RATE_LIMIT_WAIT
+        while True:
+            # Only the HTTP call holds a slot; waits and sleeps never do
+            async with self._semaphore:
+                async with session.request(method, url,
+                                           timeout=aiohttp.ClientTimeout(total=timeout, connect=3.05),
+                                           **kwargs) as response:
+                    delay = retry_after(response.headers)
+                    if response.status != 429 or time.monotonic() + delay > deadline:
+                        response.raise_for_status()
+                        return await response.json()
+            # Rate limited, so not processed: safe to send again once allowed
+            await asyncio.sleep(delay)
+
+    async def submit_task(self,
+                          task_type: str,
+                          content: str,
+                          context: str = "",
+                          priority: Union[str, int] = "normal",
+                          wait: bool = False,
+                          timeout: int = 300) -> Dict[str, Any]:
+        """Submit a development task; see ClaudeMiniClient.submit_task."""
+        result = await self._request(
+            'POST', 'server', '/api/dev-task',
+            json={
+                "task_type": task_type,
+                "content": content,
+                "context": context,
+                "priority": priority
+            }
+        )
+
+        if wait and result.get('success'):
+            return await self.wait_for_job(result['job_id'], timeout)
+
+        return result
+
+    async def check_job(self, job_id: str, include_result: bool = False,
+                        fields: Optional[str] = None) -> Dict[str, Any]:
+        """Check the status of a submitted job; see ClaudeMiniClient.check_job."""
+        if fields is None:
+            fields = JOB_STATUS_FIELDS + (',result' if include_result else '')
+        return await self._request('GET', 'server', f"/api/job/{job_id}", timeout=15,
+                                   params={'fields': fields} if fields else None)
+
+    async def wait_for_job(self, job_id: str, timeout: int = 300) -> Dict[str, Any]:
+        """
+        Wait for a job to complete and return its result.
+
+        Cancelling the awaiting task stops the wait cleanly without leaking a
+        concurrency slot; the job itself keeps running on the Mini.
+        """
+        deadline = time.monotonic() + timeout
+
+        while time.monotonic() < deadline:
+            job_status = await self.check_job(job_id, include_result=True)
+
+            if job_status['state'] == 'completed':
+                return job_status
+            elif job_status['state'] == 'failed':
+                raise Exception(f"Job failed: {job_status.get('failedReason')}")
+
+            await asyncio.sleep(min(self.poll_interval, max(0, deadline - time.monotonic())))
+
+        raise TimeoutError(f"Job {job_id} did not complete within {timeout} seconds")
+
+    async def analyze_code(self, code: str, wait: bool = True) -> Dict[str, Any]:
+        """Analyze code for quality, issues, and improvements."""
+        return await self.submit_task('code-analysis', code, wait=wait)
+
+    async def generate_code(self, requirements: str, context: str = "", wait: bool = True) -> Dict[str, Any]:
+        """Generate code based on requirements."""
+        return await self.submit_task('code-generation', requirements, context, wait=wait)
+
+    async def query_ollama(self,
+                           prompt: str,
+                           model: str = "qwen2.5-coder:32b-instruct-q4_K_M",
+                           temperature: float = 0.3,
+                           max_tokens: int = 8192) -> str:
+        """Query Ollama directly; see ClaudeMiniClient.query_ollama."""
+        result = await self._request(
+            'POST', 'ollama', '/api/generate',
+            json={
+                "model": model,
+                "prompt": prompt,
+                "options": {
+                    "temperature": temperature,
+                    "num_predict": max_tokens
+                },
+                "stream": False
+            },
+            timeout=600
+        )
+        return result['response']
+
+    async def execute_crew(self,
+                           task_description: str,
+                           context: str = "",
+                           process_type: str = "sequential",
+                           wait: bool = False) -> Dict[str, Any]:
+        """Execute a CrewAI crew; see ClaudeMiniClient.execute_crew."""
+        result = await self._request(
+            'POST', 'server', '/api/execute-crew',
+            json={
+                "task_description": task_description,
+                "context": context,
+                "process_type": process_type
+            }
+        )
+
+        if wait and result.get('success'):
+            return await self.wait_for_job(result['job_id'], timeout=86400)  # 24 hour timeout
+
+        return result
+
+    async def execute_autogen(self,
+                              task_description: str,
+                              initial_message: str = "",
+                              max_rounds: int = 10,
+                              context: str = "",
+                              wait: bool = False) -> Dict[str, Any]:
+        """Execute an AutoGen team; see ClaudeMiniClient.execute_autogen."""
+        result = await self._request(
+            'POST', 'server', '/api/execute-autogen',
+            json={
+                "task_description": task_description,
+                "initial_message": initial_message or task_description,
+                "max_rounds": max_rounds,
+                "context": context
+            }
+        )
+
+        if wait and result.get('success'):
+            return await self.wait_for_job(result['job_id'], timeout=86400)  # 24 hour timeout
+
+        return result
+
+    async def batch_analyze(self, code_files: List[str], wait: bool = True,
+                            timeout: int = 300) -> List[Dict[str, Any]]:
+        """Analyze multiple code files concurrently; results keep input order."""
+        async def submit(file_path: str) -> Dict[str, Any]:
+            with open(file_path, 'r') as f:
+                content = f.read()
+            job = await self.submit_task('code-analysis', content, wait=False)
+            return {'file': file_path, 'job_id': job['job_id']}
+
+        jobs = await asyncio.gather(*(submit(p) for p in code_files))
+
+        if not wait:
+            return list(jobs)
+
+        async def collect(job_info: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                result = await self.wait_for_job(job_info['job_id'], timeout)
+                return {'file': job_info['file'], 'result': result}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return {'file': job_info['file'], 'error': str(e)}
+
+        return list(await asyncio.gather(*(collect(j) for j in jobs)))
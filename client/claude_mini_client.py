@@ -5,28 +5,295 @@ This module is automatically available to Claude for offloading heavy tasks.
 """
 
 import os
+import re
 import json
 import time
-import requests
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Union
 from pathlib import Path
 
+import requests
+
+from mini_cache import ResultCache
+from mini_chunking import CHARS_PER_TOKEN, chunk_budget, chunk_source, estimate_tokens
+from mini_transport import (MiniTransport, EventStreamUnavailable, backoff_intervals,
+                            shared_transport, watch_job_groups, watch_jobs)
+
+# Jobs per /api/dev-tasks/batch request and ids per status/event request
+BATCH_SIZE = 100
+
+# Fields check_job asks for by default: status only, no input or result payloads
+JOB_STATUS_FIELDS = 'id,lane,state,progress,failedReason,processedOn,finishedOn'
+
+# Task types whose results depend only on their input, so they can be cached
+CACHEABLE_TASKS = {'code-analysis', 'code-generation', 'code-refactor', 'documentation', 'testing'}
+
+# Sampling options the server applies to dev-tasks (part of the cache key)
+DEFAULT_SAMPLING = {'temperature': 0.3, 'max_tokens': 8192}
+
+# How long the server's model map is trusted before it is fetched again
+MODEL_CONFIG_TTL = 600
+
+# Leading bytes process_file checks for NULs before treating a file as text
+BINARY_SNIFF_BYTES = 8192
+
+# Task types whose per-chunk outputs are joined in source order rather than merged by the model
+CONCATENATED_TASKS = {'code-refactor', 'testing'}
+
+REDUCE_PROMPT = """The following {task_type} results were produced separately for consecutive parts of {filename}.
+Merge them into a single {task_type} report for the whole file:
+1. Combine and deduplicate findings that appear in several parts
+2. Keep references to functions, classes and line numbers
+3. Keep the section structure of the individual reports
+
+{findings}"""
+
+class OllamaStream:
+    """
+    Iterator over tokens streamed from Ollama's /api/generate.
+    
+    Stop iterating (break, or call close()) to abort generation early; the
+    connection is dropped and Ollama frees the model. Once the stream ends,
+    `stats` holds timing metrics, with durations in seconds:
+    time_to_first_token, tokens, tokens_per_sec, load_duration,
+    prompt_eval_duration, eval_duration, total_duration, stopped_early.
+    """
+    
+    def __init__(self, response):
+        self._response = response
+        self._started = time.monotonic()
+        self._first_token_at = None
+        self._tokens = 0
+        self._done = False
+        self.text = ""
+        self.stats: Dict[str, Any] = {}
+    
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for line in self._response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                token = chunk.get('response', '')
+                if token:
+                    if self._first_token_at is None:
+                        self._first_token_at = time.monotonic()
+                    self._tokens += 1
+                    self.text += token
+                    yield token
+                if chunk.get('done'):
+                    self._done = True
+                    self._finish(chunk)
+                    return
+        finally:
+            if not self._done:
+                self._finish({})
+            self._response.close()
+    
+    def __enter__(self) -> 'OllamaStream':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Abort the stream if it is still running."""
+        if not self.stats:
+            self._finish({})
+        self._response.close()
+    
+    def _finish(self, final: Dict[str, Any]):
+        now = time.monotonic()
+        ns = 1e9
+        ttft = self._first_token_at - self._started if self._first_token_at else None
+        eval_count = final.get('eval_count', self._tokens)
+        eval_duration = final.get('eval_duration', 0) / ns
+        if eval_duration:
+            tokens_per_sec = eval_count / eval_duration
+        elif self._first_token_at and now > self._first_token_at:
+            tokens_per_sec = self._tokens / (now - self._first_token_at)
+        else:
+            tokens_per_sec = 0.0
+        self.stats = {
+            'time_to_first_token': ttft,
+            'tokens': eval_count,
+            'tokens_per_sec': tokens_per_sec,
+            'load_duration': final.get('load_duration', 0) / ns,
+            'prompt_eval_duration': final.get('prompt_eval_duration', 0) / ns,
+            'prompt_tokens': final.get('prompt_eval_count', 0),
+            'eval_duration': eval_duration,
+            'total_duration': final.get('total_duration', 0) / ns or now - self._started,
+            'stopped_early': not final.get('done', False)
+        }
+
+class MiniSession:
+    """
+    Multi-turn conversation on the Mini over one pinned model.
+    
+    The server carries the model's context from turn to turn, so the code is
+    evaluated once and follow-up tasks only pay for their own instructions.
+    Close the session (or use it as a context manager) when done; idle
+    sessions also expire on the server. Against a server without session
+    support every turn is submitted as a standalone task with the code.
+    
+    Example:
+        with mini_client.session(code) as session:
+            analysis = session.analyze()
+            refactored = session.refactor()
+            tests = session.generate_tests()
+    """
+    
+    def __init__(self, client: 'ClaudeMiniClient', code: Optional[str] = None,
+                 task_type: str = 'code-analysis', model: Optional[str] = None,
+                 keep_alive: Optional[str] = None):
+        self.client = client
+        self.code = code
+        self._options = {'task_type': task_type, 'model': model, 'keep_alive': keep_alive}
+        self._sent_code: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.model: Optional[str] = None
+        self._open()
+    
+    def _open(self):
+        response = self.client.server.post(
+            "/api/sessions", json={k: v for k, v in self._options.items() if v})
+        if response.status_code == 404:
+            # Older server; turns fall back to standalone tasks
+            self.session_id = None
+            return
+        response.raise_for_status()
+        info = response.json()
+        self.session_id = info['session_id']
+        self.model = info.get('model')
+        self._sent_code = None
+    
+    def ask(self, task_type: str, content: Optional[str] = None, context: str = "",
+            wait: bool = True, timeout: int = 300) -> Dict[str, Any]:
+        """
+        Run a task as the next turn of the conversation.
+        
+        Args:
+            task_type: Type of task (code-analysis, code-refactor, testing, ...)
+            content: New code for this turn; defaults to the session's code
+            context: Additional context for the task
+            wait: If True, wait for the turn to complete
+            timeout: Max seconds to wait if wait=True
+        """
+        if content is not None:
+            self.code = content
+        if self.session_id is None:
+            return self.client.submit_task(task_type, self.code or "", context,
+                                           wait=wait, timeout=timeout)
+        
+        for attempt in range(2):
+            payload = {"task_type": task_type, "context": context}
+            if self.code != self._sent_code:
+                # Only send code the server hasn't seen in this session
+                payload["content"] = self.code
+            response = self.client.server.post(f"/api/sessions/{self.session_id}/tasks", json=payload)
+            if response.status_code != 404 or attempt:
+                break
+            # Session expired; open a new one and send the code again
+            self._open()
+            if self.session_id is None:
+                return self.ask(task_type, context=context, wait=wait, timeout=timeout)
+        response.raise_for_status()
+        self._sent_code = self.code
+        result = response.json()
+        
+        if wait and result.get('success'):
+            return self.client.wait_for_job(result['job_id'], timeout)
+        return result
+    
+    def analyze(self, **kwargs) -> Dict[str, Any]:
+        return self.ask('code-analysis', **kwargs)
+    
+    def refactor(self, **kwargs) -> Dict[str, Any]:
+        return self.ask('code-refactor', **kwargs)
+    
+    def debug(self, error_info: str, **kwargs) -> Dict[str, Any]:
+        return self.ask('debugging', context=error_info, **kwargs)
+    
+    def generate_docs(self, **kwargs) -> Dict[str, Any]:
+        return self.ask('documentation', **kwargs)
+    
+    def generate_tests(self, **kwargs) -> Dict[str, Any]:
+        return self.ask('testing', **kwargs)
+    
+    def info(self) -> Dict[str, Any]:
+        """Turns, context size and token counts of the session on the server."""
+        if self.session_id is None:
+            return {'session_id': None, 'supported': False}
+        response = self.client.server.get(f"/api/sessions/{self.session_id}")
+        response.raise_for_status()
+        return response.json()
+    
+    def close(self):
+        """Close the session on the server; safe to call more than once."""
+        if self.session_id is None:
+            return
+        try:
+            self.client.server.request('DELETE', f"/api/sessions/{self.session_id}")
+        finally:
+            self.session_id = None
+    
+    def __enter__(self) -> 'MiniSession':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
 class ClaudeMiniClient:
     """Client for interacting with the M4 Pro Mini development server."""
     
-    def __init__(self):
-        """Initialize client with environment variables or defaults."""
-        self.server_url = os.getenv('CLAUDE_DEV_SERVER', 'http://100.114.129.95:3001')
-        self.ollama_url = os.getenv('CLAUDE_OLLAMA_HOST', 'http://100.114.129.95:11434')
+    def __init__(self,
+                 server: Optional[MiniTransport] = None,
+                 ollama: Optional[MiniTransport] = None,
+                 cache: Optional[ResultCache] = None,
+                 index: Optional[Any] = None):
+        """
+        Initialize client with environment variables or defaults.
+        
+        Args:
+            server: Transport for the task queue (defaults to the shared one)
+            ollama: Transport for Ollama (defaults to the shared one)
+            cache: Local result cache; set CLAUDE_MINI_CACHE=1 to enable the
+                default one without passing it explicitly
+            index: mini_index.CodeIndex used to attach relevant repository
+                code to generate_code/debug_code
+        """
+        self.server = server or shared_transport('server')
+        self.ollama = ollama or shared_transport('ollama')
         self.mini_ip = os.getenv('CLAUDE_MINI_IP', '100.114.129.95')
         
+        if cache is None and os.getenv('CLAUDE_MINI_CACHE', '').lower() in ('1', 'true', 'yes'):
+            cache = ResultCache()
+        self.cache = cache
+        self.index = index
+        self._model_config: Optional[Dict[str, Any]] = None
+        self._model_config_at = 0.0
+    
+    @property
+    def server_url(self) -> str:
+        """Currently preferred task queue URL (Tailscale or LAN)."""
+        return self.server.base_url
+    
+    @property
+    def ollama_url(self) -> str:
+        """Currently preferred Ollama URL (Tailscale or LAN)."""
+        return self.ollama.base_url
+        
     def submit_task(self, 
                    task_type: str, 
                    content: str, 
                    context: str = "",
-                   priority: int = 0,
+                   priority: Union[str, int] = "normal",
                    wait: bool = False,
-                   timeout: int = 300) -> Dict[str, Any]:
+                   timeout: int = 300,
+                   bypass_cache: bool = False,
+                   lane: Optional[str] = None,
+                   cascade: Optional[bool] = None) -> Dict[str, Any]:
         """
         Submit a development task to the Mini's queue.
         
@@ -34,75 +301,208 @@ class ClaudeMiniClient:
             task_type: Type of task (code-analysis, code-generation, etc.)
             content: Main content to process
             context: Additional context for the task
-            priority: Job priority (higher = more urgent)
+            priority: "high", "normal" or "low", as for CrewAIExpertClient
+                  (integers still work: > 0 high, 0 normal, < 0 low). Within
+                  a priority, the server shares each lane fairly between
+                  clients (CLAUDE_MINI_API_KEY identifies this one)
             wait: If True, wait for job completion
             timeout: Max seconds to wait if wait=True
+            bypass_cache: Skip the local result cache for this call
+            lane: Server workload lane (interactive, batch or agent);
+                  the server defaults to interactive
+            cascade: Run on the 14B model first and escalate to 32B only if its
+                  output fails validation (None: the server's CASCADE_TASK_TYPES decide)
             
         Returns:
-            Job info dict with job_id, or result if wait=True
+            Job info dict with job_id, or result if wait=True. Results served
+            from the cache carry cache_hit=True.
         """
-        response = requests.post(
-            f"{self.server_url}/api/dev-task",
-            json={
-                "task_type": task_type,
-                "content": content,
-                "context": context,
-                "priority": priority
-            }
-        )
+        cache_key = None
+        if wait and not bypass_cache and task_type in CACHEABLE_TASKS:
+            cache_key = self._cache_key(task_type, content, context, cascade)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return {**cached, 'cache_hit': True}
+        
+        payload = {
+            "task_type": task_type,
+            "content": content,
+            "context": context,
+            "priority": priority
+        }
+        if lane:
+            payload["lane"] = lane
+        if cascade is not None:
+            payload["cascade"] = cascade
+        response = self.server.post("/api/dev-task", json=payload)
         response.raise_for_status()
         result = response.json()
         
         if wait and result.get('success'):
-            return self.wait_for_job(result['job_id'], timeout)
+            job_status = self.wait_for_job(result['job_id'], timeout)
+            if cache_key and (job_status.get('result') or {}).get('success'):
+                # Input payload is already known to the caller; don't store it twice
+                self.cache.put(cache_key, {k: v for k, v in job_status.items() if k != 'data'})
+            return job_status
         
         return result
     
-    def check_job(self, job_id: str) -> Dict[str, Any]:
-        """Check the status of a submitted job."""
-        response = requests.get(f"{self.server_url}/api/job/{job_id}")
+    def _cache_key(self, task_type: str, content: str, context: str,
+                   cascade: Optional[bool] = None) -> Optional[str]:
+        """Cache key for a task, or None if caching is off or the model can't be resolved."""
+        if self.cache is None:
+            return None
+        config = self._get_model_config()
+        if not config or not config.get('configured'):
+            return None
+        model = self._resolve_model(task_type)
+        if cascade is not None:
+            # Cascaded answers come from either tier; keep them apart from single-model ones
+            model = f"cascade={cascade}:{model}"
+        return ResultCache.make_key(task_type, model, config.get('prompt_version', '0'),
+                                    content, context, DEFAULT_SAMPLING)
+    
+    def _get_model_config(self) -> Optional[Dict[str, Any]]:
+        if self._model_config is None or time.monotonic() - self._model_config_at > MODEL_CONFIG_TTL:
+            try:
+                self._model_config = self.get_available_models()
+                self._model_config_at = time.monotonic()
+            except Exception:
+                return self._model_config
+        return self._model_config
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the local result cache (empty if disabled)."""
+        return self.cache.stats() if self.cache else {}
+    
+    def check_job(self, job_id: str, include_result: bool = False,
+                  fields: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Check the status of a submitted job.
+        
+        Args:
+            job_id: Job to check
+            include_result: Also return the job's result (None until it completes)
+            fields: Comma-separated fields to return instead of the status view,
+                e.g. "state,result.result"; "" returns the full job including its input
+        
+        Returns:
+            Job status dict; large inputs come back as blob references (see fetch_blob)
+        """
+        if fields is None:
+            fields = JOB_STATUS_FIELDS + (',result' if include_result else '')
+        response = self.server.get(f"/api/job/{job_id}", params={'fields': fields} if fields else None)
+        response.raise_for_status()
+        return response.json()
+    
+    def fetch_blob(self, ref: Dict[str, Any]) -> Any:
+        """Fetch the content behind a blob reference ({"$blob": ..., "url": ...}) in a job."""
+        response = self.server.get(ref.get('url') or f"/api/blobs/{ref['$blob']}")
         response.raise_for_status()
         return response.json()
     
     def wait_for_job(self, job_id: str, timeout: int = 300) -> Dict[str, Any]:
-        """Wait for a job to complete and return its result."""
-        start_time = time.time()
+        """
+        Wait for a job to complete and return its result.
+        
+        Listens on the server's job event stream so completion is seen as soon
+        as it happens; falls back to polling with a growing interval when the
+        stream is unavailable.
+        """
+        deadline = time.monotonic() + timeout
+        
+        try:
+            for event, data in watch_jobs(self.server, [job_id], deadline):
+                if event == 'completed':
+                    return self.check_job(job_id, include_result=True)
+                elif event == 'failed':
+                    raise Exception(f"Job failed: {data.get('failedReason')}")
+                elif event == 'missing':
+                    break
+        except EventStreamUnavailable:
+            pass
         
-        while time.time() - start_time < timeout:
-            job_status = self.check_job(job_id)
+        for interval in backoff_intervals():
+            if time.monotonic() >= deadline:
+                break
+            # The result field is empty until completion, so asking for it costs nothing
+            job_status = self.check_job(job_id, include_result=True)
             
             if job_status['state'] == 'completed':
                 return job_status
             elif job_status['state'] == 'failed':
                 raise Exception(f"Job failed: {job_status.get('failedReason')}")
             
-            time.sleep(2)
+            time.sleep(min(interval, max(0, deadline - time.monotonic())))
         
         raise TimeoutError(f"Job {job_id} did not complete within {timeout} seconds")
     
-    def analyze_code(self, code: str, wait: bool = True) -> Dict[str, Any]:
+    def analyze_code(self, code: str, wait: bool = True, bypass_cache: bool = False) -> Dict[str, Any]:
         """Analyze code for quality, issues, and improvements."""
-        return self.submit_task('code-analysis', code, wait=wait)
+        if wait and self._needs_chunking('code-analysis', code):
+            return self.map_reduce(code, 'code-analysis')
+        return self.submit_task('code-analysis', code, wait=wait, bypass_cache=bypass_cache)
     
-    def generate_code(self, requirements: str, context: str = "", wait: bool = True) -> Dict[str, Any]:
-        """Generate code based on requirements."""
-        return self.submit_task('code-generation', requirements, context, wait=wait)
+    def generate_code(self, requirements: str, context: str = "", wait: bool = True,
+                      bypass_cache: bool = False, index: Optional[Any] = None,
+                      context_budget: int = 2000, cascade: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Generate code based on requirements.
+        
+        With an index (or self.index), the repository chunks most relevant to
+        the requirements are appended to context, up to context_budget tokens.
+        cascade=True tries the 14B model first (see submit_task).
+        """
+        context = self._with_retrieved_context(requirements, context, index, context_budget)
+        return self.submit_task('code-generation', requirements, context, wait=wait,
+                                bypass_cache=bypass_cache, cascade=cascade)
     
-    def refactor_code(self, code: str, wait: bool = True) -> Dict[str, Any]:
+    def refactor_code(self, code: str, wait: bool = True, bypass_cache: bool = False,
+                      cascade: Optional[bool] = None) -> Dict[str, Any]:
         """Refactor code for better quality and maintainability."""
-        return self.submit_task('code-refactor', code, wait=wait)
+        if wait and self._needs_chunking('code-refactor', code):
+            return self.map_reduce(code, 'code-refactor')
+        return self.submit_task('code-refactor', code, wait=wait, bypass_cache=bypass_cache,
+                                cascade=cascade)
     
-    def debug_code(self, code: str, error_info: str, wait: bool = True) -> Dict[str, Any]:
-        """Debug code with error information."""
-        return self.submit_task('debugging', code, error_info, wait=wait)
+    def debug_code(self, code: str, error_info: str, wait: bool = True,
+                   index: Optional[Any] = None, context_budget: int = 2000,
+                   cascade: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Debug code with error information.
+        
+        With an index (or self.index), related repository code found from the
+        error and the code is attached, up to context_budget tokens.
+        """
+        error_info = self._with_retrieved_context(f"{error_info}\n{code}", error_info,
+                                                  index, context_budget)
+        return self.submit_task('debugging', code, error_info, wait=wait, cascade=cascade)
     
-    def generate_docs(self, code: str, wait: bool = True) -> Dict[str, Any]:
+    def _with_retrieved_context(self, query: str, context: str, index: Optional[Any],
+                                budget: int) -> str:
+        """Append the index's top chunks for query to context."""
+        index = index or self.index
+        if index is None or budget <= 0:
+            return context
+        try:
+            retrieved = index.context_for(query, token_budget=budget)
+        except requests.RequestException as e:
+            print(f"⚠️ Index lookup failed, continuing without it: {e}")
+            return context
+        if not retrieved:
+            return context
+        return f"{context}\n\nRelevant code from the repository:\n{retrieved}".strip()
+    
+    def generate_docs(self, code: str, wait: bool = True, bypass_cache: bool = False) -> Dict[str, Any]:
         """Generate documentation for code."""
-        return self.submit_task('documentation', code, wait=wait)
+        return self.submit_task('documentation', code, wait=wait, bypass_cache=bypass_cache)
     
-    def generate_tests(self, code: str, wait: bool = True) -> Dict[str, Any]:
-        """Generate test suite for code."""
-        return self.submit_task('testing', code, wait=wait)
+    def generate_tests(self, code: str, wait: bool = True, bypass_cache: bool = False,
+                       cascade: Optional[bool] = None) -> Dict[str, Any]:
+        """Generate test suite for code; cascade=True tries the 14B model first."""
+        return self.submit_task('testing', code, wait=wait, bypass_cache=bypass_cache,
+                                cascade=cascade)
     
     def query_ollama(self, 
                     prompt: str, 
@@ -121,8 +521,8 @@ class ClaudeMiniClient:
         Returns:
             Generated text response
         """
-        response = requests.post(
-            f"{self.ollama_url}/api/generate",
+        response = self.ollama.post(
+            "/api/generate",
             json={
                 "model": model,
                 "prompt": prompt,
@@ -131,42 +531,243 @@ class ClaudeMiniClient:
                     "num_predict": max_tokens
                 },
                 "stream": False
-            },
-            timeout=600
+            }
         )
         response.raise_for_status()
         return response.json()['response']
     
+    def query_ollama_stream(self,
+                            prompt: str,
+                            model: str = "qwen2.5-coder:32b-instruct-q4_K_M",
+                            temperature: float = 0.3,
+                            max_tokens: int = 8192) -> OllamaStream:
+        """
+        Query Ollama directly, yielding tokens as they are generated.
+        
+        Example:
+            stream = mini_client.query_ollama_stream("Explain this regex: ...")
+            for token in stream:
+                print(token, end="", flush=True)
+            print(stream.stats['time_to_first_token'], stream.stats['tokens_per_sec'])
+        
+        Returns:
+            OllamaStream; break out of it to stop generation early
+        """
+        response = self.ollama.post(
+            "/api/generate",
+            json={
+                "model": model,
+                "prompt": prompt,
+                "options": {
+                    "temperature": temperature,
+                    "num_predict": max_tokens
+                },
+                "stream": True
+            },
+            stream=True
+        )
+        response.raise_for_status()
+        return OllamaStream(response)
+    
+    def session(self, code: Optional[str] = None, task_type: str = 'code-analysis',
+                model: Optional[str] = None, keep_alive: Optional[str] = None) -> MiniSession:
+        """
+        Open a conversation session that reuses the model's context across tasks.
+        
+        Args:
+            code: Code the session's tasks work on (can also be passed per turn)
+            task_type: Selects the pinned model when model isn't given
+            model: Model to pin for every turn
+            keep_alive: How long Ollama keeps the model loaded between turns
+        """
+        return MiniSession(self, code, task_type, model, keep_alive)
+    
     def get_server_health(self) -> Dict[str, Any]:
         """Check the health of the task queue server."""
-        response = requests.get(f"{self.server_url}/health")
+        response = self.server.get("/health")
         response.raise_for_status()
         return response.json()
     
     def get_queue_stats(self) -> Dict[str, Any]:
         """Get statistics about the task queue."""
-        response = requests.get(f"{self.server_url}/api/stats")
+        response = self.server.get("/api/stats")
         response.raise_for_status()
         return response.json()
     
+    def get_metrics(self, raw: bool = False) -> Union[Dict[str, List[Dict[str, Any]]], str]:
+        """
+        Get the server's inference metrics from /api/metrics.
+        
+        Args:
+            raw: Return the Prometheus text exposition unparsed
+            
+        Returns:
+            {metric_name: [{'labels': {...}, 'value': float}, ...]}, e.g.
+            metrics['cmini_generation_tokens_per_second_sum'] per task_type
+            and model; histogram buckets carry an 'le' label
+        """
+        response = self.server.get("/api/metrics")
+        response.raise_for_status()
+        return response.text if raw else _parse_prometheus(response.text)
+    
     def get_available_models(self) -> Dict[str, Any]:
         """Get list of configured and installed models."""
-        response = requests.get(f"{self.server_url}/api/models")
+        response = self.server.get("/api/models")
         response.raise_for_status()
         return response.json()
     
-    def process_file(self, file_path: str, task_type: str, context: str = "") -> Dict[str, Any]:
-        """Process a file by uploading it to the Mini."""
+    def process_file(self, file_path: str, task_type: str, context: str = "",
+                     wait: bool = False) -> Dict[str, Any]:
+        """
+        Process a file by uploading it to the Mini.
+        
+        Files too large for the model's context are split and analyzed as
+        chunks (see map_reduce). Without wait, the chunk job IDs are returned
+        under job_ids with chunked=True and no merged report is produced.
+        Only files that may need splitting are read here; invalid UTF-8 is
+        replaced rather than failing the read.
+        
+        Raises:
+            ValueError: if the file looks binary (has NUL bytes)
+        """
+        with open(file_path, 'rb') as f:
+            if b'\0' in f.read(BINARY_SNIFF_BYTES):
+                raise ValueError(f"{file_path} looks like a binary file; process_file takes text")
+        
+        # A character is at least one byte, so a file whose size fits the budget fits it as text
+        budget = self._chunk_budget(task_type)
+        if os.path.getsize(file_path) // CHARS_PER_TOKEN + 1 > budget:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+            if estimate_tokens(content) > budget:
+                if wait:
+                    return self.map_reduce(content, task_type, context, filename=os.path.basename(file_path))
+                chunks = self._chunk(content, task_type, os.path.basename(file_path))
+                job_ids = self.submit_batch([
+                    {'task_type': task_type, 'content': text, 'context': context}
+                    for text in chunks])
+                return {'success': True, 'chunked': True, 'job_ids': job_ids}
+        
         with open(file_path, 'rb') as f:
             files = {'file': f}
             data = {'task_type': task_type, 'context': context}
-            response = requests.post(
-                f"{self.server_url}/api/process-file",
+            response = self.server.post(
+                "/api/process-file",
                 files=files,
                 data=data
             )
         response.raise_for_status()
-        return response.json()
+        result = response.json()
+        
+        if wait and result.get('success'):
+            return self.wait_for_job(result['job_id'])
+        
+        return result
+    
+    def map_reduce(self,
+                   content: str,
+                   task_type: str = 'code-analysis',
+                   context: str = "",
+                   filename: str = "",
+                   timeout: int = 3600) -> Dict[str, Any]:
+        """
+        Run a task over content too large for one prompt.
+        
+        The content is split (along top-level definitions for Python, line
+        windows otherwise) into chunks sized for the task's model, the chunks
+        run as parallel dev-tasks, and a reduce step merges the per-chunk
+        findings into one report. Refactor and test outputs are joined in
+        source order instead.
+        
+        Returns:
+            Job-status-shaped dict: result['result'] holds the merged report,
+            result['chunks'] the line ranges and job IDs of each chunk
+        """
+        deadline = time.monotonic() + timeout
+        model = self._resolve_model(task_type)
+        budget = self._chunk_budget(task_type)
+        chunks = chunk_source(content, budget, filename)
+        
+        if len(chunks) == 1:
+            return self.submit_task(task_type, content, context, wait=True, timeout=timeout)
+        
+        job_ids = self.submit_batch([
+            {'task_type': task_type, 'content': f"{c.header(filename)}\n{c.content}", 'context': context}
+            for c in chunks])
+        outputs = self._collect_outputs(job_ids, deadline)
+        
+        sections = [f"{c.header(filename)}\n{outputs[job_id]}" for c, job_id in zip(chunks, job_ids)]
+        if task_type in CONCATENATED_TASKS:
+            report = "\n\n".join(sections)
+        else:
+            report = self._reduce(task_type, filename or 'the file', sections, budget, deadline)
+        
+        return {
+            'state': 'completed',
+            'chunked': True,
+            'result': {
+                'success': True,
+                'result': report,
+                'task_type': task_type,
+                'model_used': model,
+                'chunks': [{'start_line': c.start_line, 'end_line': c.end_line,
+                            'names': c.names, 'job_id': job_id}
+                           for c, job_id in zip(chunks, job_ids)]
+            }
+        }
+    
+    def _reduce(self, task_type: str, filename: str, sections: List[str],
+                budget: int, deadline: float) -> str:
+        """Merge per-chunk outputs, in several rounds if they don't fit one prompt."""
+        while True:
+            groups: List[List[str]] = [[]]
+            size = 0
+            for section in sections:
+                tokens = estimate_tokens(section)
+                if groups[-1] and size + tokens > budget:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(section)
+                size += tokens
+            if len(groups) == len(sections) > 1:
+                # Every section alone fills a prompt; merge pairwise so rounds still shrink
+                groups = [sections[i:i + 2] for i in range(0, len(sections), 2)]
+            
+            job_ids = self.submit_batch([{
+                'task_type': task_type,
+                'content': "\n\n".join(group),
+                'custom_prompt': REDUCE_PROMPT.format(
+                    task_type=task_type, filename=filename, findings="\n\n".join(group))
+            } for group in groups])
+            outputs = self._collect_outputs(job_ids, deadline)
+            sections = [outputs[job_id] for job_id in job_ids]
+            if len(sections) == 1:
+                return sections[0]
+    
+    def _collect_outputs(self, job_ids: List[str], deadline: float) -> Dict[str, str]:
+        outputs = {}
+        for status in self.iter_completed(job_ids, max(1, int(deadline - time.monotonic()))):
+            if status['state'] != 'completed':
+                raise Exception(f"Job {status['id']} failed: {status.get('failedReason')}")
+            outputs[str(status['id'])] = status['result']['result']
+        return outputs
+    
+    def _resolve_model(self, task_type: str) -> Optional[str]:
+        config = self._get_model_config() or {}
+        configured = config.get('configured') or {}
+        return configured.get(task_type) or configured.get('code-analysis')
+    
+    def _chunk_budget(self, task_type: str) -> int:
+        model = self._resolve_model(task_type)
+        num_ctx = ((self._get_model_config() or {}).get('num_ctx') or {}).get(model)
+        return chunk_budget(model, num_ctx=num_ctx)
+    
+    def _needs_chunking(self, task_type: str, content: str) -> bool:
+        return estimate_tokens(content) > self._chunk_budget(task_type)
+    
+    def _chunk(self, content: str, task_type: str, filename: str) -> List[str]:
+        chunks = chunk_source(content, self._chunk_budget(task_type), filename)
+        return [f"{c.header(filename)}\n{c.content}" for c in chunks]
     
     def execute_crew(self, 
                      task_description: str,
@@ -185,8 +786,8 @@ class ClaudeMiniClient:
         Returns:
             Job info with job_id, or result if wait=True
         """
-        response = requests.post(
-            f"{self.server_url}/api/execute-crew",
+        response = self.server.post(
+            "/api/execute-crew",
             json={
                 "task_description": task_description,
                 "context": context,
@@ -222,8 +823,8 @@ class ClaudeMiniClient:
         Returns:
             Job info with job_id, or result if wait=True
         """
-        response = requests.post(
-            f"{self.server_url}/api/execute-autogen",
+        response = self.server.post(
+            "/api/execute-autogen",
             json={
                 "task_description": task_description,
                 "initial_message": initial_message or task_description,
@@ -241,36 +842,169 @@ class ClaudeMiniClient:
         
         return result
     
-    def batch_analyze(self, code_files: List[str], wait: bool = True) -> List[Dict[str, Any]]:
-        """Analyze multiple code files in parallel."""
-        jobs = []
+    def submit_batch(self, tasks: List[Dict[str, Any]]) -> List[str]:
+        """
+        Submit many development tasks with one request per BATCH_SIZE tasks.
         
-        # Submit all jobs
+        Args:
+            tasks: Dicts with task_type, content and optional context/priority/lane;
+                   the server runs them in the batch lane unless lane says otherwise
+            
+        Returns:
+            Job IDs in the same order as tasks
+        """
+        job_ids = []
+        for start in range(0, len(tasks), BATCH_SIZE):
+            chunk = tasks[start:start + BATCH_SIZE]
+            # Over this client's submission rate, the transport waits out Retry-After
+            response = self.server.post("/api/dev-tasks/batch", json={"tasks": chunk})
+            if response.status_code == 404:
+                # Older server without the batch endpoint
+                job_ids.extend(
+                    self.submit_task(t['task_type'], t['content'], t.get('context', ''),
+                                     t.get('priority', 'normal'), lane=t.get('lane'))['job_id']
+                    for t in chunk)
+                continue
+            response.raise_for_status()
+            job_ids.extend(str(job_id) for job_id in response.json()['job_ids'])
+        return job_ids
+    
+    def check_jobs(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Check the status of many jobs; returns {job_id: status} without input payloads."""
+        statuses = {}
+        for start in range(0, len(job_ids), BATCH_SIZE):
+            chunk = job_ids[start:start + BATCH_SIZE]
+            response = self.server.get("/api/jobs/status", params={"ids": ",".join(chunk)})
+            if response.status_code == 404:
+                # Older server without the bulk endpoint
+                statuses.update((job_id, self.check_job(job_id, include_result=True)) for job_id in chunk)
+                continue
+            response.raise_for_status()
+            statuses.update(response.json()['jobs'])
+        return statuses
+    
+    def iter_completed(self, job_ids: List[str], timeout: int = 3600) -> Iterator[Dict[str, Any]]:
+        """
+        Yield job statuses as jobs finish, in completion order.
+        
+        Each item has id, state ("completed", "failed" or "missing"), and
+        result or failedReason. Raises TimeoutError if jobs are still running
+        after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        # Insertion-ordered set: constant-time removal, polling keeps submission order
+        pending = dict.fromkeys(str(job_id) for job_id in job_ids)
+        use_stream = True
+        
+        while pending and use_stream and time.monotonic() < deadline:
+            # One stream per BATCH_SIZE ids (keeps URLs short), all watched at once
+            ids = list(pending)
+            groups = [ids[start:start + BATCH_SIZE] for start in range(0, len(ids), BATCH_SIZE)]
+            finished = 0
+            for event, data in watch_job_groups(self.server, groups, deadline, include_result=True):
+                if event not in ('completed', 'failed', 'missing'):
+                    continue
+                job_id = str(data['job_id'])
+                if job_id in pending:
+                    del pending[job_id]
+                    finished += 1
+                    yield {
+                        'id': job_id,
+                        'state': event,
+                        'result': data.get('result'),
+                        'failedReason': data.get('failedReason') or data.get('error')
+                    }
+            if not finished:
+                # Streams ended without progress (or never opened); don't spin reconnecting
+                use_stream = False
+        
+        for interval in backoff_intervals():
+            if not pending or time.monotonic() >= deadline:
+                break
+            statuses = self.check_jobs(list(pending))
+            for job_id in list(pending):
+                status = statuses.get(job_id, {'id': job_id, 'state': 'missing'})
+                if status['state'] in ('completed', 'failed', 'missing'):
+                    del pending[job_id]
+                    yield status
+            if pending:
+                time.sleep(min(interval, max(0, deadline - time.monotonic())))
+        
+        if pending:
+            raise TimeoutError(f"{len(pending)} jobs did not complete within {timeout} seconds")
+    
+    def batch_analyze(self, code_files: List[str], wait: bool = True,
+                      timeout: int = 3600) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+        """
+        Analyze multiple code files in parallel.
+        
+        All files are submitted up front in bulk. With wait=True, returns an
+        iterator that yields {'file', 'result'} or {'file', 'error'} as each
+        analysis finishes (completion order, not submission order), so one
+        slow file never holds up the rest.
+        
+        Example:
+            for item in mini_client.batch_analyze(paths):
+                print(item['file'], 'error' in item)
+        """
+        tasks = []
         for file_path in code_files:
             with open(file_path, 'r') as f:
-                content = f.read()
-            job = self.submit_task('code-analysis', content, wait=False)
-            jobs.append({'file': file_path, 'job_id': job['job_id']})
+                tasks.append({'task_type': 'code-analysis', 'content': f.read()})
+        
+        job_ids = self.submit_batch(tasks)
+        jobs = [{'file': path, 'job_id': job_id} for path, job_id in zip(code_files, job_ids)]
         
         if not wait:
             return jobs
         
-        # Wait for all jobs to complete
-        results = []
-        for job_info in jobs:
-            try:
-                result = self.wait_for_job(job_info['job_id'])
-                results.append({
-                    'file': job_info['file'],
-                    'result': result
-                })
-            except Exception as e:
-                results.append({
-                    'file': job_info['file'],
-                    'error': str(e)
-                })
-        
-        return results
+        return self._iter_batch_results(jobs, timeout)
+
+    def analyze_changes(self, repo: str = '.', ref: str = 'HEAD',
+                        paths: Optional[List[str]] = None, full: bool = False,
+                        task_type: str = 'code-analysis', timeout: int = 3600) -> Dict[str, Any]:
+        """
+        Incremental batch_analyze over a git repository.
+
+        Only files changed since the last run are submitted (just the changed
+        hunks, with context, when the change is small); unchanged files reuse
+        their stored report, keyed by git blob hash. See mini_incremental.
+
+        Returns:
+            {'baseline', 'head', 'files', 'stats'} covering every file at ref
+        """
+        from mini_incremental import IncrementalAnalyzer
+        analyzer = IncrementalAnalyzer(self, repo, task_type=task_type)
+        return analyzer.analyze(ref, paths=paths, full=full, timeout=timeout)
+
+    def _iter_batch_results(self, jobs: List[Dict[str, Any]], timeout: int) -> Iterator[Dict[str, Any]]:
+        files = {job['job_id']: job['file'] for job in jobs}
+        try:
+            for status in self.iter_completed(list(files), timeout):
+                file_path = files.pop(str(status['id']))
+                if status['state'] == 'completed':
+                    yield {'file': file_path, 'result': status}
+                else:
+                    yield {'file': file_path,
+                           'error': f"Job failed: {status.get('failedReason')}"}
+        except TimeoutError as e:
+            for file_path in files.values():
+                yield {'file': file_path, 'error': str(e)}
+
+def _parse_prometheus(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse Prometheus text exposition into {name: [{'labels', 'value'}]}."""
+    metrics: Dict[str, List[Dict[str, Any]]] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        series, _, value = line.rpartition(' ')
+        name, _, label_text = series.partition('{')
+        labels = {}
+        for key, val in re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', label_text):
+            labels[key] = val.replace('\\"', '"').replace('\\n', '\n').replace('\\\\', '\\')
+        metrics.setdefault(name, []).append({'labels': labels, 'value': float(value)})
+    return metrics
 
 # Create global instance
 mini_client = ClaudeMiniClient()
@@ -290,6 +1024,10 @@ def ask_mini(prompt: str, model: str = "qwen2.5-coder:32b-instruct-q4_K_M") -> s
     """Quick function to query Mini's LLM directly."""
     return mini_client.query_ollama(prompt, model)
 
+def ask_mini_stream(prompt: str, model: str = "qwen2.5-coder:32b-instruct-q4_K_M") -> OllamaStream:
+    """Quick function to stream tokens from Mini's LLM as they are generated."""
+    return mini_client.query_ollama_stream(prompt, model)
+
 if __name__ == "__main__":
     # Quick test
     print("Testing connection to Mini Dev Server...")
@@ -4,13 +4,15 @@ CrewAI Expert Client for CMini
 Simplifies crew creation by using the expert service on the Mini
 """
 
-import requests
 import json
 import time
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 
+from mini_transport import (EventStreamUnavailable, backoff_intervals,
+                            shared_transport, server_endpoints, watch_jobs)
+
 # Configuration
 MINI_IP = "100.114.129.95"
 TASK_QUEUE_PORT = 3001
@@ -53,13 +55,20 @@ class AdvancedCrewRequest:
 class CrewAIExpertClient:
     """Client for interacting with the CrewAI Expert Service"""
     
-    def __init__(self, base_url: str = BASE_URL, api_key: Optional[str] = None):
-        self.base_url = base_url
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+        # Without an explicit URL, share the Tailscale/LAN failover pool with ClaudeMiniClient
+        self.transport = shared_transport(
+            'server', [base_url] if base_url else server_endpoints())
         self.api_key = api_key
         self.headers = {"Content-Type": "application/json"}
         if api_key:
             self.headers["X-API-Key"] = api_key
     
+    @property
+    def base_url(self) -> str:
+        """Currently preferred server URL."""
+        return self.transport.base_url
+    
     def simple_crew(self, description: str, context: str = "", 
                    files: List[str] = None, priority: str = "normal") -> Dict:
         """
@@ -78,8 +87,8 @@ class CrewAIExpertClient:
             priority=Priority(priority)
         )
         
-        response = requests.post(
-            f"{self.base_url}/api/crew/simple",
+        response = self.transport.post(
+            "/api/crew/simple",
             json={
                 "description": request.description,
                 "context": request.context,
@@ -105,9 +114,12 @@ class CrewAIExpertClient:
         """
         Analyze what crew configuration would be used without executing
         Useful for previewing what the expert system would create
+        
+        Task and total times are learned from completed crews on the Mini;
+        tasks whose role hasn't run yet show the default estimate.
         """
-        response = requests.post(
-            f"{self.base_url}/api/crew/analyze",
+        response = self.transport.post(
+            "/api/crew/analyze",
             json={
                 "description": description,
                 "context": context,
@@ -124,7 +136,17 @@ class CrewAIExpertClient:
             for agent in result['agents']:
                 print(f"   - {agent['role']}: {agent['goal'][:60]}...")
             print(f"📝 Tasks: {len(result['tasks'])} tasks")
-            print(f"⏱️  Total estimated time: {result['estimated_total_time']}s")
+            for task in result['tasks']:
+                basis = task.get('estimate_basis', 'prior')
+                source = (f"learned from {task['estimate_samples']} runs"
+                          if basis != 'prior' else "default estimate")
+                print(f"   - {task['id']}: ~{task['estimated_time']}s ({source})")
+            estimate = result.get('estimate', {})
+            if estimate.get('parallel_tasks', 1) > 1:
+                print(f"⏱️  Total estimated time: {result['estimated_total_time']}s "
+                      f"({estimate['parallel_tasks']} tasks in parallel)")
+            else:
+                print(f"⏱️  Total estimated time: {result['estimated_total_time']}s")
             print(f"🔄 Process type: {result['process_type']}")
             return result
         else:
@@ -151,8 +173,8 @@ class CrewAIExpertClient:
         if request.custom_tasks:
             payload["custom_tasks"] = request.custom_tasks
         
-        response = requests.post(
-            f"{self.base_url}/api/crew/advanced",
+        response = self.transport.post(
+            "/api/crew/advanced",
             json=payload,
             headers=self.headers
         )
@@ -171,8 +193,8 @@ class CrewAIExpertClient:
     
     def get_patterns(self) -> List[Dict]:
         """Get all available crew patterns"""
-        response = requests.get(
-            f"{self.base_url}/api/crew/patterns",
+        response = self.transport.get(
+            "/api/crew/patterns",
             headers=self.headers
         )
         
@@ -193,9 +215,16 @@ class CrewAIExpertClient:
             return []
     
     def get_crew_status(self, job_id: str) -> Dict:
-        """Get detailed status of a crew execution"""
-        response = requests.get(
-            f"{self.base_url}/api/crew/status/{job_id}",
+        """
+        Get detailed status of a crew execution
+        
+        result['recovery'] says what survived interruptions: attempts_made,
+        one entry in resumes per restart or retry (the steps it reused and
+        the partial output it continued from, in chars) and the current
+        checkpoint of each step.
+        """
+        response = self.transport.get(
+            f"/api/crew/status/{job_id}",
             headers=self.headers
         )
         
@@ -211,6 +240,12 @@ class CrewAIExpertClient:
                     print(f"Current task: {info['current_task'].get('description', 'Unknown')}")
                 if info.get('completed_tasks'):
                     print(f"Completed: {', '.join(info['completed_tasks'])}")
+            recovery = result.get('recovery') or {}
+            for resume in recovery.get('resumes', []):
+                partial_chars = sum(resume['partial'].values())
+                print(f"♻️  Resumed at {resume['at']} (attempt {resume['attempt']}): "
+                      f"reused {len(resume['completed'])} finished step(s), "
+                      f"continued from {partial_chars:,} chars of partial output")
             return result
         else:
             print(f"❌ Failed to get status: {response.text}")
@@ -221,21 +256,45 @@ class CrewAIExpertClient:
         """
         Wait for a crew to complete with progress updates
         
+        Progress and completion are pushed over the server's job event stream.
+        If that is unavailable, status is polled with an interval that starts
+        short and backs off up to check_interval.
+        
         Args:
             job_id: The job ID to monitor
-            check_interval: Seconds between status checks
+            check_interval: Longest gap between status checks when polling
             max_wait: Maximum seconds to wait before timeout
         """
         print(f"\n⏳ Waiting for crew job {job_id} to complete...")
-        start_time = time.time()
+        deadline = time.monotonic() + max_wait
         last_progress = -1
         
-        while (time.time() - start_time) < max_wait:
+        try:
+            for event, data in watch_jobs(self.transport, [job_id], deadline):
+                current_progress = data.get('progress')
+                if current_progress is not None and current_progress != last_progress:
+                    print(f"Progress: {current_progress}%")
+                    last_progress = current_progress
+                
+                if event == 'completed':
+                    print(f"✅ Crew completed successfully!")
+                    return self.get_job_result(job_id)
+                elif event == 'failed':
+                    print(f"❌ Crew failed!")
+                    return self.get_crew_status(job_id)
+                elif event == 'missing':
+                    break
+        except EventStreamUnavailable:
+            pass
+        
+        for interval in backoff_intervals(start=1.0, maximum=check_interval):
+            if time.monotonic() >= deadline:
+                break
             status = self.get_crew_status(job_id)
             
             if not status:
                 print("Failed to get status, retrying...")
-                time.sleep(check_interval)
+                time.sleep(interval)
                 continue
             
             current_progress = status.get('progress', 0)
@@ -250,15 +309,15 @@ class CrewAIExpertClient:
                 print(f"❌ Crew failed!")
                 return status
             
-            time.sleep(check_interval)
+            time.sleep(min(interval, max(0, deadline - time.monotonic())))
         
         print(f"⏱️ Timeout waiting for crew after {max_wait} seconds")
         return None
     
     def get_job_result(self, job_id: str) -> Dict:
         """Get the final result of a completed job"""
-        response = requests.get(
-            f"{self.base_url}/api/job/{job_id}",
+        response = self.transport.get(
+            f"/api/job/{job_id}",
             headers=self.headers
         )
         
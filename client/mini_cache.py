@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Mini Cache - Content-addressed local cache for Mini task results.
+
+Re-running analysis, docs or test generation on unchanged code burns minutes
+of 32B GPU time for an identical answer. ResultCache stores completed job
+results on disk, keyed by everything that determines the output:
+task type, resolved model, prompt template version, content hash and
+sampling options.
+
+Entries expire after a TTL and the store is kept under a size limit by
+evicting the least recently used entries. Backed by SQLite, so several
+processes can share one cache safely.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'cmini', 'results.db')
+
+
+class ResultCache:
+    """Size-bounded LRU cache of job results with TTL, persisted in SQLite."""
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 ttl: float = 7 * 24 * 3600):
+        """
+        Args:
+            path: SQLite file (default ~/.cache/cmini/results.db)
+            max_bytes: Evict least recently used entries above this size
+            ttl: Seconds an entry stays valid
+        """
+        self.path = path or os.getenv('CLAUDE_MINI_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._db.commit()
+
+    @staticmethod
+    def make_key(task_type: str, model: str, prompt_version: str,
+                 content: str, context: str = "",
+                 options: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from everything that determines a task's output."""
+        content_hash = hashlib.sha256(
+            content.encode('utf-8') + b'\0' + context.encode('utf-8')).hexdigest()
+        material = json.dumps({
+            'task_type': task_type,
+            'model': model,
+            'prompt_version': prompt_version,
+            'content': content_hash,
+            'options': options or {}
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value, created FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a value, evicting least recently used entries if over max_bytes."""
+        blob = zlib.compress(json.dumps(value).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?)', (key, blob, len(blob), now, now))
+            self._evict(now)
+            self._db.commit()
+
+    def invalidate(self, key: str):
+        """Drop a single entry."""
+        with self._lock:
+            self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+            self._db.commit()
+
+    def clear(self):
+        """Drop every entry and reset statistics."""
+        with self._lock:
+            self._db.execute('DELETE FROM results')
+            self._db.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts for this process plus current store size."""
+        with self._lock:
+            entries, size = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'path': self.path
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self, now: float):
+        cursor = self._db.execute('DELETE FROM results WHERE created < ?', (now - self.ttl,))
+        self.evictions += cursor.rowcount
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+                'SELECT key, size FROM results ORDER BY accessed ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+            total -= size
+            self.evictions += 1
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Mini Chunking - Split source files into model-sized pieces.
+
+Files larger than a model's context window are split before they are
+submitted, instead of overflowing the prompt:
+  - Python is split along top-level definitions using ast, so functions
+    and classes stay whole whenever they fit
+  - everything else (and Python that doesn't parse) is split into line
+    windows with a small overlap
+
+Chunk size comes from the context the target model runs with minus room
+for the prompt template and the generated answer.
+"""
+
+import ast
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Context windows (tokens) of the models configured on the Mini
+MODEL_CONTEXT_WINDOWS = {
+    'qwen2.5-coder:32b-instruct-q4_K_M': 32768,
+    'qwen2.5-coder:14b-instruct-q4_K_M': 32768,
+    'llama3.2:3b': 131072,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# The server runs models with at most this num_ctx (MAX_NUM_CTX in
+# server/routing.js) unless MODEL_NUM_CTX overrides it
+MAX_NUM_CTX = 32768
+
+# Tokens reserved for the prompt template wrapped around each chunk
+PROMPT_OVERHEAD_TOKENS = 512
+
+# Code tokenizes denser than prose; err towards smaller chunks
+CHARS_PER_TOKEN = 3
+
+
+@dataclass
+class Chunk:
+    """A contiguous slice of a source file."""
+    content: str
+    start_line: int
+    end_line: int
+    names: List[str]
+
+    def header(self, filename: str = "") -> str:
+        """Location line prepended to the chunk so findings keep file/line references."""
+        where = f"{filename} " if filename else ""
+        label = f" ({', '.join(self.names)})" if self.names else ""
+        return f"# {where}lines {self.start_line}-{self.end_line}{label}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting; no tokenizer needed."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_budget(model: Optional[str], output_tokens: int = 8192,
+                 num_ctx: Optional[int] = None) -> int:
+    """
+    Max input tokens per chunk for a model, leaving room for prompt and output.
+
+    num_ctx is the context the server runs the model with (/api/models);
+    without it the model's window, capped at MAX_NUM_CTX, is assumed.
+    """
+    window = num_ctx or min(MODEL_CONTEXT_WINDOWS.get(model or '', DEFAULT_CONTEXT_WINDOW), MAX_NUM_CTX)
+    # Small windows can't afford the full output budget; keep at least 3/4 for input
+    reserve = min(output_tokens, window // 4)
+    return max(512, window - reserve - PROMPT_OVERHEAD_TOKENS)
+
+
+def chunk_lines(source: str, max_tokens: int, overlap: int = 5,
+                first_line: int = 1) -> List[Chunk]:
+    """Split text into line windows of at most max_tokens, overlapping by a few lines."""
+    lines = source.splitlines(keepends=True)
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = start
+        size = 0
+        while end < len(lines) and (end == start or size + estimate_tokens(lines[end]) <= max_tokens):
+            size += estimate_tokens(lines[end])
+            end += 1
+        chunks.append(Chunk(''.join(lines[start:end]), first_line + start, first_line + end - 1, []))
+        if end >= len(lines):
+            break
+        start = max(start + 1, end - overlap)
+    return chunks
+
+
+def chunk_python(source: str, max_tokens: int) -> List[Chunk]:
+    """
+    Split Python source along top-level statements.
+
+    Consecutive statements are packed together up to max_tokens. A single
+    definition larger than that is split into line windows.
+
+    Raises:
+        SyntaxError: if the source doesn't parse
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    chunks: List[Chunk] = []
+    current: List[ast.stmt] = []
+    # First line not yet assigned to a chunk; chunks are contiguous, so
+    # comments and blank lines between statements are never dropped
+    cursor = 1
+    size = 0
+
+    def tokens(first: int, last: int) -> int:
+        return estimate_tokens(''.join(lines[first - 1:last]))
+
+    def flush(last: int):
+        nonlocal cursor, size
+        names = [n.name for n in current if hasattr(n, 'name')]
+        chunks.append(Chunk(''.join(lines[cursor - 1:last]), cursor, last, names))
+        current.clear()
+        cursor, size = last + 1, 0
+
+    for node in tree.body:
+        if current:
+            added = tokens(current[-1].end_lineno + 1, node.end_lineno)
+            if size + added <= max_tokens:
+                current.append(node)
+                size += added
+                continue
+            flush(current[-1].end_lineno)
+
+        size = tokens(cursor, node.end_lineno)
+        if size <= max_tokens:
+            current.append(node)
+            continue
+
+        # A single definition too large for one chunk
+        name = getattr(node, 'name', None)
+        for piece in chunk_lines(''.join(lines[cursor - 1:node.end_lineno]), max_tokens,
+                                 first_line=cursor):
+            piece.names = [name] if name else []
+            chunks.append(piece)
+        cursor, size = node.end_lineno + 1, 0
+
+    if current:
+        flush(len(lines))
+    elif cursor <= len(lines):
+        # Trailing comments after an oversized definition
+        chunks.append(Chunk(''.join(lines[cursor - 1:]), cursor, len(lines), []))
+    return chunks
+
+
+def chunk_source(source: str, max_tokens: int, filename: str = "") -> List[Chunk]:
+    """Split a file for its language: ast for Python, line windows otherwise."""
+    if estimate_tokens(source) <= max_tokens:
+        return [Chunk(source, 1, max(1, len(source.splitlines())), [])]
+    if filename.endswith('.py') or not filename:
+        try:
+            return chunk_python(source, max_tokens)
+        except SyntaxError:
+            pass
+    return chunk_lines(source, max_tokens)
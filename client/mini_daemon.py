@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Local Mini daemon - one long-lived ClaudeMiniClient behind a Unix socket.
+
+Shell helpers and tool calls that each start Python, import requests and
+build a fresh client pay for an interpreter start, the imports and new
+TCP connections on every call. The daemon keeps all of that warm:
+
+  - the pooled transports to the task queue and Ollama
+  - the local result cache (CLAUDE_MINI_CACHE)
+  - job-event subscriptions: concurrent waits on one job share a single
+    event stream, and finished results are answered locally
+
+Callers talk to it with mini_stub.py, which only imports socket and json.
+
+Protocol: newline-delimited JSON over the socket, any number of requests
+per connection:
+
+    -> {"method": "check_job", "args": ["42"], "kwargs": {}}
+    <- {"ok": true, "result": {...}}
+    <- {"ok": false, "error": "...", "type": "HTTPError"}
+
+Usage:
+    python3 mini_daemon.py start     # in the background
+    python3 mini_daemon.py run       # in the foreground
+    python3 mini_daemon.py status
+    python3 mini_daemon.py stop
+"""
+
+import importlib.util
+import inspect
+import json
+import math
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from mini_stub import SOCKET_PATH, DaemonClient, DaemonUnavailable
+
+# Client methods that return live objects (streams, sessions) rather than data
+UNSUPPORTED_METHODS = {'close', 'query_ollama_stream', 'session'}
+
+# Finished job results kept for repeated waits
+RESULT_CACHE_SIZE = 256
+
+
+def load_client_class():
+    """ClaudeMiniClient from the module path, or from ~/.claude_mini_client.py as INSTALL.md copies it."""
+    try:
+        from claude_mini_client import ClaudeMiniClient
+        return ClaudeMiniClient
+    except ImportError:
+        path = os.path.expanduser('~/.claude_mini_client.py')
+        spec = importlib.util.spec_from_file_location('claude_mini_client', path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['claude_mini_client'] = module
+        spec.loader.exec_module(module)
+        return module.ClaudeMiniClient
+
+
+class JobWaiters:
+    """
+    Shares one wait (and event stream) per job between concurrent callers.
+
+    The shared wait lasts until the latest deadline any caller asked for;
+    each caller still gives up at its own timeout.
+    """
+
+    def __init__(self, client: Any, keep: int = RESULT_CACHE_SIZE):
+        self.client = client
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._waiting: Dict[str, Dict[str, Any]] = {}
+        self._finished: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.stats = {'waits': 0, 'shared': 0, 'answered_locally': 0}
+
+    def wait(self, job_id: str, timeout: int = 300) -> Dict[str, Any]:
+        job_id = str(job_id)
+        with self._lock:
+            self.stats['waits'] += 1
+            if job_id in self._finished:
+                self._finished.move_to_end(job_id)
+                self.stats['answered_locally'] += 1
+                return self._finished[job_id]
+            deadline = time.monotonic() + timeout
+            waiter = self._waiting.get(job_id)
+            if waiter is None:
+                waiter = {'done': threading.Event(), 'result': None, 'error': None, 'deadline': deadline}
+                self._waiting[job_id] = waiter
+                threading.Thread(target=self._run, args=(job_id, waiter), daemon=True).start()
+            else:
+                waiter['deadline'] = max(waiter['deadline'], deadline)
+                self.stats['shared'] += 1
+
+        if not waiter['done'].wait(timeout):
+            raise TimeoutError(f"Job {job_id} did not complete within {timeout} seconds")
+        if waiter['error'] is not None:
+            raise waiter['error']
+        return waiter['result']
+
+    def _run(self, job_id: str, waiter: Dict[str, Any]):
+        while True:
+            result, error = None, None
+            try:
+                remaining = max(1, math.ceil(waiter['deadline'] - time.monotonic()))
+                result = self.client.wait_for_job(job_id, timeout=remaining)
+            except Exception as e:
+                error = e
+            with self._lock:
+                # A caller that joined later wants to wait longer
+                if isinstance(error, TimeoutError) and waiter['deadline'] > time.monotonic():
+                    continue
+                waiter['result'], waiter['error'] = result, error
+                del self._waiting[job_id]
+                # Only completed jobs are final; failures and timeouts are retried by the next wait
+                if error is None:
+                    self._finished[job_id] = result
+                    while len(self._finished) > self.keep:
+                        self._finished.popitem(last=False)
+            break
+        waiter['done'].set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'in_progress': len(self._waiting), 'finished_cached': len(self._finished)}
+
+
+class MiniDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server dispatching requests to one shared client."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str = SOCKET_PATH, client: Optional[Any] = None):
+        self.path = path
+        self.client = client or load_client_class()()
+        self.waiters = JobWaiters(self.client)
+        self.started = time.time()
+        self.requests = 0
+        self.method_counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            try:
+                DaemonClient(path).call('ping')
+                raise RuntimeError(f"A daemon is already listening on {path}")
+            except DaemonUnavailable:
+                os.unlink(path)  # Left behind by a daemon that didn't shut down cleanly
+        super().__init__(path, DaemonHandler)
+        os.chmod(path, 0o600)
+
+    def dispatch(self, method: str, args: list, kwargs: dict) -> Any:
+        with self._counts_lock:
+            self.requests += 1
+            self.method_counts[method] = self.method_counts.get(method, 0) + 1
+
+        if method == 'ping':
+            return 'pong'
+        if method == 'daemon_stats':
+            return self.get_stats()
+        if method == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return 'shutting down'
+        if method == 'wait_for_job':
+            return self.waiters.wait(*args, **kwargs)
+
+        if method.startswith('_') or method in UNSUPPORTED_METHODS:
+            raise AttributeError(f"Method {method} is not available through the daemon")
+        func = getattr(self.client, method, None)
+        if not callable(func):
+            raise AttributeError(f"Unknown method {method}")
+        result = func(*args, **kwargs)
+        return list(result) if inspect.isgenerator(result) else result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'socket': self.path,
+            'uptime': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'methods': dict(self.method_counts),
+            'waits': self.waiters.get_stats(),
+            'cache': self.client.cache_stats(),
+            'server_url': self.client.server_url
+        }
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                result = self.server.dispatch(request['method'], request.get('args') or [],
+                                              request.get('kwargs') or {})
+                response = {'ok': True, 'result': result}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e), 'type': type(e).__name__}
+            try:
+                self.wfile.write(json.dumps(response, default=str).encode() + b'\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+def start_background(path: str = SOCKET_PATH, wait: float = 10.0) -> int:
+    """Start the daemon as a detached process; returns its pid once it answers."""
+    log_path = os.path.join(os.path.dirname(path), 'daemon.log')
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    with open(log_path, 'a') as log:
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'run'],
+                                   stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                   start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Daemon exited with code {process.returncode}; see {log_path}")
+        try:
+            DaemonClient(path).call('ping')
+            return process.pid
+        except DaemonUnavailable:
+            time.sleep(0.05)
+    raise RuntimeError(f"Daemon did not start within {wait} seconds; see {log_path}")
+
+
+def main(argv=None) -> int:
+    command = (argv if argv is not None else sys.argv[1:] or ['status'])[0]
+
+    if command == 'run':
+        daemon = MiniDaemon()
+        print(f"🔌 Mini daemon listening on {daemon.path} (pid {os.getpid()})", flush=True)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.server_close()
+        return 0
+
+    if command == 'start':
+        try:
+            print(f"✅ Mini daemon running: {json.dumps(DaemonClient().call('daemon_stats'))}")
+            return 0
+        except DaemonUnavailable:
+            pass
+        print(f"✅ Mini daemon started (pid {start_background()}) on {SOCKET_PATH}")
+        return 0
+
+    try:
+        if command == 'stop':
+            DaemonClient().call('shutdown')
+            print("🛑 Mini daemon stopped")
+        elif command == 'status':
+            print(json.dumps(DaemonClient().call('daemon_stats'), indent=2))
+        else:
+            print(f"Unknown command {command}; use run, start, stop or status", file=sys.stderr)
+            return 2
+    except DaemonUnavailable:
+        print(f"⚠️ No Mini daemon on {SOCKET_PATH}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Mini Incremental - Git-diff-driven repository analysis.
+
+Re-running batch_analyze over a whole repository on every push costs the
+same GPU time whether one line changed or a thousand. IncrementalAnalyzer
+keeps the commit it last analyzed (the baseline) and each file's report,
+keyed by git blob hash, and on the next run:
+  - reuses the stored report for every file whose blob is unchanged
+    (also across renames and copies)
+  - sends only the changed hunks, with surrounding context and the file's
+    previous findings, for files that changed a little
+  - fully re-analyzes new files and files that changed a lot
+  - merges reused, updated and new reports into one report for the commit
+
+State is a JSON file inside the repository's .git directory, so it is never
+committed and each clone keeps its own. Each file's report remembers the
+commit it describes, so a run limited to some paths leaves the other
+files' reports as they are, and they are diffed from their own commit
+later. If that commit no longer exists (rebased or garbage-collected),
+the file is analyzed in full.
+
+Example:
+    report = mini_client.analyze_changes('~/src/myproject')
+    print(report['stats'])
+"""
+
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ANALYZED_EXTENSIONS = {
+    '.py', '.js', '.ts', '.tsx', '.jsx', '.go', '.rs', '.java', '.kt', '.c', '.h',
+    '.cpp', '.hpp', '.cs', '.rb', '.php', '.swift', '.scala', '.sh', '.sql',
+}
+
+# Re-analyze the whole file once the diff is this large a share of it...
+FULL_REANALYSIS_RATIO = 0.5
+# ...or after this many hunk-only updates, so merged reports don't drift
+MAX_INCREMENTAL_UPDATES = 5
+
+HUNK_PROMPT = """You previously produced this {task_type} report for {filename}:
+
+{previous}
+
+The file has since changed. Here is the diff ({baseline}..{head}) with surrounding context:
+
+{diff}
+
+Review only the changed code:
+1. Report new issues introduced by the change, with function names and line numbers
+2. List earlier findings that the change resolves
+3. Note earlier findings that no longer apply because the code they refer to moved or was removed
+Do not repeat findings about unchanged code."""
+
+
+class IncrementalAnalyzer:
+    """Analyze a git repository, paying only for what changed since the last run."""
+
+    def __init__(self,
+                 client: Any,
+                 repo: str = '.',
+                 task_type: str = 'code-analysis',
+                 context_lines: int = 20,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            client: ClaudeMiniClient used to submit and collect jobs
+            repo: Path inside the git repository
+            task_type: Task run on each file
+            context_lines: Unchanged lines sent around each changed hunk
+            state_path: Baseline file (default <git dir>/cmini-<task_type>.json)
+        """
+        self.client = client
+        self.task_type = task_type
+        self.context_lines = context_lines
+        self.root = Path(self._git('rev-parse', '--show-toplevel', cwd=repo).strip())
+        git_dir = Path(self._git('rev-parse', '--absolute-git-dir', cwd=self.root).strip())
+        self.state_path = Path(state_path) if state_path else git_dir / f'cmini-{task_type}.json'
+
+    def _git(self, *args: str, cwd: Optional[Any] = None) -> str:
+        return subprocess.run(['git', *args], cwd=cwd or self.root, check=True,
+                              capture_output=True, text=True, errors='replace').stdout
+
+    def _has_commit(self, sha: str) -> bool:
+        return subprocess.run(['git', 'cat-file', '-e', f'{sha}^{{commit}}'], cwd=self.root,
+                              capture_output=True).returncode == 0
+
+    def load_state(self) -> Dict[str, Any]:
+        """Stored baseline: {'baseline': sha, 'files': {path: {...}}, 'blobs': {blob: result}}."""
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {'baseline': None, 'files': {}, 'blobs': {}}
+        if state.get('task_type') != self.task_type:
+            return {'baseline': None, 'files': {}, 'blobs': {}}
+        return state
+
+    def _save_state(self, state: Dict[str, Any]):
+        state['task_type'] = self.task_type
+        tmp = self.state_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self.state_path)
+
+    def reset(self):
+        """Forget the baseline; the next run analyzes every file."""
+        try:
+            self.state_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _tree(self, ref: str, paths: Optional[List[str]]) -> Dict[str, str]:
+        """path -> blob hash of every analyzable file at ref."""
+        blobs = {}
+        output = self._git('ls-tree', '-r', '-z', ref, '--', *(paths or []))
+        for entry in output.split('\0'):
+            if not entry:
+                continue
+            meta, path = entry.split('\t', 1)
+            _, kind, blob = meta.split()
+            if kind == 'blob' and Path(path).suffix.lower() in ANALYZED_EXTENSIONS:
+                blobs[path] = blob
+        return blobs
+
+    def analyze(self,
+                ref: str = 'HEAD',
+                paths: Optional[List[str]] = None,
+                full: bool = False,
+                timeout: int = 3600) -> Dict[str, Any]:
+        """
+        Analyze the repository at ref against the stored baseline.
+
+        Args:
+            ref: Commit to analyze
+            paths: Limit to these pathspecs
+            full: Ignore the baseline and analyze every file
+            timeout: Seconds to wait for the submitted jobs
+
+        Returns:
+            {'baseline', 'head', 'files': [{'file', 'blob', 'source', 'result'|'error'}],
+             'stats': {...}}; source is 'reused', 'hunks' or 'full'. The new
+            baseline is stored once every file has a report.
+        """
+        started = time.monotonic()
+        head = self._git('rev-parse', f'{ref}^{{commit}}').strip()
+        state = {'baseline': None, 'files': {}, 'blobs': {}} if full else self.load_state()
+        baseline = state['baseline']
+        baseline_exists = bool(baseline) and self._has_commit(baseline)
+        if baseline and not baseline_exists:
+            # History was rewritten; unchanged blobs are still reused
+            print(f"⚠️  Baseline {baseline[:10]} no longer exists; changed files are analyzed in full")
+        tree = self._tree(head, paths)
+        # Paths the pathspec covers, before and now; other files keep their reports
+        in_scope = set(tree) if paths else set(tree) | set(state['files'])
+        if paths and baseline_exists:
+            in_scope |= set(self._tree(baseline, paths))
+
+        reports: Dict[str, Dict[str, Any]] = {}
+        tasks: List[Dict[str, Any]] = []
+        pending: List[Dict[str, Any]] = []
+
+        for path, blob in sorted(tree.items()):
+            known = state['files'].get(path)
+            if known and known['blob'] == blob:
+                reports[path] = {'commit': baseline, **known, 'source': 'reused'}
+                continue
+            if blob in state['blobs']:
+                # Renamed or copied without changes
+                reports[path] = {'blob': blob, 'result': state['blobs'][blob],
+                                 'updates': 0, 'commit': head, 'source': 'reused'}
+                continue
+
+            content = self._git('cat-file', 'blob', blob)
+            since = known.get('commit', baseline) if known else None
+            diff = ''
+            if since and known.get('updates', 0) < MAX_INCREMENTAL_UPDATES and self._has_commit(since):
+                diff = self._git('diff', f'-U{self.context_lines}', '--no-color',
+                                 since, head, '--', path)
+                if not diff or len(diff) > FULL_REANALYSIS_RATIO * max(len(content), 1):
+                    diff = ''
+
+            if diff:
+                tasks.append({
+                    'task_type': self.task_type,
+                    'content': diff,
+                    'custom_prompt': HUNK_PROMPT.format(
+                        task_type=self.task_type, filename=path, previous=known['result'],
+                        baseline=since[:10], head=head[:10], diff=diff),
+                    'lane': 'batch'
+                })
+                pending.append({'file': path, 'blob': blob, 'source': 'hunks',
+                                'previous': known, 'since': since})
+            else:
+                tasks.append({'task_type': self.task_type,
+                              'content': f"# File: {path}\n{content}", 'lane': 'batch'})
+                pending.append({'file': path, 'blob': blob, 'source': 'full'})
+
+        submitted_chars = sum(len(task['content']) for task in tasks)
+        failures = self._collect(tasks, pending, reports, head, timeout)
+
+        new_state = {
+            'baseline': head if not failures else baseline,
+            'files': {path: {'blob': r['blob'], 'result': r['result'], 'updates': r['updates'],
+                             'commit': r['commit']}
+                      for path, r in reports.items() if 'result' in r},
+            'blobs': {r['blob']: r['result'] for r in reports.values()
+                      if 'result' in r and r['updates'] == 0}
+        }
+        for path, known in state['files'].items():
+            # Outside the pathspec: untouched by this run. After a failure, keep
+            # reports of files we couldn't re-analyze so the next run can retry them
+            if path not in in_scope or (failures and baseline):
+                new_state['files'].setdefault(path, {'commit': baseline, **known})
+        for known in new_state['files'].values():
+            if known['updates'] == 0:
+                new_state['blobs'].setdefault(known['blob'], known['result'])
+        self._save_state(new_state)
+
+        counts = {'reused': 0, 'hunks': 0, 'full': 0}
+        for report in reports.values():
+            counts[report['source']] += 1
+        return {
+            'baseline': baseline,
+            'head': head,
+            'files': [{'file': path, **{k: v for k, v in report.items() if k != 'updates'}}
+                      for path, report in sorted(reports.items())],
+            'stats': {
+                **counts,
+                'files': len(reports),
+                'removed': len((set(state['files']) & in_scope) - set(tree)),
+                'failed': failures,
+                'submitted_chars': submitted_chars,
+                'elapsed': round(time.monotonic() - started, 2)
+            }
+        }
+
+    def _collect(self, tasks: List[Dict[str, Any]], pending: List[Dict[str, Any]],
+                 reports: Dict[str, Dict[str, Any]], head: str, timeout: int) -> int:
+        """Submit tasks, wait for them and fill in reports; returns the number that failed."""
+        if not tasks:
+            return 0
+        job_ids = self.client.submit_batch(tasks)
+        by_job = dict(zip(job_ids, pending))
+        failures = 0
+        try:
+            for status in self.client.iter_completed(job_ids, timeout):
+                item = by_job.pop(str(status['id']))
+                if status['state'] != 'completed':
+                    failures += 1
+                    reports[item['file']] = {'blob': item['blob'], 'source': item['source'],
+                                             'error': f"Job failed: {status.get('failedReason')}"}
+                    continue
+                output = status['result']['result']
+                if item['source'] == 'hunks':
+                    previous = item['previous']
+                    result = (f"{previous['result']}\n\n"
+                              f"## Changes {item['since'][:10]}..{head[:10]}\n{output}")
+                    updates = previous.get('updates', 0) + 1
+                else:
+                    result, updates = output, 0
+                reports[item['file']] = {'blob': item['blob'], 'result': result, 'updates': updates,
+                                         'commit': head, 'source': item['source']}
+        except TimeoutError as e:
+            for item in by_job.values():
+                failures += 1
+                reports[item['file']] = {'blob': item['blob'], 'source': item['source'],
+                                         'error': str(e)}
+        return failures
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render an analyze() result as one text report."""
+    stats = report['stats']
+    lines = [f"# Analysis of {report['head'][:10]}",
+             f"{stats['files']} files: {stats['full']} analyzed, {stats['hunks']} updated from diffs, "
+             f"{stats['reused']} unchanged, {stats['failed']} failed", ""]
+    for item in report['files']:
+        lines.append(f"## {item['file']} ({item['source']})")
+        lines.append(item.get('result') or item.get('error', ''))
+        lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Mini Index - Local embedding index of a codebase for retrieval.
+
+Instead of pasting whole files into a task's context, index the repository
+once and attach only the chunks most relevant to the task:
+  - files are split with mini_chunking (ast-aware for Python)
+  - chunks are embedded with an Ollama embedding model on the Mini
+  - vectors live in a memory-mapped float32 file next to a JSON manifest,
+    so opening a large index costs almost nothing
+  - update() re-embeds only files whose size, mtime and hash changed
+
+Requires NumPy (pip3 install --user numpy).
+
+Example:
+    index = CodeIndex('~/src/myproject')
+    index.update()
+    mini_client.generate_code("Add retry to the upload client", index=index)
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from mini_chunking import chunk_source, estimate_tokens
+from mini_transport import MiniTransport, shared_transport
+
+DEFAULT_EMBED_MODEL = 'nomic-embed-text'
+
+INDEXED_EXTENSIONS = {
+    '.py', '.js', '.ts', '.tsx', '.jsx', '.go', '.rs', '.java', '.kt', '.c', '.h',
+    '.cpp', '.hpp', '.cs', '.rb', '.php', '.swift', '.scala', '.sh', '.sql',
+    '.md', '.yaml', '.yml', '.toml', '.json', '.html', '.css',
+}
+SKIPPED_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', 'dist', 'build',
+                '.mypy_cache', '.pytest_cache', '.tox', '.cmini-index'}
+MAX_FILE_BYTES = 1024 * 1024
+
+# Chunks per /api/embed request
+EMBED_BATCH = 32
+
+# Rewrite the vector file once this share of its rows belongs to deleted chunks
+COMPACT_RATIO = 0.3
+
+
+class CodeIndex:
+    """Embedding index of one directory tree, persisted under index_dir."""
+
+    def __init__(self,
+                 root: str,
+                 index_dir: Optional[str] = None,
+                 model: str = DEFAULT_EMBED_MODEL,
+                 chunk_tokens: int = 400,
+                 ollama: Optional[MiniTransport] = None):
+        """
+        Args:
+            root: Directory to index
+            index_dir: Where vectors and manifest are stored (default <root>/.cmini-index)
+            model: Ollama embedding model (ollama pull nomic-embed-text)
+            chunk_tokens: Approximate size of each indexed chunk
+            ollama: Transport for Ollama (defaults to the shared one)
+        """
+        if np is None:
+            raise ImportError("CodeIndex requires numpy: pip3 install --user numpy")
+
+        self.root = Path(root).expanduser().resolve()
+        self.index_dir = Path(index_dir).expanduser() if index_dir else self.root / '.cmini-index'
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.ollama = ollama or shared_transport('ollama')
+
+        self._vectors_path = self.index_dir / 'vectors.f32'
+        self._manifest_path = self.index_dir / 'manifest.json'
+        self.dim = 0
+        self.files: Dict[str, Dict[str, Any]] = {}   # path -> {size, mtime, sha256, rows}
+        self.chunks: List[Optional[Dict[str, Any]]] = []  # row -> chunk info, None when deleted
+        self._vectors: Optional['np.memmap'] = None
+        self._load()
+
+    # Persistence
+
+    def _load(self):
+        if not self._manifest_path.exists():
+            return
+        manifest = json.loads(self._manifest_path.read_text())
+        if manifest.get('model') != self.model or manifest.get('chunk_tokens') != self.chunk_tokens:
+            # Vectors from another model/chunking aren't comparable; start over
+            return
+        self.dim = manifest['dim']
+        self.files = manifest['files']
+        self.chunks = manifest['chunks']
+        if self.chunks:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                      shape=(len(self.chunks), self.dim))
+
+    def _save(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if self._vectors is not None:
+            self._vectors.flush()
+        tmp = self._manifest_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'model': self.model,
+            'chunk_tokens': self.chunk_tokens,
+            'dim': self.dim,
+            'files': self.files,
+            'chunks': self.chunks
+        }))
+        os.replace(tmp, self._manifest_path)
+
+    def _append_vectors(self, vectors: 'np.ndarray') -> List[int]:
+        """Grow the memory-mapped file by len(vectors) rows; returns the new row numbers."""
+        start = len(self.chunks)
+        rows = start + len(vectors)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(rows * self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                  shape=(rows, self.dim))
+        self._vectors[start:rows] = vectors
+        return list(range(start, rows))
+
+    def _compact(self):
+        """Drop rows of deleted chunks by rewriting the vector file."""
+        live = [row for row, chunk in enumerate(self.chunks) if chunk is not None]
+        vectors = np.array(self._vectors[live]) if live else np.zeros((0, self.dim), np.float32)
+        remap = {old: new for new, old in enumerate(live)}
+
+        del self._vectors
+        self._vectors = None
+        tmp = self._vectors_path.with_suffix('.tmp')
+        vectors.tofile(tmp)
+        os.replace(tmp, self._vectors_path)
+
+        self.chunks = [self.chunks[row] for row in live]
+        for info in self.files.values():
+            info['rows'] = [remap[row] for row in info['rows']]
+        if live:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+',
+                                      shape=(len(live), self.dim))
+
+    # Indexing
+
+    def _iter_files(self) -> Iterator[Path]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRS and not d.startswith('.')]
+            for name in filenames:
+                path = Path(dirpath) / name
+                if path.suffix.lower() in INDEXED_EXTENSIONS:
+                    yield path
+
+    def _embed(self, texts: List[str]) -> 'np.ndarray':
+        """Unit-length embeddings for texts, batched through Ollama."""
+        vectors = []
+        for start in range(0, len(texts), EMBED_BATCH):
+            batch = texts[start:start + EMBED_BATCH]
+            response = self.ollama.post('/api/embed', json={'model': self.model, 'input': batch})
+            if response.status_code == 404:
+                # Ollama before /api/embed: one text per request
+                embeddings = []
+                for text in batch:
+                    single = self.ollama.post('/api/embeddings',
+                                              json={'model': self.model, 'prompt': text})
+                    single.raise_for_status()
+                    embeddings.append(single.json()['embedding'])
+            else:
+                response.raise_for_status()
+                embeddings = response.json()['embeddings']
+            vectors.extend(embeddings)
+        array = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(array, axis=1, keepdims=True)
+        return array / np.maximum(norms, 1e-12)
+
+    def update(self, verbose: bool = False) -> Dict[str, int]:
+        """
+        Bring the index in line with the files on disk.
+
+        Only new and changed files are chunked and embedded; chunks of
+        changed or deleted files are dropped.
+
+        Returns:
+            Counts of added, changed, removed and unchanged files, and chunks embedded
+        """
+        counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0, 'chunks_embedded': 0}
+        seen = set()
+        pending: List[Dict[str, Any]] = []
+        pending_text: List[str] = []
+
+        for path in self._iter_files():
+            rel = str(path.relative_to(self.root))
+            seen.add(rel)
+            stat = path.stat()
+            if stat.st_size > MAX_FILE_BYTES:
+                continue
+            known = self.files.get(rel)
+            if known and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime:
+                counts['unchanged'] += 1
+                continue
+
+            try:
+                source = path.read_text(encoding='utf-8')
+            except (UnicodeDecodeError, OSError):
+                continue
+            digest = hashlib.sha256(source.encode('utf-8')).hexdigest()
+            if known and known['sha256'] == digest:
+                known['mtime'] = stat.st_mtime
+                counts['unchanged'] += 1
+                continue
+
+            if known:
+                self._drop_file(rel)
+                counts['changed'] += 1
+            else:
+                counts['added'] += 1
+            self.files[rel] = {'size': stat.st_size, 'mtime': stat.st_mtime,
+                               'sha256': digest, 'rows': []}
+            for chunk in chunk_source(source, self.chunk_tokens, rel):
+                if not chunk.content.strip():
+                    continue
+                pending.append({'path': rel, 'start_line': chunk.start_line,
+                                'end_line': chunk.end_line, 'names': chunk.names})
+                pending_text.append(f"{chunk.header(rel)}\n{chunk.content}")
+
+        for rel in list(self.files):
+            if rel not in seen:
+                self._drop_file(rel)
+                del self.files[rel]
+                counts['removed'] += 1
+
+        if pending:
+            if verbose:
+                print(f"🧮 Embedding {len(pending)} chunks from "
+                      f"{counts['added'] + counts['changed']} files...")
+            vectors = self._embed(pending_text)
+            self.dim = vectors.shape[1]
+            rows = self._append_vectors(vectors)
+            for row, chunk in zip(rows, pending):
+                self.chunks.append(chunk)
+                self.files[chunk['path']]['rows'].append(row)
+            counts['chunks_embedded'] = len(pending)
+
+        dead = sum(1 for chunk in self.chunks if chunk is None)
+        if self.chunks and dead / len(self.chunks) > COMPACT_RATIO:
+            self._compact()
+
+        self._save()
+        return counts
+
+    def _drop_file(self, rel: str):
+        for row in self.files.get(rel, {}).get('rows', []):
+            self.chunks[row] = None
+
+    # Retrieval
+
+    def search(self, query: str, k: int = 8) -> List[Dict[str, Any]]:
+        """
+        Return the k chunks most similar to query, best first.
+
+        Each hit has path, start_line, end_line, names, score and content
+        (read from the file as it is now).
+        """
+        if self._vectors is None or not self.chunks:
+            return []
+        live = np.fromiter((chunk is not None for chunk in self.chunks), dtype=bool,
+                           count=len(self.chunks))
+        scores = np.asarray(self._vectors @ self._embed([query])[0])
+        scores[~live] = -np.inf
+
+        k = min(k, int(live.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        hits = []
+        for row in top:
+            chunk = self.chunks[row]
+            hits.append({**chunk, 'score': float(scores[row]),
+                         'content': self._read_lines(chunk['path'], chunk['start_line'],
+                                                     chunk['end_line'])})
+        return hits
+
+    def context_for(self, query: str, token_budget: int = 2000, k: int = 8) -> str:
+        """
+        Relevant chunks for query, formatted as task context and kept within
+        token_budget (estimated). Chunks that don't fit are skipped.
+        """
+        parts = []
+        used = 0
+        for hit in self.search(query, k):
+            names = f" ({', '.join(hit['names'])})" if hit['names'] else ""
+            block = (f"# {hit['path']} lines {hit['start_line']}-{hit['end_line']}{names}\n"
+                     f"{hit['content']}")
+            cost = estimate_tokens(block)
+            if used + cost > token_budget:
+                continue
+            parts.append(block)
+            used += cost
+        return "\n\n".join(parts)
+
+    def _read_lines(self, rel: str, start: int, end: int) -> str:
+        try:
+            with open(self.root / rel, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return ""
+        return ''.join(lines[start - 1:end])
+
+    def stats(self) -> Dict[str, Any]:
+        live = sum(1 for chunk in self.chunks if chunk is not None)
+        return {
+            'root': str(self.root),
+            'model': self.model,
+            'files': len(self.files),
+            'chunks': live,
+            'deleted_rows': len(self.chunks) - live,
+            'dim': self.dim,
+            'bytes': self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Thin client for the local Mini daemon (mini_daemon.py).
+
+Imports nothing beyond socket and json, so with `python3 -S` it starts in
+a few milliseconds; the work happens in the daemon's warm client.
+
+Command line (prints the result as JSON, or as-is for text):
+    python3 -S mini_stub.py check_job 42
+    python3 -S mini_stub.py submit_task code-analysis - < file.py   # "-" reads stdin
+    python3 -S mini_stub.py wait_for_job 42 --json '{"timeout": 600}'
+
+Exit status: 0 on success, 1 if the call failed, 2 if no daemon is running.
+
+From Python:
+    from mini_stub import call
+    status = call('check_job', '42')
+"""
+
+import json
+import os
+import socket
+import sys
+
+SOCKET_PATH = os.path.expanduser(os.getenv('CLAUDE_MINI_SOCKET', '~/.cache/cmini/daemon.sock'))
+
+
+class DaemonError(Exception):
+    """A call the daemon ran failed; type is the remote exception's class name."""
+
+    def __init__(self, message, error_type=None):
+        super().__init__(message)
+        self.type = error_type
+
+
+class DaemonUnavailable(DaemonError):
+    """No daemon is listening on the socket."""
+
+
+class DaemonClient:
+    """One connection to the daemon, reused for every call."""
+
+    def __init__(self, path=SOCKET_PATH):
+        self.path = path
+        self._sock = None
+        self._file = None
+
+    def call(self, method, *args, **kwargs):
+        if self._sock is None:
+            try:
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.connect(self.path)
+            except OSError as e:
+                self.close()
+                raise DaemonUnavailable(f"Mini daemon not reachable at {self.path}: {e}")
+            self._file = self._sock.makefile('rb')
+
+        request = {'method': method, 'args': list(args), 'kwargs': kwargs}
+        try:
+            self._sock.sendall(json.dumps(request).encode() + b'\n')
+            line = self._file.readline()
+        except OSError as e:
+            self.close()
+            raise DaemonUnavailable(f"Mini daemon connection lost: {e}")
+        if not line:
+            self.close()
+            raise DaemonUnavailable("Mini daemon closed the connection")
+
+        response = json.loads(line)
+        if not response['ok']:
+            raise DaemonError(response['error'], response.get('type'))
+        return response['result']
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+
+_default = None
+
+
+def call(method, *args, **kwargs):
+    """Call a ClaudeMiniClient method in the daemon over a shared connection."""
+    global _default
+    if _default is None:
+        _default = DaemonClient()
+    return _default.call(method, *args, **kwargs)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__.strip())
+        return 0
+
+    args, kwargs = [], {}
+    rest = iter(argv[1:])
+    for arg in rest:
+        if arg == '--json':
+            kwargs.update(json.loads(next(rest)))
+        elif arg == '-':
+            args.append(sys.stdin.read())
+        else:
+            args.append(arg)
+
+    try:
+        result = call(argv[0], *args, **kwargs)
+    except DaemonUnavailable as e:
+        print(f"⚠️ {e}", file=sys.stderr)
+        return 2
+    except DaemonError as e:
+        print(f"❌ {e.type}: {e}", file=sys.stderr)
+        return 1
+
+    print(result if isinstance(result, str) else json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
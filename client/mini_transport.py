@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+Mini Transport - Shared HTTP layer for the CMini Python clients.
+
+Both ClaudeMiniClient and CrewAIExpertClient route their calls through a
+MiniTransport instead of module-level requests.get/post, so that:
+  - connections are pooled and kept alive per host
+  - every endpoint gets a sensible (connect, read) timeout
+  - transient failures are retried with bounded, jittered backoff
+  - calls fail over between the Tailscale and LAN addresses of the Mini,
+    preferring whichever currently has the lower measured round-trip time
+
+Direct Ollama calls can also be spread over several machines with an
+OllamaPool (set CLAUDE_OLLAMA_POOL), which routes each request by model
+availability and outstanding requests, as the server does.
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# (connect, read) timeouts in seconds, matched by longest path prefix
+DEFAULT_TIMEOUTS = {
+    '/health': (3.05, 5),
+    '/api/job/': (3.05, 15),
+    '/api/blobs/': (3.05, 60),
+    '/api/jobs': (3.05, 30),
+    # Server sends a heartbeat every 15s, so a silent minute means a dead stream
+    '/api/jobs/events': (3.05, 60),
+    '/api/stats': (3.05, 15),
+    '/api/metrics': (3.05, 15),
+    '/api/models': (3.05, 15),
+    '/api/dev-task': (3.05, 30),
+    '/api/process-file': (3.05, 120),
+    '/api/execute-crew': (3.05, 30),
+    '/api/execute-autogen': (3.05, 30),
+    '/api/crew/': (3.05, 30),
+    '/api/sessions': (3.05, 30),
+    '/api/tags': (3.05, 15),
+    '/api/version': (3.05, 5),
+    '/api/generate': (3.05, 600),
+    '/api/embed': (3.05, 120),
+}
+FALLBACK_TIMEOUT = (3.05, 60)
+
+# Cheap endpoints used to measure round-trip time
+PROBE_PATHS = {
+    'server': '/health',
+    'ollama': '/api/version',
+}
+
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# How long a rate-limited (429) request is resent for before the 429 is returned
+RATE_LIMIT_WAIT = 300.0
+
+
+class TransportError(requests.ConnectionError):
+    """Raised when no endpoint could be reached after all retries."""
+
+
+class EventStreamUnavailable(Exception):
+    """Raised when the server cannot provide a job event stream."""
+
+
+def retry_after(headers: Mapping[str, str], default: float = 1.0) -> float:
+    """Seconds a 429 response asks the caller to wait (Retry-After in seconds)."""
+    try:
+        return max(0.0, float(headers.get('Retry-After', default)))
+    except ValueError:
+        # An HTTP date; the server only sends seconds, so don't bother parsing it
+        return default
+
+
+def _never_connected(error: requests.ConnectionError) -> bool:
+    """True if the request cannot have reached the server (no connection was made)."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    # requests wraps urllib3's MaxRetryError, whose .reason is the real failure
+    return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+
+
+class MiniTransport:
+    """Pooled, retrying HTTP transport with RTT-based endpoint failover."""
+
+    def __init__(self,
+                 endpoints: List[str],
+                 kind: str = 'server',
+                 retries: int = 2,
+                 backoff: float = 0.5,
+                 max_backoff: float = 8.0,
+                 pool_size: int = 16,
+                 probe_interval: float = 60.0,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 headers: Optional[Dict[str, str]] = None,
+                 rate_limit_wait: float = RATE_LIMIT_WAIT):
+        """
+        Args:
+            endpoints: Base URLs for the same service, e.g. Tailscale and LAN
+            kind: "server" or "ollama", selects the RTT probe path
+            retries: Extra attempts after the first one fails
+            backoff: Base delay for exponential backoff between attempts
+            max_backoff: Upper bound for a single backoff delay
+            pool_size: Max pooled connections kept per host
+            probe_interval: Seconds before endpoint RTTs are re-measured
+            timeouts: Overrides for DEFAULT_TIMEOUTS
+            headers: Sent with every request (e.g. X-API-Key)
+            rate_limit_wait: Seconds a 429 request is resent for, after each Retry-After
+        """
+        # Keep order, drop duplicates and blanks
+        self.endpoints = [e.rstrip('/') for e in dict.fromkeys(endpoints) if e]
+        if not self.endpoints:
+            raise ValueError("MiniTransport needs at least one endpoint")
+
+        self.kind = kind
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.probe_interval = probe_interval
+        self.rate_limit_wait = rate_limit_wait
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints),
+                              pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._rtt: Dict[str, float] = {}
+        self._down_until: Dict[str, float] = {}
+        self._last_probe = 0.0
+
+    @property
+    def base_url(self) -> str:
+        """The endpoint currently preferred for new requests."""
+        return self._ranked_endpoints()[0]
+
+    def timeout_for(self, path: str) -> Tuple[float, float]:
+        """Return the (connect, read) timeout configured for a path."""
+        best = None
+        for prefix in self.timeouts:
+            if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.timeouts[best] if best else FALLBACK_TIMEOUT
+
+    def probe(self) -> Dict[str, Optional[float]]:
+        """Measure RTT to every endpoint and return {endpoint: seconds or None}."""
+        path = PROBE_PATHS.get(self.kind, '/')
+        results = {}
+        for endpoint in self.endpoints:
+            start = time.monotonic()
+            try:
+                self.session.get(f"{endpoint}{path}", timeout=(1.5, 3)).close()
+                rtt = time.monotonic() - start
+                self._record_success(endpoint, rtt)
+                results[endpoint] = rtt
+            except requests.RequestException:
+                self._record_failure(endpoint)
+                results[endpoint] = None
+        self._last_probe = time.monotonic()
+        return results
+
+    def request(self, method: str, path: str, retry: bool = True,
+                **kwargs) -> requests.Response:
+        """
+        Send a request to the best endpoint, failing over and retrying as needed.
+
+        Non-idempotent requests (POST) are only retried when the connection
+        could not be established, so a job is never submitted twice. A 429
+        (rate limited, so not processed) is resent after its Retry-After for
+        up to rate_limit_wait seconds, then returned.
+        Extra keyword arguments are passed to requests.Session.request.
+        """
+        deadline = time.monotonic() + self.rate_limit_wait
+        while True:
+            response = self._send(method, path, retry, kwargs)
+            if response.status_code != 429 or not retry:
+                return response
+            delay = retry_after(response.headers)
+            if time.monotonic() + delay > deadline:
+                return response
+            response.close()
+            time.sleep(delay)
+            self._rewind_files(kwargs)
+
+    def _send(self, method: str, path: str, retry: bool, kwargs: Dict) -> requests.Response:
+        method = method.upper()
+        kwargs.setdefault('timeout', self.timeout_for(path))
+        idempotent = method in IDEMPOTENT_METHODS
+        attempts = self.retries + 1 if retry else 1
+        last_error: Optional[Exception] = None
+
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self._backoff_delay(attempt))
+                self._rewind_files(kwargs)
+
+            for endpoint in self._ranked_endpoints():
+                start = time.monotonic()
+                try:
+                    response = self.session.request(method, f"{endpoint}{path}", **kwargs)
+                except requests.ConnectionError as e:
+                    self._record_failure(endpoint)
+                    last_error = e
+                    # A connection dropped mid-request ("Connection aborted")
+                    # may come after the server has read the body
+                    if not idempotent and not _never_connected(e):
+                        raise
+                    continue
+                except requests.Timeout as e:
+                    # Read timeout: the server may already be working on it
+                    last_error = e
+                    if not idempotent:
+                        raise
+                    self._record_failure(endpoint)
+                    continue
+
+                self._record_success(endpoint, time.monotonic() - start)
+                if response.status_code in RETRY_STATUSES and idempotent and attempt < attempts - 1:
+                    last_error = requests.HTTPError(
+                        f"{response.status_code} from {endpoint}{path}", response=response)
+                    response.close()
+                    break
+                return response
+
+        raise TransportError(
+            f"{method} {path} failed on {', '.join(self.endpoints)}: {last_error}")
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def _ranked_endpoints(self) -> List[str]:
+        if len(self.endpoints) > 1 and time.monotonic() - self._last_probe > self.probe_interval:
+            self._last_probe = time.monotonic()
+            threading.Thread(target=self.probe, daemon=True).start()
+
+        now = time.monotonic()
+        with self._lock:
+            # Healthy endpoints first, fastest first; unmeasured keep config order
+            return sorted(
+                self.endpoints,
+                key=lambda e: (self._down_until.get(e, 0) > now,
+                               self._rtt.get(e, float('inf')),
+                               self.endpoints.index(e)))
+
+    def _record_success(self, endpoint: str, elapsed: float):
+        with self._lock:
+            previous = self._rtt.get(endpoint)
+            # Exponentially weighted so one slow generation doesn't flip routing
+            self._rtt[endpoint] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            self._down_until.pop(endpoint, None)
+
+    def _record_failure(self, endpoint: str):
+        with self._lock:
+            self._down_until[endpoint] = time.monotonic() + self.probe_interval
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    @staticmethod
+    def _rewind_files(kwargs: Dict):
+        for f in (kwargs.get('files') or {}).values():
+            handle = f[1] if isinstance(f, tuple) else f
+            if hasattr(handle, 'seek'):
+                handle.seek(0)
+
+
+def normalize_model(name: str) -> str:
+    """Ollama treats "name" and "name:latest" as the same model."""
+    return name if ':' in name else f"{name}:latest"
+
+
+class OllamaPool:
+    """
+    Several Ollama hosts behind the MiniTransport interface.
+
+    Each request goes to a healthy backend that has the requested model
+    (from its /api/tags), preferring the one with the fewest requests in
+    flight from this process. Backends that refuse connections are marked
+    unhealthy until the next refresh, and the request moves on to the next
+    candidate. Read timeouts, and POSTs whose connection dropped after it
+    was made, are not retried elsewhere: the generation may already be
+    running.
+    """
+
+    def __init__(self, backends: List[Union[MiniTransport, str, List[str]]],
+                 refresh_interval: float = 30.0):
+        """
+        Args:
+            backends: MiniTransports, base URLs, or lists of URLs for one
+                host (e.g. its Tailscale and LAN addresses); first is primary
+            refresh_interval: Seconds between /api/tags checks of every backend
+        """
+        self.backends: List[MiniTransport] = []
+        for backend in backends:
+            if not isinstance(backend, MiniTransport):
+                urls = [backend] if isinstance(backend, str) else list(backend)
+                backend = MiniTransport(urls, kind='ollama', retries=0)
+            self.backends.append(backend)
+        if not self.backends:
+            raise ValueError("OllamaPool needs at least one backend")
+
+        self.kind = 'ollama'
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._models: List[Optional[Set[str]]] = [None] * len(self.backends)
+        self._healthy = [True] * len(self.backends)
+        self._outstanding = [0] * len(self.backends)
+        self._requests = [0] * len(self.backends)
+        self._last_refresh = 0.0
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the backend a model-less request would use now."""
+        return self.backends[self._candidates(None)[0]].base_url
+
+    def timeout_for(self, path: str) -> Tuple[float, float]:
+        return self.backends[0].timeout_for(path)
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Re-read every backend's model list; unreachable ones are marked unhealthy."""
+        self._last_refresh = time.monotonic()
+        for i, backend in enumerate(self.backends):
+            try:
+                response = backend.get('/api/tags', retry=False, timeout=(1.5, 5))
+                response.raise_for_status()
+                models = {normalize_model(m['name']) for m in response.json().get('models', [])}
+                with self._lock:
+                    self._models[i] = models
+                    self._healthy[i] = True
+            except (requests.RequestException, ValueError):
+                with self._lock:
+                    self._healthy[i] = False
+        return self.stats()
+
+    def _candidates(self, model: Optional[str], exclude: Set[int] = frozenset()) -> List[int]:
+        if time.monotonic() - self._last_refresh > self.refresh_interval:
+            self.refresh()
+        wanted = normalize_model(model) if model else None
+        with self._lock:
+            def rank(i):
+                models = self._models[i]
+                # Unknown model lists (never refreshed) may still have it
+                has_model = wanted is None or models is None or wanted in models
+                return (not self._healthy[i], not has_model, self._outstanding[i], i)
+            return sorted((i for i in range(len(self.backends)) if i not in exclude), key=rank)
+
+    def pick(self, model: Optional[str] = None) -> MiniTransport:
+        """The backend a request for model would be sent to now."""
+        return self.backends[self._candidates(model)[0]]
+
+    def request(self, method: str, path: str, retry: bool = True,
+                **kwargs) -> requests.Response:
+        """Send to the best backend for the body's model, moving on if it can't be reached."""
+        model = (kwargs.get('json') or {}).get('model')
+        tried: Set[int] = set()
+        last_error: Optional[Exception] = None
+        while len(tried) < len(self.backends):
+            i = self._candidates(model, tried)[0]
+            tried.add(i)
+            with self._lock:
+                self._outstanding[i] += 1
+                self._requests[i] += 1
+            streaming = False
+            try:
+                # Each backend already tries all of its own addresses once, and
+                # only raises TransportError when a POST never reached any of them
+                response = self.backends[i].request(method, path, retry=False, **kwargs)
+                if kwargs.get('stream'):
+                    streaming = True
+                    self._release_on_close(response, i)
+                return response
+            except TransportError as e:
+                last_error = e
+                with self._lock:
+                    self._healthy[i] = False
+                if not retry:
+                    break
+            finally:
+                if not streaming:
+                    self._release(i)
+        raise TransportError(f"{method} {path} failed on every Ollama backend: {last_error}")
+
+    def _release(self, i: int):
+        with self._lock:
+            self._outstanding[i] -= 1
+
+    def _release_on_close(self, response: requests.Response, i: int):
+        """Keep a streamed response outstanding until it is closed or read to the end."""
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._release(i)
+
+        close, iter_content = response.close, response.iter_content
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+
+        def iter_content_and_release(*args, **kwargs):
+            try:
+                yield from iter_content(*args, **kwargs)
+            finally:
+                release()
+
+        response.close = close_and_release
+        response.iter_content = iter_content_and_release
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def probe(self) -> Dict[str, Optional[float]]:
+        self.refresh()
+        return {b.base_url: (0.0 if ok else None) for b, ok in zip(self.backends, self._healthy)}
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-backend health, models and load."""
+        with self._lock:
+            return [{
+                'endpoints': backend.endpoints,
+                'healthy': self._healthy[i],
+                'models': sorted(self._models[i]) if self._models[i] is not None else None,
+                'outstanding': self._outstanding[i],
+                'requests': self._requests[i]
+            } for i, backend in enumerate(self.backends)]
+
+
+def iter_sse(response: requests.Response) -> Iterator[Tuple[str, Dict]]:
+    """
+    Parse a text/event-stream response into (event, data) pairs.
+
+    Heartbeat comments are yielded as ("heartbeat", {}) so callers get a
+    chance to check their own deadlines while the stream is idle.
+    """
+    event, data = 'message', []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data:
+                yield event, json.loads('\n'.join(data))
+            event, data = 'message', []
+        elif line.startswith(':'):
+            yield 'heartbeat', {}
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].strip())
+
+
+def watch_jobs(transport: MiniTransport, job_ids: List[str],
+               deadline: float, include_result: bool = False) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (event, data) lifecycle events for jobs from /api/jobs/events.
+
+    Events are "state" (snapshot on connect), "progress", "completed",
+    "failed" and "missing". With include_result, "completed" events carry
+    the job's return value under "result". Iteration stops when the server
+    ends the stream or time.monotonic() passes deadline.
+
+    Raises:
+        EventStreamUnavailable: if the stream cannot be opened
+    """
+    params = {'ids': ','.join(str(i) for i in job_ids)}
+    if include_result:
+        params['include'] = 'result'
+    try:
+        response = transport.get('/api/jobs/events',
+                                 params=params,
+                                 headers={'Accept': 'text/event-stream'},
+                                 stream=True, retry=False)
+    except requests.RequestException as e:
+        raise EventStreamUnavailable(str(e))
+
+    if response.status_code != 200 or \
+            not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+        response.close()
+        raise EventStreamUnavailable(f"HTTP {response.status_code} from event stream")
+
+    try:
+        for event, data in iter_sse(response):
+            if event == 'end':
+                return
+            if event != 'heartbeat':
+                yield event, data
+            if time.monotonic() >= deadline:
+                return
+    except requests.RequestException:
+        # Stream dropped mid-way; callers fall back to polling
+        return
+    finally:
+        response.close()
+
+
+def watch_job_groups(transport: MiniTransport, groups: List[List[str]],
+                     deadline: float, include_result: bool = False) -> Iterator[Tuple[str, Dict]]:
+    """
+    watch_jobs over several groups of job ids at once, one stream per group,
+    yielding events from all of them as they arrive.
+
+    A group's stream ends when its jobs have finished, so a slow job holds
+    back only its own stream. Groups whose stream cannot be opened, or
+    drops, simply end; callers poll for whatever is still pending.
+    """
+    events: 'queue.Queue[Optional[Tuple[str, Dict]]]' = queue.Queue()
+    stop = threading.Event()
+
+    def watch(group: List[str]):
+        try:
+            for item in watch_jobs(transport, group, deadline, include_result):
+                if stop.is_set():
+                    return
+                events.put(item)
+        except EventStreamUnavailable:
+            pass
+        finally:
+            events.put(None)
+
+    for group in groups:
+        threading.Thread(target=watch, args=(group,), daemon=True).start()
+    open_streams = len(groups)
+    try:
+        while open_streams:
+            item = events.get()
+            if item is None:
+                open_streams -= 1
+            else:
+                yield item
+    finally:
+        # A caller that stops early leaves the streams to close on their next event
+        stop.set()
+
+
+def backoff_intervals(start: float = 0.5, factor: float = 1.5,
+                      maximum: float = 10.0) -> Iterator[float]:
+    """Poll intervals that start short and grow towards maximum."""
+    interval = start
+    while True:
+        yield interval
+        interval = min(maximum, interval * factor)
+
+
+_shared: Dict[Tuple[str, Tuple[str, ...]], Union[MiniTransport, OllamaPool]] = {}
+_shared_lock = threading.Lock()
+
+
+def server_endpoints() -> List[str]:
+    """Task queue server URLs from the environment (see client/claude_config)."""
+    return [os.getenv('CLAUDE_DEV_SERVER', 'http://100.114.129.95:3001'),
+            os.getenv('CLAUDE_DEV_SERVER_LAN', 'http://10.0.10.244:3001')]
+
+
+def ollama_endpoints() -> List[str]:
+    """Ollama URLs from the environment (see client/claude_config)."""
+    return [os.getenv('CLAUDE_OLLAMA_HOST', 'http://100.114.129.95:11434'),
+            os.getenv('CLAUDE_OLLAMA_HOST_LAN', 'http://10.0.10.244:11434')]
+
+
+def server_headers() -> Dict[str, str]:
+    """Headers for the task queue: X-API-Key from CLAUDE_MINI_API_KEY identifies this client."""
+    api_key = os.getenv('CLAUDE_MINI_API_KEY')
+    return {'X-API-Key': api_key} if api_key else {}
+
+
+def ollama_pool_endpoints() -> List[str]:
+    """Extra Ollama hosts next to the Mini, from CLAUDE_OLLAMA_POOL (comma-separated)."""
+    return [url.strip() for url in os.getenv('CLAUDE_OLLAMA_POOL', '').split(',') if url.strip()]
+
+
+def shared_transport(kind: str = 'server',
+                     endpoints: Optional[List[str]] = None) -> Union[MiniTransport, OllamaPool]:
+    """
+    Return the process-wide transport for a service.
+
+    Clients pointing at the same endpoints share one connection pool. With
+    CLAUDE_OLLAMA_POOL set, the default Ollama transport is an OllamaPool of
+    the Mini plus those hosts.
+    """
+    pool = []
+    if endpoints is None:
+        endpoints = server_endpoints() if kind == 'server' else ollama_endpoints()
+        pool = ollama_pool_endpoints() if kind == 'ollama' else []
+    key = (kind, tuple(endpoints) + tuple(pool))
+    with _shared_lock:
+        if key not in _shared:
+            if pool:
+                _shared[key] = OllamaPool([endpoints] + pool)
+            else:
+                _shared[key] = MiniTransport(endpoints, kind=kind,
+                                             headers=server_headers() if kind == 'server' else None)
+        return _shared[key]
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Mock Mini - Local stand-ins for the task queue server and Ollama.
+
+Serves the parts of the task queue API and of Ollama's API that the Python
+clients use, with simulated timing instead of real models, so client
+changes can be measured without the Mini:
+  - jobs take ttft + output_tokens / tokens_per_sec to run, on `slots`
+    parallel generation slots, like a real Ollama with OLLAMA_NUM_PARALLEL
+  - /api/generate streams tokens at tokens_per_sec
+  - every request can be delayed by request_latency to emulate the network
+  - the job event stream and batch endpoints can be switched off to
+    emulate an older server
+
+Run standalone (prints the two base URLs as JSON, then serves):
+    python3 mock_mini.py --tokens-per-sec 40 --slots 2
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+HEARTBEAT_INTERVAL = 15.0
+
+
+class MockMini:
+    """Simulated task queue server and Ollama, each on its own local port."""
+
+    def __init__(self,
+                 tokens_per_sec: float = 2000.0,
+                 output_tokens: int = 200,
+                 ttft: float = 0.05,
+                 slots: int = 4,
+                 request_latency: float = 0.0,
+                 events: bool = True,
+                 batch: bool = True,
+                 models: Optional[List[str]] = None,
+                 num_ctx: int = 8192,
+                 host: str = '127.0.0.1'):
+        """
+        Args:
+            tokens_per_sec: Simulated generation speed
+            output_tokens: Tokens generated per job unless the job's max_tokens is lower
+            ttft: Seconds before the first token (load + prompt evaluation)
+            slots: Jobs that generate at the same time
+            request_latency: Seconds added to every HTTP request
+            events: Serve /api/jobs/events (False emulates a polling-only server)
+            batch: Serve /api/dev-tasks/batch and /api/jobs/status
+            models: Models the Ollama stub lists in /api/tags (several stubs
+                with different lists stand in for an Ollama pool)
+            num_ctx: Context /api/models reports for the configured model
+            host: Interface to bind
+        """
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.ttft = ttft
+        self.slots = slots
+        self.request_latency = request_latency
+        self.events = events
+        self.batch = batch
+        self.models = models or ['mock-model']
+        self.num_ctx = num_ctx
+        self.host = host
+
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.requests: Dict[str, int] = {}
+        self._slot_free_at: List[float] = [0.0] * slots
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._servers: List[ThreadingHTTPServer] = []
+
+    # Simulation
+
+    def generation_time(self, max_tokens: Optional[int] = None) -> float:
+        tokens = min(self.output_tokens, max_tokens or self.output_tokens)
+        return self.ttft + tokens / self.tokens_per_sec
+
+    def add_job(self, data: Dict[str, Any]) -> str:
+        """Queue a job on the earliest free slot; its finish time is fixed up front."""
+        now = time.time()
+        with self._lock:
+            job_id = str(next(self._ids))
+            slot = min(range(self.slots), key=lambda s: self._slot_free_at[s])
+            started = max(now, self._slot_free_at[slot])
+            finished = started + self.generation_time(data.get('max_tokens'))
+            self._slot_free_at[slot] = finished
+            self.jobs[job_id] = {'id': job_id, 'data': data, 'timestamp': now,
+                                 'processedOn': started, 'finishedOn': finished}
+        return job_id
+
+    def job_status(self, job_id: str, include_data: bool = True) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        if now >= job['finishedOn']:
+            state, progress = 'completed', 100
+        elif now >= job['processedOn']:
+            state, progress = 'active', 25
+        else:
+            state, progress = 'waiting', 0
+        status = {
+            'id': job_id,
+            'state': state,
+            'progress': progress,
+            'result': self._result(job) if state == 'completed' else None,
+            'failedReason': None,
+            # Bull reports these as epoch milliseconds
+            'processedOn': int(job['processedOn'] * 1000) if state != 'waiting' else None,
+            'finishedOn': int(job['finishedOn'] * 1000) if state == 'completed' else None
+        }
+        if include_data:
+            status['data'] = job['data']
+        return status
+
+    def _result(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        data = job['data']
+        return {
+            'success': True,
+            'result': f"mock {data.get('task_type', 'dev-task')} of {len(data.get('content', ''))} chars",
+            'model_used': 'mock-model',
+            'task_type': data.get('task_type'),
+            'tokens_generated': min(self.output_tokens, data.get('max_tokens') or self.output_tokens),
+            'tokens_processed': len(data.get('content', '')) // 3
+        }
+
+    # Lifecycle
+
+    def start(self) -> Dict[str, str]:
+        """Start both servers on free ports and return their base URLs."""
+        urls = {}
+        for kind, handler in (('server', _QueueHandler), ('ollama', _OllamaHandler)):
+            httpd = ThreadingHTTPServer((self.host, 0), handler)
+            httpd.daemon_threads = True
+            httpd.mock = self
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            self._servers.append(httpd)
+            urls[kind] = f"http://{self.host}:{httpd.server_address[1]}"
+        self.urls = urls
+        return urls
+
+    def stop(self):
+        for httpd in self._servers:
+            httpd.shutdown()
+            httpd.server_close()
+        self._servers = []
+
+    def __enter__(self) -> 'MockMini':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, name: str):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40ms per request
+    disable_nagle_algorithm = True
+
+    @property
+    def mock(self) -> MockMini:
+        return self.server.mock
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, obj: Any, status: int = 200):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def end_chunked(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def route(self) -> str:
+        path = urlparse(self.path).path
+        self.mock.count(f"{self.command} {path if not path.startswith('/api/job/') else '/api/job/:id'}")
+        if self.mock.request_latency:
+            time.sleep(self.mock.request_latency)
+        return path
+
+    def query(self) -> Dict[str, List[str]]:
+        return parse_qs(urlparse(self.path).query)
+
+
+class _QueueHandler(_Handler):
+    """Task queue server API (server/task-queue-server.js)."""
+
+    def do_GET(self):
+        path = self.route()
+        mock = self.mock
+
+        if path == '/health':
+            return self.send_json({'status': 'healthy', 'mock': True})
+        if path == '/api/models':
+            return self.send_json({'configured': {'code-analysis': 'mock-model',
+                                                  'code-generation': 'mock-model'},
+                                   'prompt_version': 'mock', 'num_ctx': {'mock-model': mock.num_ctx},
+                                   'installed': ['mock-model']})
+        if path == '/api/stats':
+            return self.send_json({'queue': 'Development Tasks', 'stats': {'total': len(mock.jobs)}})
+        if path == '/mock/stats':
+            return self.send_json({'requests': mock.requests, 'jobs': len(mock.jobs)})
+        if path.startswith('/api/job/') and not path.endswith('/events'):
+            status = mock.job_status(path.rsplit('/', 1)[-1])
+            if status is None:
+                return self.send_json({'error': 'Job not found'}, 404)
+            fields = self.query().get('fields', [''])[0]
+            if fields:
+                keys = {f.split('.')[0] for f in fields.split(',')}
+                status = {k: v for k, v in status.items() if k in keys}
+            return self.send_json(status)
+        if path == '/api/jobs/status' and mock.batch:
+            ids = self.query().get('ids', [''])[0].split(',')
+            jobs = {i: mock.job_status(i, include_data=False) or {'id': i, 'state': 'missing'}
+                    for i in ids if i}
+            return self.send_json({'jobs': jobs})
+        if path == '/api/jobs/events' and mock.events:
+            ids = [i for i in self.query().get('ids', [''])[0].split(',') if i]
+            return self.stream_events(ids, self.query().get('include') == ['result'])
+        self.send_json({'error': 'Not found'}, 404)
+
+    def do_POST(self):
+        path = self.route()
+        mock = self.mock
+        body = self.read_json()
+
+        if path == '/api/dev-task':
+            return self.send_json({'success': True, 'job_id': mock.add_job(body),
+                                   'queue': 'dev-task', 'coalesced': False})
+        if path == '/api/dev-tasks/batch' and mock.batch:
+            job_ids = [mock.add_job(task) for task in body.get('tasks', [])]
+            return self.send_json({'success': True, 'job_ids': job_ids,
+                                   'coalesced': [False] * len(job_ids), 'queue': 'dev-task'})
+        self.send_json({'error': 'Not found'}, 404)
+
+    def stream_events(self, ids: List[str], include_result: bool):
+        self.start_chunked('text/event-stream')
+        pending = set(ids)
+        last_write = time.monotonic()
+        try:
+            while pending:
+                for job_id in list(pending):
+                    status = self.mock.job_status(job_id, include_data=False)
+                    if status is None:
+                        event, data = 'missing', {'job_id': job_id, 'state': 'missing'}
+                    elif status['state'] == 'completed':
+                        event, data = 'completed', {'job_id': job_id, 'state': 'completed'}
+                        if include_result:
+                            data['result'] = status['result']
+                    else:
+                        continue
+                    self.write_chunk(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+                    pending.discard(job_id)
+                    last_write = time.monotonic()
+                if time.monotonic() - last_write > HEARTBEAT_INTERVAL:
+                    self.write_chunk(b': heartbeat\n\n')
+                    last_write = time.monotonic()
+                time.sleep(0.005)
+            self.write_chunk(b'event: end\ndata: {}\n\n')
+            self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+
+class _OllamaHandler(_Handler):
+    """The subset of Ollama's API used by the clients."""
+
+    def do_GET(self):
+        path = self.route()
+        if path == '/api/version':
+            return self.send_json({'version': 'mock'})
+        if path == '/api/tags':
+            return self.send_json({'models': [{'name': name} for name in self.mock.models]})
+        self.send_json({'error': 'Not found'}, 404)
+
+    def do_POST(self):
+        path = self.route()
+        if path != '/api/generate':
+            return self.send_json({'error': 'Not found'}, 404)
+
+        mock = self.mock
+        body = self.read_json()
+        tokens = min(mock.output_tokens,
+                     (body.get('options') or {}).get('num_predict') or mock.output_tokens)
+        final = {
+            'model': body.get('model', 'mock-model'),
+            'done': True,
+            'eval_count': tokens,
+            'eval_duration': int(tokens / mock.tokens_per_sec * 1e9),
+            'load_duration': 0,
+            'prompt_eval_count': len(body.get('prompt', '')) // 3,
+            'prompt_eval_duration': int(mock.ttft * 1e9),
+            'total_duration': int(mock.generation_time(tokens) * 1e9)
+        }
+
+        if not body.get('stream', True):
+            time.sleep(mock.generation_time(tokens))
+            return self.send_json({**final, 'response': 'mock ' * tokens})
+
+        self.start_chunked('application/x-ndjson')
+        try:
+            time.sleep(mock.ttft)
+            started = time.monotonic()
+            for i in range(tokens):
+                # Pace against the start time so sleep overhead doesn't accumulate
+                delay = started + i / mock.tokens_per_sec - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.write_chunk((json.dumps({'response': 'mock ', 'done': False}) + '\n').encode('utf-8'))
+            self.write_chunk((json.dumps({**final, 'response': ''}) + '\n').encode('utf-8'))
+            self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-ins for the Mini task queue and Ollama')
+    parser.add_argument('--tokens-per-sec', type=float, default=2000.0)
+    parser.add_argument('--output-tokens', type=int, default=200)
+    parser.add_argument('--ttft', type=float, default=0.05)
+    parser.add_argument('--slots', type=int, default=4)
+    parser.add_argument('--request-latency', type=float, default=0.0)
+    parser.add_argument('--no-events', action='store_true', help='Emulate a server without job events')
+    parser.add_argument('--no-batch', action='store_true', help='Emulate a server without batch endpoints')
+    parser.add_argument('--models', help='Comma-separated models the Ollama stub lists')
+    args = parser.parse_args()
+
+    mock = MockMini(tokens_per_sec=args.tokens_per_sec, output_tokens=args.output_tokens,
+                    ttft=args.ttft, slots=args.slots, request_latency=args.request_latency,
+                    events=not args.no_events, batch=not args.no_batch,
+                    models=args.models.split(',') if args.models else None)
+    print(json.dumps(mock.start()), flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
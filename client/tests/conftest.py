@@ -0,0 +1,77 @@
+"""
+Client tests run against local sockets and mock_mini, never a real Mini.
+
+    python3 -m pytest client/tests
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The clients are flat modules installed by copying, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def closed_port():
+    """A local port nothing listens on, so connections are refused."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+class RateLimitedServer:
+    """Answers the first `limited` POSTs with 429 and Retry-After, then accepts them."""
+
+    def __init__(self, limited: int, retry_after: str = '0'):
+        self.limited = limited
+        self.posts = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                server.posts += 1
+                if server.posts <= server.limited:
+                    body, status = {'error': 'Rate limit exceeded'}, 429
+                else:
+                    body, status = {'success': True, 'job_id': str(server.posts)}, 200
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', retry_after)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def rate_limited():
+    """Factory for RateLimitedServers, closed after the test."""
+    servers = []
+
+    def start(limited: int, retry_after: str = '0') -> RateLimitedServer:
+        servers.append(RateLimitedServer(limited, retry_after))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
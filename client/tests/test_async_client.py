@@ -0,0 +1,62 @@
+"""AsyncClaudeMiniClient against a mock_mini server."""
+
+import asyncio
+import time
+
+import pytest
+
+from claude_mini_async import AsyncClaudeMiniClient
+from mock_mini import MockMini
+
+
+@pytest.fixture
+def mock():
+    # 0.05s to the first token + 100 tokens at 1000/s: 0.15s per job, 4 at a time
+    with MockMini(output_tokens=100, tokens_per_sec=1000, slots=4) as mock:
+        yield mock
+
+
+def test_concurrent_submit_and_wait(mock):
+    sources = [f"x = {i}\n" * (i + 1) for i in range(8)]
+
+    async def run():
+        async with AsyncClaudeMiniClient(mock.urls['server'], mock.urls['ollama'],
+                                         poll_interval=0.05) as client:
+            return await asyncio.gather(*(client.analyze_code(src) for src in sources))
+
+    started = time.monotonic()
+    jobs = asyncio.run(run())
+    elapsed = time.monotonic() - started
+
+    assert [job['state'] for job in jobs] == ['completed'] * 8
+    assert [job['result']['result'] for job in jobs] == [
+        f"mock code-analysis of {len(src)} chars" for src in sources]
+    assert len({job['id'] for job in jobs}) == 8
+    assert mock.requests['POST /api/dev-task'] == 8
+    # Two rounds of four parallel jobs, not eight jobs one after another
+    assert elapsed < 8 * 0.15
+
+
+def test_default_url_is_the_first_one_that_answers(mock, closed_port, monkeypatch):
+    monkeypatch.setenv('CLAUDE_DEV_SERVER', closed_port)
+    monkeypatch.setenv('CLAUDE_DEV_SERVER_LAN', mock.urls['server'])
+    client = AsyncClaudeMiniClient(poll_interval=0.05)
+
+    async def run():
+        async with client:
+            return await asyncio.gather(client.submit_task('review', 'a = 1', wait=True),
+                                        client.submit_task('review', 'b = 2', wait=True))
+
+    jobs = asyncio.run(run())
+    assert [job['state'] for job in jobs] == ['completed'] * 2
+    assert client.server_url == mock.urls['server']
+
+
+def test_rate_limited_submit_is_resent(rate_limited):
+    server = rate_limited(limited=2)
+
+    async def run():
+        async with AsyncClaudeMiniClient(server.url, server.url) as client:
+            return await client.submit_task('review', 'a = 1')
+
+    assert asyncio.run(run())['job_id'] == '3'
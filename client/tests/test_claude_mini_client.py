@@ -0,0 +1,61 @@
+"""ClaudeMiniClient against a mock_mini server."""
+
+import time
+
+import pytest
+
+from claude_mini_client import BATCH_SIZE, ClaudeMiniClient
+from mini_transport import MiniTransport
+from mock_mini import MockMini
+
+
+@pytest.fixture
+def mock():
+    # Jobs take max_tokens / 1000 seconds, all at once
+    with MockMini(output_tokens=2000, tokens_per_sec=1000, ttft=0, slots=500) as mock:
+        yield mock
+
+
+@pytest.fixture
+def client(mock):
+    return ClaudeMiniClient(server=MiniTransport([mock.urls['server']]),
+                            ollama=MiniTransport([mock.urls['ollama']], kind='ollama'))
+
+
+def test_iter_completed_is_not_held_back_by_a_slow_job_in_another_group(client):
+    tasks = [{'task_type': 'review', 'content': str(i), 'max_tokens': 10}
+             for i in range(BATCH_SIZE + 50)]
+    tasks[0]['max_tokens'] = 1500  # The first group's stream stays open for 1.5s
+    job_ids = client.submit_batch(tasks)
+
+    started = time.monotonic()
+    finished = [(job['id'], time.monotonic() - started) for job in client.iter_completed(job_ids)]
+
+    assert sorted(job_id for job_id, _ in finished) == sorted(job_ids)
+    assert finished[-1][0] == job_ids[0]
+    # Every job in the second group arrives long before the slow one finishes
+    second_group = set(job_ids[BATCH_SIZE:])
+    assert max(at for job_id, at in finished if job_id in second_group) < 1.0
+
+
+def test_single_task_submit_waits_out_rate_limits(rate_limited):
+    server = rate_limited(limited=1)
+    client = ClaudeMiniClient(server=MiniTransport([server.url]), ollama=MiniTransport([server.url]))
+    assert client.submit_task('review', 'a = 1', bypass_cache=True)['job_id'] == '2'
+
+
+def test_process_file_rejects_binary_files(client, tmp_path):
+    path = tmp_path / 'model.bin'
+    path.write_bytes(b'\x7fELF\x02\x01\x01\x00' + bytes(range(256)) * 4)
+    with pytest.raises(ValueError, match='binary'):
+        client.process_file(str(path), 'code-analysis')
+
+
+def test_process_file_chunks_large_files_with_invalid_utf8(client, mock, tmp_path):
+    path = tmp_path / 'legacy.py'
+    path.write_bytes(b''.join(b'x_%d = "caf\xe9"\n' % i for i in range(5000)))
+
+    result = client.process_file(str(path), 'code-analysis')
+    assert result['chunked'] is True
+    assert len(result['job_ids']) > 1
+    assert mock.requests['POST /api/dev-tasks/batch'] == 1
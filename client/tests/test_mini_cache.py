@@ -0,0 +1,111 @@
+"""ResultCache on its own and behind ClaudeMiniClient.submit_task."""
+
+import time
+
+import pytest
+
+from claude_mini_client import ClaudeMiniClient
+from mini_cache import ResultCache
+from mini_transport import MiniTransport
+from mock_mini import MockMini
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    yield cache
+    cache.close()
+
+
+def test_key_covers_everything_that_determines_the_output():
+    base = ('code-analysis', 'model-a', 'v1', 'a = 1', 'ctx', {'temperature': 0.3})
+    key = ResultCache.make_key(*base)
+
+    assert ResultCache.make_key(*base) == key
+    for i, changed in enumerate(['testing', 'model-b', 'v2', 'a = 2', 'other', {'temperature': 0.7}]):
+        assert ResultCache.make_key(*base[:i], changed, *base[i + 1:]) != key
+    # Content and context are hashed together, not concatenated
+    assert ResultCache.make_key('code-analysis', 'm', 'v1', 'ab', 'c') != \
+        ResultCache.make_key('code-analysis', 'm', 'v1', 'a', 'bc')
+    # Option order doesn't matter
+    assert ResultCache.make_key('code-analysis', 'm', 'v1', 'x', options={'a': 1, 'b': 2}) == \
+        ResultCache.make_key('code-analysis', 'm', 'v1', 'x', options={'b': 2, 'a': 1})
+
+
+def test_hit_and_miss(cache):
+    assert cache.get('key') is None
+    cache.put('key', {'result': {'success': True, 'result': 'ok'}})
+    assert cache.get('key') == {'result': {'success': True, 'result': 'ok'}}
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'), ttl=0.05)
+    cache.put('key', {'n': 1})
+    time.sleep(0.1)
+    assert cache.get('key') is None
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_first(cache):
+    # Values that compress to the same size
+    values = {key: {'v': key * 1000} for key in 'abc'}
+    cache.put('a', values['a'])
+    cache.put('b', values['b'])
+    cache.max_bytes = cache.stats()['bytes'] + 1  # Room for exactly two entries
+    cache.get('a')  # 'b' is now the least recently used
+
+    cache.put('c', values['c'])
+
+    assert cache.get('b') is None
+    assert cache.get('a') == values['a']
+    assert cache.get('c') == values['c']
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_is_shared_between_instances(cache):
+    cache.put('key', {'n': 1})
+    other = ResultCache(cache.path)
+    try:
+        assert other.get('key') == {'n': 1}
+    finally:
+        other.close()
+
+
+@pytest.fixture
+def mock():
+    with MockMini(output_tokens=10, tokens_per_sec=1000, ttft=0) as mock:
+        yield mock
+
+
+@pytest.fixture
+def client(mock, cache):
+    return ClaudeMiniClient(server=MiniTransport([mock.urls['server']]),
+                            ollama=MiniTransport([mock.urls['ollama']], kind='ollama'),
+                            cache=cache)
+
+
+def test_client_serves_repeated_tasks_from_the_cache(client, mock):
+    first = client.submit_task('code-analysis', 'a = 1', wait=True)
+    second = client.submit_task('code-analysis', 'a = 1', wait=True)
+
+    assert 'cache_hit' not in first
+    assert second['cache_hit'] is True
+    assert second['result'] == first['result']
+    assert mock.requests['POST /api/dev-task'] == 1
+
+    client.submit_task('code-analysis', 'a = 2', wait=True)
+    assert mock.requests['POST /api/dev-task'] == 2
+
+
+def test_bypass_cache_and_uncacheable_tasks_always_reach_the_server(client, mock):
+    client.submit_task('code-analysis', 'a = 1', wait=True)
+    assert 'cache_hit' not in client.submit_task('code-analysis', 'a = 1', wait=True, bypass_cache=True)
+
+    client.submit_task('review', 'a = 1', wait=True)
+    assert 'cache_hit' not in client.submit_task('review', 'a = 1', wait=True)
+    assert mock.requests['POST /api/dev-task'] == 4
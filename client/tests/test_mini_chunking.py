@@ -0,0 +1,142 @@
+"""Chunk budgeting and splitting, and ClaudeMiniClient.map_reduce."""
+
+import ast
+
+import pytest
+
+from claude_mini_client import ClaudeMiniClient
+from mini_chunking import (MAX_NUM_CTX, chunk_budget, chunk_lines, chunk_python,
+                           chunk_source, estimate_tokens)
+from mini_transport import MiniTransport
+from mock_mini import MockMini
+
+
+def function(name, lines=20):
+    body = ''.join(f"    value_{i} = compute('{name}', {i})\n" for i in range(lines))
+    return f"def {name}():\n{body}    return value_0\n"
+
+
+def module(count, lines=20):
+    return '\n\n'.join(function(f"func_{i}", lines) for i in range(count))
+
+
+def assert_contiguous(chunks, source):
+    """Chunks cover every line of the source, in order, without gaps or overlap."""
+    assert chunks[0].start_line == 1
+    assert chunks[-1].end_line == len(source.splitlines())
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_line == previous.end_line + 1
+    assert ''.join(chunk.content for chunk in chunks) == source
+
+
+@pytest.mark.parametrize('model, num_ctx, budget', [
+    (None, None, 8192 - 2048 - 512),                  # Unknown model: default window
+    ('qwen2.5-coder:32b-instruct-q4_K_M', None, 32768 - 8192 - 512),
+    ('llama3.2:3b', None, MAX_NUM_CTX - 8192 - 512),  # Window above the server's cap
+    ('llama3.2:3b', 65536, 65536 - 8192 - 512),       # MODEL_NUM_CTX override
+    (None, 2048, 2048 - 512 - 512),                   # Output reserve shrinks to a quarter
+    (None, 1024, 512),                                # Never below 512
+])
+def test_chunk_budget(model, num_ctx, budget):
+    assert chunk_budget(model, num_ctx=num_ctx) == budget
+
+
+def test_line_windows_respect_the_budget_and_overlap():
+    source = ''.join(f"line {i:04d} of plain text\n" for i in range(1, 301))
+    chunks = chunk_lines(source, max_tokens=200, overlap=5)
+
+    assert len(chunks) > 1
+    assert chunks[0].start_line == 1 and chunks[-1].end_line == 300
+    for chunk in chunks:
+        # The budget is counted per line, each rounded up by one token
+        assert estimate_tokens(chunk.content) <= 200 + len(chunk.content.splitlines())
+        assert chunk.content.splitlines()[0] == f"line {chunk.start_line:04d} of plain text"
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_line == previous.end_line - 4
+
+
+def test_a_line_longer_than_the_budget_is_a_chunk_of_its_own():
+    source = "short\n" + "x" * 3000 + "\nshort\n"
+    chunks = chunk_lines(source, max_tokens=100, overlap=0)
+    assert [(c.start_line, c.end_line) for c in chunks] == [(1, 1), (2, 2), (3, 3)]
+
+
+def test_python_is_split_between_definitions():
+    source = "import os\n\n" + module(12) + "\n# trailing comment\n"
+    budget = estimate_tokens(function('func_0')) * 3
+    chunks = chunk_python(source, budget)
+
+    assert len(chunks) > 1
+    assert_contiguous(chunks, source)
+    assert [name for chunk in chunks for name in chunk.names] == [f"func_{i}" for i in range(12)]
+    for chunk in chunks:
+        ast.parse(chunk.content)  # Every chunk holds whole definitions
+        assert estimate_tokens(chunk.content) <= budget
+
+
+def test_a_definition_larger_than_the_budget_is_split_into_line_windows():
+    source = function('small') + '\n' + function('huge', lines=300)
+    chunks = chunk_python(source, max_tokens=400)
+
+    assert chunks[0].names == ['small']
+    assert len(chunks) > 2
+    assert all(chunk.names == ['huge'] for chunk in chunks[1:])
+    assert chunks[-1].end_line == len(source.splitlines())
+
+
+def test_chunk_source_keeps_small_files_whole_and_falls_back_for_broken_python():
+    source = module(2)
+    assert [(c.start_line, c.end_line) for c in chunk_source(source, 10000, 'a.py')] == \
+        [(1, len(source.splitlines()))]
+
+    broken = module(12) + "\ndef oops(:\n"
+    with pytest.raises(SyntaxError):
+        chunk_python(broken, 300)
+    chunks = chunk_source(broken, 300, 'broken.py')
+    assert len(chunks) > 1
+    assert all(chunk.names == [] for chunk in chunks)
+    assert chunks[-1].end_line == len(broken.splitlines())
+
+
+@pytest.fixture
+def mock():
+    # num_ctx 2048: 1024 input tokens (about 3000 characters) per chunk
+    with MockMini(output_tokens=10, tokens_per_sec=1000, ttft=0, slots=50, num_ctx=2048) as mock:
+        yield mock
+
+
+@pytest.fixture
+def client(mock):
+    return ClaudeMiniClient(server=MiniTransport([mock.urls['server']]),
+                            ollama=MiniTransport([mock.urls['ollama']], kind='ollama'))
+
+
+def test_map_reduce_sizes_chunks_to_the_servers_num_ctx(client, mock):
+    source = module(20)  # About 5100 tokens: one chunk at the default 8192 window
+    job = client.map_reduce(source, 'code-analysis', filename='big.py')
+
+    chunks = job['result']['chunks']
+    assert job['chunked'] is True and len(chunks) > 2
+    assert [name for chunk in chunks for name in chunk['names']] == [f"func_{i}" for i in range(20)]
+    assert chunks[0]['start_line'] == 1 and chunks[-1]['end_line'] == len(source.splitlines())
+    # One batch of chunks, then one batch merging their findings
+    assert mock.requests['POST /api/dev-tasks/batch'] == 2
+    assert job['result']['result'].startswith('mock code-analysis of ')
+
+
+def test_map_reduce_joins_concatenated_tasks_in_source_order(client, mock):
+    source = module(20)
+    job = client.map_reduce(source, 'testing', filename='big.py')
+
+    sections = job['result']['result'].split('\n\n')
+    assert len(sections) == len(job['result']['chunks'])
+    assert [section.splitlines()[0] for section in sections] == [
+        f"# big.py lines {c['start_line']}-{c['end_line']} ({', '.join(c['names'])})"
+        for c in job['result']['chunks']]
+    assert mock.requests['POST /api/dev-tasks/batch'] == 1
+
+
+def test_small_content_is_a_single_task(client, mock):
+    job = client.map_reduce(function('tiny'), 'code-analysis')
+    assert 'chunked' not in job
+    assert mock.requests['POST /api/dev-task'] == 1
@@ -0,0 +1,55 @@
+"""JobWaiters sharing one wait between daemon callers."""
+
+import threading
+import time
+
+import pytest
+
+from mini_daemon import JobWaiters
+
+
+class SlowJobClient:
+    """wait_for_job for a job that completes done_after seconds from now."""
+
+    def __init__(self, done_after):
+        self.done_at = time.monotonic() + done_after
+        self.waits = 0
+
+    def wait_for_job(self, job_id, timeout=300):
+        self.waits += 1
+        remaining = self.done_at - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Job {job_id} did not complete within {timeout} seconds")
+        time.sleep(max(0, remaining))
+        return {'id': job_id, 'result': 'done'}
+
+
+def test_later_caller_waits_for_its_own_deadline():
+    waiters = JobWaiters(SlowJobClient(done_after=2))
+    outcome = {}
+
+    def short_wait():
+        try:
+            waiters.wait('7', timeout=1)
+        except TimeoutError as e:
+            outcome['short'] = e
+
+    short = threading.Thread(target=short_wait)
+    short.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    assert waiters.wait('7', timeout=30) == {'id': '7', 'result': 'done'}
+    short.join()
+
+    assert isinstance(outcome['short'], TimeoutError)
+    assert time.monotonic() - started > 1.5
+    assert waiters.get_stats()['shared'] == 1
+
+
+def test_timeout_is_not_cached():
+    client = SlowJobClient(done_after=10)
+    waiters = JobWaiters(client)
+    with pytest.raises(TimeoutError):
+        waiters.wait('8', timeout=1)
+    assert waiters.get_stats()['finished_cached'] == 0
@@ -0,0 +1,92 @@
+"""IncrementalAnalyzer baselines, pathspecs and rewritten history."""
+
+import subprocess
+
+import pytest
+
+from mini_incremental import IncrementalAnalyzer
+
+
+class FakeClient:
+    """Completes every submitted task at once; the result names the file."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit_batch(self, tasks):
+        start = len(self.submitted)
+        self.submitted.extend(tasks)
+        return [str(i) for i in range(start, len(self.submitted))]
+
+    def iter_completed(self, job_ids, timeout=3600):
+        for job_id in job_ids:
+            content = self.submitted[int(job_id)]['content']
+            yield {'id': job_id, 'state': 'completed',
+                   'result': {'result': f"report of {content.splitlines()[0]}"}}
+
+
+def git(repo, *args):
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+def commit(repo, files, message='change'):
+    for path, text in files.items():
+        target = repo / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(text)
+    git(repo, 'add', '-A')
+    git(repo, '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-qm', message)
+    return git(repo, 'rev-parse', 'HEAD').strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, 'init', '-q')
+    commit(tmp_path, {'a/x.py': 'x = 1\n' * 300, 'b/y.py': 'y = 1\n' * 300})
+    return tmp_path
+
+
+def sources(report):
+    return {item['file']: item['source'] for item in report['files']}
+
+
+def test_paths_leave_other_reports_alone(repo):
+    client = FakeClient()
+    analyzer = IncrementalAnalyzer(client, str(repo))
+    analyzer.analyze()
+    commit(repo, {'a/x.py': 'x = 2\n' + 'x = 1\n' * 299, 'b/y.py': 'y = 2\n' + 'y = 1\n' * 299})
+
+    report = analyzer.analyze(paths=['a'])
+    assert sources(report) == {'a/x.py': 'hunks'}
+    assert report['stats']['removed'] == 0
+    assert 'b/y.py' in analyzer.load_state()['files']
+
+    # b/y.py is diffed from the commit its report describes, not re-analyzed
+    submitted = len(client.submitted)
+    report = analyzer.analyze()
+    assert sources(report) == {'a/x.py': 'reused', 'b/y.py': 'hunks'}
+    assert 'y = 2' in client.submitted[submitted]['content']
+
+
+def test_removals_are_counted_within_the_pathspec(repo):
+    analyzer = IncrementalAnalyzer(FakeClient(), str(repo))
+    analyzer.analyze()
+    git(repo, 'rm', '-q', 'a/x.py', 'b/y.py')
+    commit(repo, {})
+
+    assert analyzer.analyze(paths=['a'])['stats']['removed'] == 1
+    assert analyzer.analyze()['stats']['removed'] == 1
+
+
+def test_missing_baseline_falls_back_to_full_analysis(repo):
+    analyzer = IncrementalAnalyzer(FakeClient(), str(repo))
+    analyzer.analyze()
+    # Rewrite history so the stored baseline no longer exists
+    git(repo, 'checkout', '-q', '--orphan', 'rewritten')
+    commit(repo, {'a/x.py': 'x = 3\n' * 300}, 'rewritten')
+    git(repo, 'branch', '-D', 'master' if 'master' in git(repo, 'branch') else 'main')
+    git(repo, 'reflog', 'expire', '--expire=now', '--all')
+    git(repo, 'gc', '-q', '--prune=now')
+
+    report = analyzer.analyze()
+    assert sources(report) == {'a/x.py': 'full', 'b/y.py': 'reused'}
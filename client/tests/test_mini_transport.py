@@ -0,0 +1,95 @@
+"""Retry and failover behaviour of MiniTransport."""
+
+import socket
+import threading
+
+import pytest
+import requests
+
+from mini_transport import MiniTransport
+
+
+class HangUpServer:
+    """Reads each request completely, then closes the connection without answering."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(8)
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.requests = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                data = b''
+                while b'\r\n\r\n' not in data:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                head, _, body = data.partition(b'\r\n\r\n')
+                length = next((int(line.split(b':')[1]) for line in head.split(b'\r\n')
+                               if line.lower().startswith(b'content-length:')), 0)
+                while len(body) < length:
+                    body += conn.recv(65536)
+                self.requests += 1
+
+    def close(self):
+        self.sock.close()
+
+
+# No background RTT probes, which would be counted as requests
+NO_PROBES = float('inf')
+
+
+@pytest.fixture
+def hang_up_server():
+    server = HangUpServer()
+    yield server
+    server.close()
+
+
+def test_post_dropped_after_sending_is_not_retried(hang_up_server, closed_port):
+    transport = MiniTransport([hang_up_server.url, closed_port], retries=2, backoff=0,
+                              probe_interval=NO_PROBES)
+    with pytest.raises(requests.ConnectionError):
+        transport.post('/api/dev-task', json={'task_type': 'code-analysis'})
+    assert hang_up_server.requests == 1
+
+
+def test_get_dropped_after_sending_is_retried(hang_up_server):
+    transport = MiniTransport([hang_up_server.url], retries=2, backoff=0,
+                              probe_interval=NO_PROBES)
+    with pytest.raises(requests.ConnectionError):
+        transport.get('/api/stats')
+    assert hang_up_server.requests == 3
+
+
+def test_post_fails_over_when_connection_refused(hang_up_server, closed_port):
+    transport = MiniTransport([closed_port, hang_up_server.url], retries=0, backoff=0,
+                              probe_interval=NO_PROBES)
+    with pytest.raises(requests.ConnectionError):
+        transport.post('/api/dev-task', json={})
+    # Refused on the first endpoint, so it was safe to send to the second
+    assert hang_up_server.requests == 1
+
+
+def test_rate_limited_post_is_resent_after_retry_after(rate_limited):
+    server = rate_limited(limited=2)
+    transport = MiniTransport([server.url], probe_interval=NO_PROBES)
+    response = transport.post('/api/dev-task', json={})
+    assert response.status_code == 200
+    assert server.posts == 3
+
+
+def test_rate_limit_gives_up_at_its_deadline(rate_limited):
+    server = rate_limited(limited=10, retry_after='5')
+    transport = MiniTransport([server.url], probe_interval=NO_PROBES, rate_limit_wait=1)
+    assert transport.post('/api/dev-task', json={}).status_code == 429
+    assert server.posts == 1
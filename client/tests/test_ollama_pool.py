@@ -0,0 +1,95 @@
+"""OllamaPool routing over several mock_mini Ollama stubs."""
+
+import pytest
+
+from mini_transport import OllamaPool, TransportError
+from mock_mini import MockMini
+
+
+def generate(pool, model, **kwargs):
+    return pool.post('/api/generate', json={'model': model, 'prompt': 'hi', 'stream': False}, **kwargs)
+
+
+def stop(pool, *mocks):
+    for mock in mocks:
+        mock.stop()
+    # A stopped stub keeps serving open keep-alive connections; drop them
+    pool.close()
+
+
+def generations(mock):
+    return mock.requests.get('POST /api/generate', 0)
+
+
+@pytest.fixture
+def hosts():
+    """Two Ollama stubs sharing one model, each with one of its own."""
+    mocks = [MockMini(models=['shared', 'only-a:7b'], output_tokens=5),
+             MockMini(models=['shared', 'only-b:7b'], output_tokens=5)]
+    for mock in mocks:
+        mock.start()
+    yield mocks
+    for mock in mocks:
+        mock.stop()
+
+
+def test_routes_by_installed_model(hosts):
+    a, b = hosts
+    pool = OllamaPool([a.urls['ollama'], b.urls['ollama']])
+    for _ in range(3):
+        generate(pool, 'only-b:7b').raise_for_status()
+    generate(pool, 'only-a:7b').raise_for_status()
+    assert (generations(a), generations(b)) == (1, 3)
+    # "shared" and "shared:latest" are the same model
+    assert pool.pick('shared:latest') is pool.backends[0]
+
+
+def test_streams_count_as_outstanding_until_closed(hosts):
+    a, b = hosts
+    for mock in hosts:
+        mock.tokens_per_sec = 10  # Still generating while the test looks
+    pool = OllamaPool([a.urls['ollama'], b.urls['ollama']])
+
+    first = pool.post('/api/generate', json={'model': 'shared', 'prompt': 'hi'}, stream=True)
+    second = pool.post('/api/generate', json={'model': 'shared', 'prompt': 'hi'}, stream=True)
+    assert (generations(a), generations(b)) == (1, 1)
+    assert [s['outstanding'] for s in pool.stats()] == [1, 1]
+
+    # With the first host's stream finished, new work goes back to it
+    first.close()
+    assert [s['outstanding'] for s in pool.stats()] == [0, 1]
+    assert pool.pick('shared') is pool.backends[0]
+
+    second.close()
+    assert [s['outstanding'] for s in pool.stats()] == [0, 0]
+
+
+def test_stream_read_to_the_end_is_released(hosts):
+    a, b = hosts
+    pool = OllamaPool([a.urls['ollama'], b.urls['ollama']])
+    response = pool.post('/api/generate', json={'model': 'shared', 'prompt': 'hi'}, stream=True)
+    lines = [line for line in response.iter_lines() if line]
+    assert len(lines) == 6  # 5 tokens and the final chunk
+    assert [s['outstanding'] for s in pool.stats()] == [0, 0]
+
+
+def test_fails_over_when_a_host_goes_down(hosts):
+    a, b = hosts
+    pool = OllamaPool([a.urls['ollama'], b.urls['ollama']])
+    pool.refresh()
+    stop(pool, a)
+
+    response = generate(pool, 'shared')
+    assert response.json()['done'] is True
+    assert generations(b) == 1
+    healthy = [s['healthy'] for s in pool.stats()]
+    assert healthy == [False, True]
+
+
+def test_raises_when_every_host_is_down(hosts):
+    a, b = hosts
+    pool = OllamaPool([a.urls['ollama'], b.urls['ollama']])
+    pool.refresh()
+    stop(pool, a, b)
+    with pytest.raises(TransportError):
+        generate(pool, 'shared')
@@ -48,6 +48,7 @@ fi
 echo ""
 echo "3️⃣ Downloading CrewAI Expert client..."
 curl -s -o ~/claude_mini_expert.py ${PORTAL_URL}/downloads/claude_mini_expert.py
+curl -s -o ~/mini_transport.py ${PORTAL_URL}/downloads/mini_transport.py
 chmod +x ~/claude_mini_expert.py
 echo "   ✅ Expert client downloaded to ~/claude_mini_expert.py"
 
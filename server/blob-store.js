@@ -0,0 +1,231 @@
+/**
+ * Blob Store Module
+ *
+ * Large job inputs and results don't belong inline in Redis: every Bull
+ * read of the job, every /api/job/:id poll and every /api/jobs/recent page
+ * copies them. BlobStore keeps them on disk instead, gzip-compressed and
+ * content-addressed (sha256 of the JSON), and jobs carry a small reference
+ * in their place:
+ *
+ *   { $blob: '<sha256>', bytes: <uncompressed size>, url: '/api/blobs/<sha256>' }
+ *
+ * Identical outputs (coalesced or repeated tasks) are stored once.
+ * Endpoints resolve references only for the fields a caller asks for;
+ * everything else stays a reference that can be fetched later:
+ *
+ *   GET /api/blobs/:sha   - the stored value (gzip on the wire when accepted)
+ *
+ * sweep() deletes blobs no job refers to any more.
+ */
+
+const crypto = require('crypto');
+const fs = require('fs-extra');
+const path = require('path');
+const zlib = require('zlib');
+const { promisify } = require('util');
+
+const gzip = promisify(zlib.gzip);
+const gunzip = promisify(zlib.gunzip);
+
+const SHA_PATTERN = /^[0-9a-f]{64}$/;
+
+class BlobStore {
+    /**
+     * @param {Object} options
+     * @param {string} options.dir - Directory blobs are written to
+     * @param {number} options.minBytes - Strings smaller than this stay inline
+     */
+    constructor({ dir, minBytes = 16384 }) {
+        this.dir = dir;
+        this.minBytes = minBytes;
+        this.stats = { stored: 0, deduplicated: 0, bytes_in: 0, bytes_stored: 0, reads: 0, swept: 0 };
+        fs.ensureDirSync(dir);
+    }
+
+    static isRef(value) {
+        return Boolean(value && typeof value === 'object' && typeof value.$blob === 'string');
+    }
+
+    _path(sha) {
+        return path.join(this.dir, sha.slice(0, 2), `${sha}.json.gz`);
+    }
+
+    async put(value) {
+        const json = JSON.stringify(value);
+        const sha = crypto.createHash('sha256').update(json).digest('hex');
+        const file = this._path(sha);
+        if (await this._touch(file)) {
+            this.stats.deduplicated++;
+        } else {
+            const compressed = await gzip(json);
+            const tmp = `${file}.${process.pid}.tmp`;
+            await fs.outputFile(tmp, compressed);
+            await fs.move(tmp, file, { overwrite: true });
+            this.stats.stored++;
+            this.stats.bytes_stored += compressed.length;
+        }
+        this.stats.bytes_in += json.length;
+        return { $blob: sha, bytes: json.length, url: `/api/blobs/${sha}` };
+    }
+
+    /**
+     * Mark an existing blob as just referenced, so sweep()'s grace period
+     * covers the job about to store the reference. False if there is no blob.
+     */
+    async _touch(file) {
+        const now = new Date();
+        try {
+            await fs.utimes(file, now, now);
+            return true;
+        } catch (error) {
+            if (error.code === 'ENOENT') return false;
+            throw error;
+        }
+    }
+
+    async get(ref) {
+        const sha = BlobStore.isRef(ref) ? ref.$blob : ref;
+        if (!SHA_PATTERN.test(sha)) throw new Error(`Invalid blob id ${sha}`);
+        this.stats.reads++;
+        return JSON.parse(await gunzip(await fs.readFile(this._path(sha))));
+    }
+
+    /** Compressed bytes of a blob, or null if it doesn't exist. */
+    async readCompressed(sha) {
+        if (!SHA_PATTERN.test(sha)) return null;
+        try {
+            return await fs.readFile(this._path(sha));
+        } catch (error) {
+            if (error.code === 'ENOENT') return null;
+            throw error;
+        }
+    }
+
+    /**
+     * Copy of value with every string of at least minBytes replaced by a
+     * reference. Objects and arrays are searched `depth` levels deep, so
+     * e.g. crew task outputs move out while task metadata stays inline.
+     */
+    async offload(value, depth = 3) {
+        if (typeof value === 'string') {
+            return Buffer.byteLength(value) >= this.minBytes ? this.put(value) : value;
+        }
+        if (!value || typeof value !== 'object' || depth <= 0 || BlobStore.isRef(value)) {
+            return value;
+        }
+        if (Array.isArray(value)) {
+            return Promise.all(value.map(item => this.offload(item, depth - 1)));
+        }
+        const out = {};
+        for (const [key, item] of Object.entries(value)) {
+            out[key] = await this.offload(item, depth - 1);
+        }
+        return out;
+    }
+
+    /** Copy of value with every reference (up to depth levels down) replaced by its content. */
+    async resolve(value, depth = 3) {
+        if (BlobStore.isRef(value)) {
+            try {
+                return await this.get(value);
+            } catch (error) {
+                return { ...value, error: `Blob unavailable: ${error.message}` };
+            }
+        }
+        if (!value || typeof value !== 'object' || depth <= 0) return value;
+        if (Array.isArray(value)) {
+            return Promise.all(value.map(item => this.resolve(item, depth - 1)));
+        }
+        const out = {};
+        for (const [key, item] of Object.entries(value)) {
+            out[key] = await this.resolve(item, depth - 1);
+        }
+        return out;
+    }
+
+    /** Blob ids referenced anywhere in value. */
+    static refsIn(value, into = new Set()) {
+        if (BlobStore.isRef(value)) {
+            into.add(value.$blob);
+        } else if (value && typeof value === 'object') {
+            for (const item of Object.values(value)) BlobStore.refsIn(item, into);
+        }
+        return into;
+    }
+
+    /**
+     * Delete blobs that aren't in live and are older than graceMs (a blob
+     * may be written shortly before the job referring to it is stored).
+     */
+    async sweep(live, graceMs = 3600000) {
+        let removed = 0;
+        const cutoff = Date.now() - graceMs;
+        for (const shard of await fs.readdir(this.dir)) {
+            const shardDir = path.join(this.dir, shard);
+            for (const name of await fs.readdir(shardDir)) {
+                const sha = name.split('.')[0];
+                const file = path.join(shardDir, name);
+                if (live.has(sha)) continue;
+                const { mtimeMs } = await fs.stat(file);
+                if (mtimeMs < cutoff) {
+                    await fs.remove(file);
+                    removed++;
+                }
+            }
+        }
+        this.stats.swept += removed;
+        return removed;
+    }
+
+    getStats() {
+        return { ...this.stats, dir: this.dir, min_bytes: this.minBytes };
+    }
+}
+
+/**
+ * Pick fields from an object. fields is a comma-separated list of top-level
+ * keys or dotted paths ("id,state,result.result"); empty returns obj as is.
+ */
+function project(obj, fields) {
+    if (!fields) return obj;
+    const out = {};
+    for (const field of String(fields).split(',').map(f => f.trim()).filter(Boolean)) {
+        const parts = field.split('.');
+        let source = obj;
+        let target = out;
+        for (let i = 0; i < parts.length && source !== undefined && source !== null; i++) {
+            const key = parts[i];
+            if (i === parts.length - 1) {
+                if (source[key] !== undefined) target[key] = source[key];
+            } else {
+                target[key] = target[key] || {};
+                target = target[key];
+            }
+            source = source[key];
+        }
+    }
+    return out;
+}
+
+function addBlobEndpoints(app, blobs) {
+    app.get('/api/blobs/:sha', async (req, res) => {
+        try {
+            const compressed = await blobs.readCompressed(req.params.sha);
+            if (!compressed) {
+                return res.status(404).json({ error: 'Blob not found' });
+            }
+            // Content-addressed, so a blob never changes
+            res.set('Cache-Control', 'public, max-age=31536000, immutable');
+            res.type('application/json');
+            if (req.acceptsEncodings('gzip')) {
+                res.set('Content-Encoding', 'gzip');
+                return res.send(compressed);
+            }
+            res.send(zlib.gunzipSync(compressed));
+        } catch (error) {
+            res.status(500).json({ error: error.message });
+        }
+    });
+}
+
+module.exports = { BlobStore, addBlobEndpoints, project };
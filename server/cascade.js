@@ -0,0 +1,148 @@
+/**
+ * Model Cascade Module
+ *
+ * Most code-generation and testing answers are fine from the 14B model,
+ * which is several times faster than 32B. In cascade mode a dev-task runs
+ * on the first (smallest) tier, its output is checked by cheap validators,
+ * and only output that fails them is regenerated on the next tier:
+ *
+ *   - the answer was cut off by num_predict
+ *   - a task that must produce code returned no fenced code block
+ *   - a python block doesn't parse (ast.parse in a python3 subprocess)
+ *   - a javascript block doesn't compile (vm.Script, never run)
+ *   - a json block doesn't parse
+ *
+ * Blocks in other languages are not checked. Escalations are counted per
+ * task_type and reason (/api/stats "cascade") so the tiers and the set of
+ * cascaded task types can be tuned from real traffic.
+ */
+
+const vm = require('vm');
+const { spawn } = require('child_process');
+
+// Task types whose answer is expected to contain code
+const CODE_TASKS = new Set(['code-generation', 'code-refactor', 'testing', 'debugging']);
+
+const PYTHON_CHECK = 'import ast, sys\nast.parse(sys.stdin.read())';
+const PYTHON_CHECK_TIMEOUT_MS = 5000;
+
+const LANGUAGES = {
+    python: 'python', py: 'python', python3: 'python',
+    javascript: 'javascript', js: 'javascript', node: 'javascript',
+    json: 'json'
+};
+
+function extractCodeBlocks(text) {
+    const blocks = [];
+    const fence = /```([\w+-]*)[^\n]*\n([\s\S]*?)```/g;
+    let match;
+    while ((match = fence.exec(text || '')) !== null) {
+        blocks.push({ lang: match[1].toLowerCase(), code: match[2] });
+    }
+    return blocks;
+}
+
+function checkPython(code) {
+    return new Promise(resolve => {
+        let stderr = '';
+        const child = spawn('python3', ['-c', PYTHON_CHECK], { stdio: ['pipe', 'ignore', 'pipe'] });
+        const timer = setTimeout(() => child.kill(), PYTHON_CHECK_TIMEOUT_MS);
+        child.stderr.on('data', chunk => { stderr += chunk; });
+        // No python3 (or it hung): the block is not held against the model
+        child.on('error', () => {
+            clearTimeout(timer);
+            resolve(null);
+        });
+        child.on('close', (code, signal) => {
+            clearTimeout(timer);
+            if (signal) return resolve(null);
+            resolve(code === 0 ? '' : stderr.trim().split('\n').pop());
+        });
+        child.stdin.on('error', () => {}); // Child exited before reading everything
+        child.stdin.end(code);
+    });
+}
+
+/** '' when the block is valid, an error message when not, null when it wasn't checked. */
+async function checkBlock({ lang, code }) {
+    switch (LANGUAGES[lang]) {
+        case 'python':
+            return checkPython(code);
+        case 'javascript':
+            try {
+                new vm.Script(code);
+                return '';
+            } catch (error) {
+                // ES modules don't compile as scripts; don't count that as a failure
+                return /import|export/.test(error.message) ? null : error.message;
+            }
+        case 'json':
+            try {
+                JSON.parse(code);
+                return '';
+            } catch (error) {
+                return error.message;
+            }
+        default:
+            return null;
+    }
+}
+
+/**
+ * Validate one generation.
+ *
+ * @param {string} taskType
+ * @param {Object} response - Ollama /api/generate response
+ * @returns {Promise<Object>} { ok, reason, checked }
+ */
+async function validateOutput(taskType, response) {
+    if (response.done_reason === 'length') {
+        return { ok: false, reason: 'truncated', checked: 0 };
+    }
+    const blocks = extractCodeBlocks(response.response);
+    if (blocks.length === 0) {
+        return CODE_TASKS.has(taskType)
+            ? { ok: false, reason: 'no code block', checked: 0 }
+            : { ok: true, reason: null, checked: 0 };
+    }
+    let checked = 0;
+    for (const block of blocks) {
+        const error = await checkBlock(block);
+        if (error === null) continue;
+        checked++;
+        if (error) {
+            return { ok: false, reason: `${LANGUAGES[block.lang]} syntax: ${error}`.slice(0, 200), checked };
+        }
+    }
+    return { ok: true, reason: null, checked };
+}
+
+class CascadeStats {
+    constructor() {
+        this.byTaskType = new Map(); // task_type -> { runs, accepted, escalated, reasons: {} }
+    }
+
+    record(taskType, escalated, reason) {
+        const s = this.byTaskType.get(taskType) || { runs: 0, accepted: 0, escalated: 0, reasons: {} };
+        s.runs++;
+        if (escalated) {
+            s.escalated++;
+            // Syntax errors carry the parser message; group them by language
+            const key = reason.split(':')[0];
+            s.reasons[key] = (s.reasons[key] || 0) + 1;
+        } else {
+            s.accepted++;
+        }
+        this.byTaskType.set(taskType, s);
+    }
+
+    getStats() {
+        const byTaskType = {};
+        for (const [taskType, s] of this.byTaskType) {
+            byTaskType[taskType] = { ...s, escalation_rate: +(s.escalated / s.runs).toFixed(3) };
+        }
+        return byTaskType;
+    }
+}
+
+module.exports = { validateOutput, extractCodeBlocks, CascadeStats, CODE_TASKS };
@@ -0,0 +1,218 @@
+/**
+ * Job Checkpoint Module
+ *
+ * Crew and AutoGen jobs generate for hours. Without checkpoints a server
+ * restart or an Ollama crash throws all of that away. Agent-lane jobs
+ * therefore stream their generations and keep a checkpoint in job.data
+ * while they run:
+ *
+ *   checkpoint: {
+ *     steps: {
+ *       <step>: { status: 'partial', text, tokens, updated_at }   - generation so far
+ *       <step>: { status: 'completed', output, ...details }       - finished sub-step
+ *     },
+ *     resumes: [{ at, attempt, completed, partial }]             - one per recovery
+ *   }
+ *
+ * A step is one model call: the whole answer for execute-crew and
+ * execute-autogen, one planned task for expert crews. Partial text is
+ * saved at most every intervalMs, and always when the generation fails.
+ * Large text goes to the blob store like any other job payload.
+ *
+ * When Bull runs the job again (a retry after a failure, or a stalled job
+ * picked up after a restart), finished steps are reused as they are. A
+ * partial step continues from its saved text: the model gets the original
+ * prompt plus the answer so far and is asked to carry on from where it
+ * stops, so only the rest is generated.
+ */
+
+const DEFAULT_INTERVAL_MS = 15000;
+// A continuation always gets at least this many tokens to finish in
+const MIN_CONTINUATION_TOKENS = 512;
+
+function continuationPrompt(prompt, partial) {
+    return `${prompt}
+
+You already wrote the beginning of your answer; it is repeated between the markers below. Continue from exactly where it stops, without repeating any of it.
+
+<<<ANSWER SO FAR
+${partial}
+ANSWER SO FAR>>>`;
+}
+
+class JobCheckpoint {
+    constructor(job, state, { blobs, intervalMs }) {
+        this.job = job;
+        this.state = state;
+        this.blobs = blobs;
+        this.intervalMs = intervalMs;
+        this.patch = {};
+        this.lastSave = 0;
+        this.writes = Promise.resolve();
+    }
+
+    /**
+     * Checkpoint of a job, with stored text resolved. Records a resume
+     * when the job already has checkpointed steps.
+     */
+    static async load(job, { blobs = null, intervalMs = DEFAULT_INTERVAL_MS } = {}) {
+        const stored = job.data.checkpoint || { steps: {}, resumes: [] };
+        const state = blobs ? await blobs.resolve(stored, 3) : stored;
+        const checkpoint = new JobCheckpoint(job, state, { blobs, intervalMs });
+
+        const steps = Object.entries(state.steps);
+        if (steps.length > 0) {
+            const resume = {
+                at: new Date().toISOString(),
+                attempt: job.attemptsMade + 1,
+                completed: steps.filter(([, s]) => s.status === 'completed').map(([id]) => id),
+                partial: Object.fromEntries(steps.filter(([, s]) => s.status === 'partial').map(([id, s]) => [id, s.text.length]))
+            };
+            state.resumes.push(resume);
+            job.log(`Resuming from checkpoint: ${resume.completed.length} step(s) done, ` +
+                `${Object.keys(resume.partial).length} partial`);
+            checkpoint.save();
+        }
+        return checkpoint;
+    }
+
+    /** Stored result of a finished step, or null. */
+    completed(step) {
+        const saved = this.state.steps[step];
+        return saved && saved.status === 'completed' ? saved : null;
+    }
+
+    /** { text, tokens } generated so far for an unfinished step. */
+    partial(step) {
+        const saved = this.state.steps[step];
+        return saved && saved.status === 'partial' ? { text: saved.text, tokens: saved.tokens } : { text: '', tokens: 0 };
+    }
+
+    /** Record generation progress; written at most every intervalMs unless forced. */
+    savePartial(step, text, tokens, force = false) {
+        this.state.steps[step] = { status: 'partial', text, tokens, updated_at: new Date().toISOString() };
+        if (force || Date.now() - this.lastSave >= this.intervalMs) return this.save();
+        return this.writes;
+    }
+
+    complete(step, output, details = {}) {
+        this.state.steps[step] = { status: 'completed', output, ...details, updated_at: new Date().toISOString() };
+        return this.save();
+    }
+
+    /** Other job.data fields to write along with the checkpoint (e.g. crew_progress). */
+    update(patch) {
+        Object.assign(this.patch, patch);
+        return this.save();
+    }
+
+    /** Queue a write of job.data; writes are chained so a newer state is never overwritten. */
+    save() {
+        this.lastSave = Date.now();
+        this.writes = this.writes
+            .then(async () => {
+                const checkpoint = this.blobs ? await this.blobs.offload(this.state, 3) : this.state;
+                await this.job.update({ ...this.job.data, ...this.patch, checkpoint });
+            })
+            .catch(error => console.error(`Checkpoint write failed for job ${this.job.id}:`, error.message));
+        return this.writes;
+    }
+
+    summary() {
+        return checkpointSummary(this.state);
+    }
+}
+
+/** What a checkpoint holds, without the text: { resumes, steps: { id: { status, chars, tokens, updated_at } } }. */
+function checkpointSummary(checkpoint) {
+    if (!checkpoint) return null;
+    const size = value => (typeof value === 'string' ? value.length : (value && value.bytes) || 0);
+    const steps = {};
+    for (const [id, step] of Object.entries(checkpoint.steps || {})) {
+        steps[id] = {
+            status: step.status,
+            chars: size(step.status === 'partial' ? step.text : step.output),
+            tokens: step.status === 'partial' ? step.tokens : step.tokens_generated,
+            updated_at: step.updated_at
+        };
+    }
+    return { resumes: checkpoint.resumes || [], steps };
+}
+
+function readNdjson(stream, onChunk) {
+    return new Promise((resolve, reject) => {
+        let buffered = '';
+        stream.setEncoding('utf8');
+        stream.on('data', data => {
+            const lines = (buffered + data).split('\n');
+            buffered = lines.pop();
+            try {
+                for (const line of lines) {
+                    if (line.trim()) onChunk(JSON.parse(line));
+                }
+            } catch (error) {
+                stream.destroy();
+                reject(error);
+            }
+        });
+        stream.on('end', () => {
+            try {
+                if (buffered.trim()) onChunk(JSON.parse(buffered));
+                resolve();
+            } catch (error) {
+                reject(error);
+            }
+        });
+        stream.on('error', reject);
+    });
+}
+
+/**
+ * /api/generate for one checkpointed step. Streams the generation,
+ * saving partial text as it arrives, and continues from saved text if
+ * the step was interrupted before. Resolves like a non-streaming call:
+ * response.data is the final chunk with the full text in .response, plus
+ * resumed_chars/resumed_tokens for what came from the checkpoint.
+ *
+ * @param {OllamaPool} ollama
+ * @param {Object} body - /api/generate body (stream is forced on)
+ * @param {Object} options
+ * @param {JobCheckpoint} options.checkpoint
+ * @param {string} options.step - Step id within the job
+ * @param {Object} options.config - axios config
+ */
+async function generateResumable(ollama, body, { checkpoint, step, config = {} }) {
+    const saved = checkpoint.partial(step);
+    const options = { ...body.options };
+    if (saved.tokens && options.num_predict > 0) {
+        options.num_predict = Math.max(MIN_CONTINUATION_TOKENS, options.num_predict - saved.tokens);
+    }
+    const prompt = saved.text ? continuationPrompt(body.prompt, saved.text) : body.prompt;
+
+    let text = saved.text;
+    let tokens = saved.tokens;
+    let final = null;
+    let response;
+    try {
+        response = await ollama.generate({ ...body, prompt, options, stream: true }, { ...config, responseType: 'stream' });
+        await readNdjson(response.data, chunk => {
+            if (chunk.error) throw new Error(chunk.error);
+            text += chunk.response || '';
+            if (chunk.done) {
+                final = chunk;
+            } else {
+                tokens++;
+                checkpoint.savePartial(step, text, tokens);
+            }
+        });
+        if (!final) throw new Error('Ollama stream ended before the generation finished');
+    } catch (error) {
+        await checkpoint.savePartial(step, text, tokens, true);
+        throw error;
+    }
+
+    response.data = { ...final, response: text, resumed_chars: saved.text.length, resumed_tokens: saved.tokens };
+    return response;
+}
+
+module.exports = { JobCheckpoint, generateResumable, checkpointSummary, continuationPrompt };
@@ -0,0 +1,147 @@
+/**
+ * Dev-Task Coalescing Module
+ *
+ * Identical dev-tasks (same task_type, content, context, sampling
+ * options and cascade mode) get a deterministic job id derived from a hash
+ * of the request. A duplicate submission attaches to the existing
+ * waiting/active job, or is answered from a recently completed one,
+ * instead of running the same generation again.
+ *
+ * Submitters can opt out per task with `coalesce: false`.
+ *
+ * Queues that share a Redis instance with another queue can pass an
+ * idPrefix so their job ids stay distinguishable (see lanes.js).
+ *
+ * The id is computed from the task as submitted; `prepare` then transforms
+ * what is actually stored as job data (e.g. moving large content into the
+ * blob store), so coalescing is unaffected by it. Likewise `priorityFor`
+ * gives each new job its Bull priority (see fair-share.js); a coalesced
+ * submission keeps the priority of the job it attaches to.
+ */
+
+const crypto = require('crypto');
+
+const LIVE_STATES = ['waiting', 'active', 'delayed', 'paused'];
+
+function devTaskJobId(task, idPrefix = '') {
+    const { task_type, content = '', context = '', temperature, max_tokens, custom_prompt, cascade } = task;
+    const digest = crypto.createHash('sha256')
+        .update(JSON.stringify({ task_type, content, context, temperature, max_tokens, custom_prompt, cascade }))
+        .digest('hex');
+    return `${idPrefix}dt-${digest.slice(0, 32)}`;
+}
+
+function deferred() {
+    let resolve, reject;
+    const promise = new Promise((res, rej) => {
+        resolve = res;
+        reject = rej;
+    });
+    promise.catch(() => {}); // Rejection is handled by whoever awaits it
+    return { promise, resolve, reject };
+}
+
+/**
+ * Create a function that adds dev-tasks to the queue with coalescing.
+ *
+ * @param {Queue} devQueue - Bull queue
+ * @param {Object} options
+ * @param {number} options.windowMs - How long a completed job's result is reused
+ * @param {string} options.idPrefix - Prefix for every job id this submitter creates
+ * @param {Function} options.prepare - async task => job data for a new job
+ * @param {Function} options.priorityFor - task => Bull priority for a new job (default opts.priority)
+ * @returns {Function} async (tasks, opts) => [{ job, coalesced, state }]
+ */
+function createDevTaskSubmitter(devQueue, { windowMs = 10 * 60 * 1000, idPrefix = '', prepare = async task => task, priorityFor = null } = {}) {
+    // jobId -> deferred { job, state }, so concurrent submissions in this
+    // process attach to the same add instead of racing it
+    const inFlight = new Map();
+
+    async function findReusable(jobId) {
+        const existing = await devQueue.getJob(jobId);
+        if (!existing) return null;
+
+        const state = await existing.getState();
+        if (LIVE_STATES.includes(state)) {
+            return { job: existing, state };
+        }
+        if (state === 'completed' && Date.now() - existing.finishedOn <= windowMs) {
+            return { job: existing, state };
+        }
+
+        // Stale or failed: clear the id so the task can run again
+        await existing.remove().catch(() => {});
+        return null;
+    }
+
+    return async function addDevTasks(tasks, opts = {}) {
+        const results = new Array(tasks.length);
+        const owned = [];      // { index, jobId, task, pending } this call resolves
+        const attached = [];   // { index, promise } waiting on another submission
+        const seen = new Map(); // jobId -> deferred, for duplicates within this call
+
+        for (let i = 0; i < tasks.length; i++) {
+            const task = tasks[i];
+            if (task.coalesce === false) {
+                const jobId = idPrefix ? `${idPrefix}${crypto.randomBytes(12).toString('hex')}` : undefined;
+                owned.push({ index: i, jobId, task, pending: null });
+                continue;
+            }
+
+            const jobId = devTaskJobId(task, idPrefix);
+            const existing = seen.get(jobId) || inFlight.get(jobId);
+            if (existing) {
+                attached.push({ index: i, promise: existing.promise });
+                continue;
+            }
+
+            // Registered synchronously, before any await, so no other request slips in
+            const pending = deferred();
+            inFlight.set(jobId, pending);
+            seen.set(jobId, pending);
+            owned.push({ index: i, jobId, task, pending });
+        }
+
+        try {
+            const reusable = await Promise.all(owned.map(o => o.pending ? findReusable(o.jobId) : null));
+            const fresh = [];
+            owned.forEach((o, k) => {
+                if (reusable[k]) {
+                    results[o.index] = { ...reusable[k], coalesced: true };
+                    o.pending.resolve(reusable[k]);
+                } else {
+                    fresh.push(o);
+                }
+            });
+
+            if (fresh.length > 0) {
+                const data = await Promise.all(fresh.map(({ task }) => prepare(task)));
+                const jobs = await devQueue.addBulk(fresh.map(({ task, jobId }, k) => ({
+                    name: 'dev-task',
+                    data: data[k],
+                    opts: { ...opts, ...(priorityFor ? { priority: priorityFor(task) } : {}), ...(jobId ? { jobId } : {}) }
+                })));
+                fresh.forEach((o, k) => {
+                    const added = { job: jobs[k], state: 'waiting' };
+                    results[o.index] = { ...added, coalesced: false };
+                    if (o.pending) o.pending.resolve(added);
+                });
+            }
+        } catch (error) {
+            owned.forEach(o => o.pending && o.pending.reject(error));
+            throw error;
+        } finally {
+            owned.forEach(o => {
+                if (o.jobId && inFlight.get(o.jobId) === o.pending) inFlight.delete(o.jobId);
+            });
+        }
+
+        for (const { index, promise } of attached) {
+            results[index] = { ...(await promise), coalesced: true };
+        }
+
+        return results;
+    };
+}
+
+module.exports = { createDevTaskSubmitter, devTaskJobId };
@@ -0,0 +1,180 @@
+/**
+ * Crew Plan Executor Module
+ *
+ * Runs a CrewAIExpert configuration as a task graph: every task in
+ * config.tasks becomes its own model call, made by the task's agent, once
+ * all of its dependencies have finished. Tasks whose dependencies are met
+ * run concurrently, up to config.execution_strategy.parallel_tasks.
+ *
+ * Each dependency's output is passed to the tasks that depend on it, so the
+ * synthesis task works from the specialists' actual findings. A task that
+ * still fails after its retries fails its dependents (they are skipped);
+ * independent branches carry on.
+ *
+ * Progress is published through onUpdate as per-task states:
+ *   { id, agent, status: pending|running|completed|failed|skipped,
+ *     attempts, started_at, finished_at, error }
+ *
+ * A run can start from tasks completed by an earlier, interrupted run
+ * (see checkpoints.js); those keep their output and are marked recovered.
+ */
+
+const STATUSES = ['pending', 'running', 'completed', 'failed', 'skipped'];
+
+/**
+ * Check the plan is a DAG over known task ids; returns the tasks in a
+ * dependency-respecting order. Throws on unknown dependencies or cycles.
+ */
+function orderTasks(tasks) {
+    const byId = new Map(tasks.map(task => [task.id, task]));
+    for (const task of tasks) {
+        for (const dep of task.dependencies || []) {
+            if (!byId.has(dep)) {
+                throw new Error(`Task ${task.id} depends on unknown task ${dep}`);
+            }
+        }
+    }
+
+    const order = [];
+    const state = new Map(); // id -> 'visiting' | 'done'
+    const visit = (task, path) => {
+        if (state.get(task.id) === 'done') return;
+        if (state.get(task.id) === 'visiting') {
+            throw new Error(`Task dependency cycle: ${[...path, task.id].join(' -> ')}`);
+        }
+        state.set(task.id, 'visiting');
+        for (const dep of task.dependencies || []) visit(byId.get(dep), [...path, task.id]);
+        state.set(task.id, 'done');
+        order.push(task);
+    };
+    tasks.forEach(task => visit(task, []));
+    return order;
+}
+
+/**
+ * Execute a crew plan.
+ *
+ * @param {Object} config - CrewAIExpert.generateCrewConfig() output
+ * @param {Object} options
+ * @param {Function} options.runTask - async (task, agent, dependencyOutputs) => { output, ... }
+ * @param {number} options.parallel - Override for execution_strategy.parallel_tasks
+ * @param {Function} options.onUpdate - (taskStates) => void, called on every state change
+ * @param {Object} options.completed - task id => { output, ...details } finished in an earlier run
+ * @returns {Promise<Object>} { tasks: [state with output], outputs: {id: output}, completed, failed, skipped }
+ */
+async function runCrewPlan(config, { runTask, parallel, onUpdate = () => {}, completed = {} }) {
+    const tasks = orderTasks(config.tasks || []);
+    const agents = new Map((config.agents || []).map(agent => [agent.role, agent]));
+    const limit = Math.max(1, parallel || (config.execution_strategy || {}).parallel_tasks || 1);
+
+    const states = new Map(tasks.map(task => [task.id, {
+        id: task.id,
+        agent: task.agent,
+        dependencies: task.dependencies || [],
+        status: 'pending',
+        attempts: 0,
+        started_at: null,
+        finished_at: null,
+        error: null
+    }]));
+    const outputs = {};
+    for (const [id, { output, status, updated_at, ...details }] of Object.entries(completed)) {
+        if (!states.has(id)) continue;
+        outputs[id] = output;
+        Object.assign(states.get(id), details, { status: 'completed', recovered: true });
+    }
+    const running = new Map(); // id -> promise
+    const publish = () => onUpdate([...states.values()]);
+
+    const start = task => {
+        const state = states.get(task.id);
+        state.status = 'running';
+        state.started_at = new Date().toISOString();
+        publish();
+
+        const dependencyOutputs = {};
+        for (const dep of state.dependencies) dependencyOutputs[dep] = outputs[dep];
+        const maxAttempts = task.retry_on_failure ? 1 + (task.max_retries || 0) : 1;
+
+        const attempt = async () => {
+            for (;;) {
+                state.attempts++;
+                try {
+                    return await runTask(task, agents.get(task.agent) || { role: task.agent }, dependencyOutputs);
+                } catch (error) {
+                    if (state.attempts >= maxAttempts) throw error;
+                }
+            }
+        };
+
+        const promise = attempt().then(({ output, ...details }) => {
+            outputs[task.id] = output;
+            Object.assign(state, details, { status: 'completed' });
+        }, error => {
+            state.status = 'failed';
+            state.error = error.message;
+        }).then(() => {
+            state.finished_at = new Date().toISOString();
+            running.delete(task.id);
+            publish();
+        });
+        running.set(task.id, promise);
+    };
+
+    for (;;) {
+        // Dependents of failed or skipped tasks can never run
+        for (const state of states.values()) {
+            if (state.status === 'pending' && state.dependencies.some(dep =>
+                ['failed', 'skipped'].includes(states.get(dep).status))) {
+                state.status = 'skipped';
+                state.error = 'A dependency did not complete';
+                publish();
+            }
+        }
+
+        const ready = tasks.filter(task => states.get(task.id).status === 'pending' &&
+            states.get(task.id).dependencies.every(dep => states.get(dep).status === 'completed'));
+        for (const task of ready.slice(0, limit - running.size)) start(task);
+
+        if (running.size === 0) break;
+        await Promise.race(running.values());
+    }
+
+    const counts = Object.fromEntries(STATUSES.map(status => [status, 0]));
+    for (const state of states.values()) counts[state.status]++;
+    return {
+        tasks: [...states.values()].map(state => ({ ...state, output: outputs[state.id] })),
+        outputs,
+        completed: counts.completed,
+        failed: counts.failed,
+        skipped: counts.skipped,
+        parallel_tasks: limit
+    };
+}
+
+/** Prompt for one task, given its agent and the outputs of the tasks it depends on. */
+function buildTaskPrompt(config, task, agent, dependencyOutputs) {
+    const expected = typeof task.expected_output === 'string'
+        ? task.expected_output
+        : JSON.stringify(task.expected_output || {});
+    const previous = Object.entries(dependencyOutputs)
+        .map(([id, output]) => `### ${id}\n${output}`)
+        .join('\n\n');
+
+    return `You are the ${agent.role} in the crew "${config.crew_name}".
+Goal: ${agent.goal || ''}
+Background: ${agent.backstory || ''}
+${agent.capabilities && agent.capabilities.length ? `Capabilities: ${agent.capabilities.join(', ')}\n` : ''}
+Overall request: ${config.task_description}
+
+Context:
+${config.context || ''}
+
+Your task (${task.id}): ${task.description}
+
+Expected output: ${expected}
+${previous ? `\nOutputs of the tasks this one builds on:\n\n${previous}\n` : ''}
+Complete your task and respond with your deliverable only.`;
+}
+
+module.exports = { runCrewPlan, orderTasks, buildTaskPrompt };
@@ -1,15 +1,44 @@
 /**
  * CrewAI Expert Endpoint Module
  * 
- * Adds intelligent crew creation endpoints to the task queue server
- * This module should be integrated into task-queue-server.js
+ * Adds intelligent crew creation endpoints to the task queue server.
+ * Submitted crews are executed task by task by crew-executor.js, and
+ * /api/crew/status reports the state of each planned task, and what was
+ * recovered from checkpoints if the job was interrupted (checkpoints.js).
  */
 
 const CrewAIExpert = require('./crew-expert');
+const { orderTasks } = require('./crew-executor');
+const { checkpointSummary } = require('./checkpoints');
 
-function addCrewExpertEndpoints(app, devQueue) {
+/**
+ * @param {Object} app - Express app
+ * @param {Object} devQueue - Queue or LaneSet crews are added to
+ * @param {Object} options
+ * @param {DurationEstimator} options.estimator - Learned durations (estimator.js); static role times without it
+ * @param {number} options.agentSlots - Generation slots crews can use at once
+ */
+function addCrewExpertEndpoints(app, devQueue, { estimator = null, agentSlots = Infinity } = {}) {
     const expert = new CrewAIExpert();
 
+    // Expected run time of a crew as the executor will schedule it
+    const estimateCrew = config => {
+        const parallel = Math.max(1, Math.min(config.execution_strategy.parallel_tasks || 1, agentSlots));
+        if (!estimator) {
+            const total = config.tasks.reduce((sum, t) => sum + t.max_time, 0);
+            return { total_time: total, parallel_tasks: parallel, learned_tasks: 0,
+                tasks: config.tasks.map(t => ({ id: t.id, estimated_time: t.max_time, basis: 'prior', samples: 0 })) };
+        }
+        const plan = estimator.estimatePlan(config, parallel);
+        return {
+            total_time: Math.round(plan.total_ms / 1000),
+            sequential_time: Math.round(plan.sequential_ms / 1000),
+            parallel_tasks: parallel,
+            learned_tasks: plan.learned,
+            tasks: plan.tasks.map(t => ({ id: t.id, estimated_time: Math.round(t.ms / 1000), basis: t.basis, samples: t.samples }))
+        };
+    };
+
     /**
      * Simple crew request endpoint
      * Takes a simple description and creates an optimized crew
@@ -38,19 +67,23 @@ function addCrewExpertEndpoints(app, devQueue) {
                 type: 'expert-designed-crew',
                 config: crewConfig,
                 original_request: req.body,
-                timestamp: new Date().toISOString()
+                timestamp: new Date().toISOString(),
+                // Admission order within the agent lane (fair-share.js)
+                priority: priority || 'normal',
+                client: req.client
             }, {
-                priority: priority === 'high' ? 1 : priority === 'low' ? 3 : 2,
                 removeOnComplete: false,
                 removeOnFail: false
             });
 
+            const estimate = estimateCrew(crewConfig);
             res.json({
                 success: true,
                 job_id: job.id,
                 crew_name: crewConfig.crew_name,
                 pattern_used: expert.analyzeRequest({ task_description: description }),
-                estimated_time: crewConfig.tasks.reduce((sum, t) => sum + t.max_time, 0),
+                estimated_time: estimate.total_time,
+                estimate,
                 message: 'Expert-designed crew has been created and submitted'
             });
 
@@ -88,6 +121,8 @@ function addCrewExpertEndpoints(app, devQueue) {
                 requirements: requirements || []
             });
 
+            const estimate = estimateCrew(config);
+            const taskEstimates = new Map(estimate.tasks.map(t => [t.id, t]));
             res.json({
                 pattern: pattern_key,
                 crew_name: pattern.name,
@@ -100,9 +135,13 @@ function addCrewExpertEndpoints(app, devQueue) {
                 tasks: config.tasks.map(t => ({
                     id: t.id,
                     description: t.description,
-                    estimated_time: t.max_time
+                    dependencies: t.dependencies,
+                    estimated_time: taskEstimates.get(t.id).estimated_time,
+                    estimate_basis: taskEstimates.get(t.id).basis,
+                    estimate_samples: taskEstimates.get(t.id).samples
                 })),
-                estimated_total_time: config.tasks.reduce((sum, t) => sum + t.max_time, 0),
+                estimated_total_time: estimate.total_time,
+                estimate,
                 process_type: config.process_type,
                 execution_strategy: config.execution_strategy
             });
@@ -179,25 +218,36 @@ function addCrewExpertEndpoints(app, devQueue) {
                 crewConfig.tasks = mergeTasks(crewConfig.tasks, custom_tasks);
             }
 
+            // Custom tasks must still form a graph the executor can run
+            try {
+                orderTasks(crewConfig.tasks);
+            } catch (error) {
+                return res.status(400).json({ error: error.message });
+            }
+
             // Submit to queue
             const job = await devQueue.add('expert-crew-advanced', {
                 type: 'expert-designed-crew-advanced',
                 config: crewConfig,
                 original_request: req.body,
-                timestamp: new Date().toISOString()
+                timestamp: new Date().toISOString(),
+                // Admission order within the agent lane (fair-share.js)
+                priority: priority || 'normal',
+                client: req.client
             }, {
-                priority: priority === 'high' ? 1 : priority === 'low' ? 3 : 2,
                 removeOnComplete: false,
                 removeOnFail: false
             });
 
+            const estimate = estimateCrew(crewConfig);
             res.json({
                 success: true,
                 job_id: job.id,
                 crew_name: crewConfig.crew_name,
                 agent_count: crewConfig.agents.length,
                 task_count: crewConfig.tasks.length,
-                estimated_time: crewConfig.tasks.reduce((sum, t) => sum + t.max_time, 0),
+                estimated_time: estimate.total_time,
+                estimate,
                 message: 'Advanced expert crew created and submitted'
             });
 
@@ -225,14 +275,19 @@ function addCrewExpertEndpoints(app, devQueue) {
 
             const state = await job.getState();
             const progress = job.progress();
-            const logs = job.logs || [];
+            const { logs = [] } = await job.queue.getJobLogs(job.id, -10, -1);
 
-            // Extract crew-specific information
+            // Extract crew-specific information; crew_progress holds the
+            // executor's per-task states once the crew has started
+            const taskStates = job.data.crew_progress ||
+                (job.returnvalue && job.returnvalue.tasks) || null;
             const crewInfo = job.data.config ? {
                 crew_name: job.data.config.crew_name,
                 agents: job.data.config.agents.map(a => a.role),
-                current_task: getCurrentTask(progress, job.data.config.tasks),
-                completed_tasks: getCompletedTasks(progress, job.data.config.tasks)
+                current_task: getCurrentTask(progress, job.data.config.tasks, taskStates),
+                running_tasks: getRunningTasks(job.data.config.tasks, taskStates),
+                completed_tasks: getCompletedTasks(progress, job.data.config.tasks, taskStates),
+                tasks: taskStates ? taskStates.map(({ output, ...task }) => task) : null
             } : {};
 
             res.json({
@@ -240,6 +295,10 @@ function addCrewExpertEndpoints(app, devQueue) {
                 state: state,
                 progress: progress,
                 crew_info: crewInfo,
+                recovery: {
+                    attempts_made: job.attemptsMade,
+                    ...(checkpointSummary(job.data.checkpoint) || { resumes: [], steps: {} })
+                },
                 logs: logs.slice(-10), // Last 10 log entries
                 created_at: new Date(job.timestamp).toISOString(),
                 updated_at: job.processedOn ? new Date(job.processedOn).toISOString() : null,
@@ -356,16 +415,33 @@ function mergeTasks(baseTasks, customTasks) {
     return merged;
 }
 
-function getCurrentTask(progress, tasks) {
+function getCurrentTask(progress, tasks, taskStates) {
     if (!tasks || tasks.length === 0) return null;
-    
+
+    if (taskStates) {
+        const running = getRunningTasks(tasks, taskStates);
+        return running.length > 0 ? running[0] : null;
+    }
+
+    // Not started yet (or queued before per-task progress existed): estimate
     const taskIndex = Math.floor((progress / 100) * tasks.length);
     return tasks[Math.min(taskIndex, tasks.length - 1)];
 }
 
-function getCompletedTasks(progress, tasks) {
+function getRunningTasks(tasks, taskStates) {
+    if (!tasks || !taskStates) return [];
+
+    const running = new Set(taskStates.filter(t => t.status === 'running').map(t => t.id));
+    return tasks.filter(t => running.has(t.id));
+}
+
+function getCompletedTasks(progress, tasks, taskStates) {
     if (!tasks || tasks.length === 0) return [];
-    
+
+    if (taskStates) {
+        return taskStates.filter(t => t.status === 'completed').map(t => t.id);
+    }
+
     const completedCount = Math.floor((progress / 100) * tasks.length);
     return tasks.slice(0, completedCount).map(t => t.id);
 }
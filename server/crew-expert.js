@@ -62,21 +62,24 @@ const CREW_PATTERNS = {
                 goal: 'Implement robust API endpoints with proper error handling and validation',
                 backstory: 'Full-stack developer specialized in Node.js, Python, and database design with emphasis on performance',
                 tools: ['code_generator', 'orm_builder', 'migration_creator'],
-                capabilities: ['CRUD operations', 'authentication', 'rate limiting', 'caching']
+                capabilities: ['CRUD operations', 'authentication', 'rate limiting', 'caching'],
+                builds_on: ['API Architect']
             },
             {
                 role: 'Documentation Writer',
                 goal: 'Create comprehensive API documentation with examples and tutorials',
                 backstory: 'Technical writer focused on developer experience with expertise in OpenAPI, Postman, and interactive docs',
                 tools: ['swagger_generator', 'postman_collection', 'markdown_editor'],
-                capabilities: ['OpenAPI spec', 'example generation', 'tutorial writing']
+                capabilities: ['OpenAPI spec', 'example generation', 'tutorial writing'],
+                builds_on: ['API Architect']
             },
             {
                 role: 'Integration Tester',
                 goal: 'Design and execute comprehensive API test suites',
                 backstory: 'QA engineer specialized in API testing, contract testing, and load testing',
                 tools: ['postman', 'newman', 'k6_load_tester'],
-                capabilities: ['endpoint testing', 'load testing', 'contract testing']
+                capabilities: ['endpoint testing', 'load testing', 'contract testing'],
+                builds_on: ['API Architect']
             }
         ],
         process_type: 'sequential',
@@ -100,14 +103,16 @@ const CREW_PATTERNS = {
                 goal: 'Identify the fundamental cause of issues through systematic analysis',
                 backstory: 'Systems thinker with expertise in failure analysis and post-mortem processes',
                 tools: ['dependency_graph', 'call_graph', 'data_flow_analyzer'],
-                capabilities: ['5-whys analysis', 'fishbone diagrams', 'timeline reconstruction']
+                capabilities: ['5-whys analysis', 'fishbone diagrams', 'timeline reconstruction'],
+                builds_on: ['Bug Investigator']
             },
             {
                 role: 'Solution Developer',
                 goal: 'Develop and validate fixes for identified issues',
                 backstory: 'Senior developer experienced in hotfixes, patches, and long-term solutions',
                 tools: ['code_editor', 'test_runner', 'regression_tester'],
-                capabilities: ['patch development', 'fix validation', 'regression prevention']
+                capabilities: ['patch development', 'fix validation', 'regression prevention'],
+                builds_on: ['Bug Investigator', 'Root Cause Analyst']
             }
         ],
         process_type: 'sequential',
@@ -169,21 +174,24 @@ const CREW_PATTERNS = {
                 goal: 'Build data pipelines and ensure data quality',
                 backstory: 'Expert in ETL, data warehousing, and real-time processing',
                 tools: ['apache_spark', 'airflow', 'sql_engine'],
-                capabilities: ['ETL', 'data cleaning', 'stream processing', 'data validation']
+                capabilities: ['ETL', 'data cleaning', 'stream processing', 'data validation'],
+                builds_on: []
             },
             {
                 role: 'Visualization Specialist',
                 goal: 'Create insightful dashboards and reports',
                 backstory: 'Data visualization expert with UX design background',
                 tools: ['plotly', 'tableau', 'd3js'],
-                capabilities: ['dashboard design', 'interactive viz', 'storytelling']
+                capabilities: ['dashboard design', 'interactive viz', 'storytelling'],
+                builds_on: ['Data Scientist']
             },
             {
                 role: 'Business Analyst',
                 goal: 'Translate data insights into business recommendations',
                 backstory: 'MBA with experience bridging technical and business teams',
                 tools: ['excel', 'powerbi', 'report_builder'],
-                capabilities: ['KPI definition', 'ROI analysis', 'strategic recommendations']
+                capabilities: ['KPI definition', 'ROI analysis', 'strategic recommendations'],
+                builds_on: ['Data Scientist', 'Visualization Specialist']
             }
         ],
         process_type: 'sequential',
@@ -207,14 +215,16 @@ const CREW_PATTERNS = {
                 goal: 'Execute refactoring while maintaining functionality',
                 backstory: 'Senior developer specialized in large-scale refactoring projects',
                 tools: ['ide_refactoring', 'ast_manipulator', 'test_harness'],
-                capabilities: ['extract method', 'move class', 'introduce pattern']
+                capabilities: ['extract method', 'move class', 'introduce pattern'],
+                builds_on: ['Refactoring Strategist']
             },
             {
                 role: 'Test Engineer',
-                goal: 'Ensure refactoring doesn't break existing functionality',
+                goal: 'Ensure refactoring does not break existing functionality',
                 backstory: 'QA expert in regression testing and test automation',
                 tools: ['test_runner', 'mutation_testing', 'coverage_tool'],
-                capabilities: ['regression testing', 'characterization tests', 'golden master']
+                capabilities: ['regression testing', 'characterization tests', 'golden master'],
+                builds_on: ['Refactoring Strategist']
             }
         ],
         process_type: 'sequential',
@@ -382,7 +392,8 @@ class CrewAIExpert {
         const pattern = this.patterns[pattern_key];
 
         // Build detailed task list based on pattern and request
-        const tasks = this.generateTasks(pattern, task_description, context, requirements);
+        const tasks = this.generateTasks(pattern, task_description, context, requirements,
+            process_type || pattern.process_type);
 
         // Customize agents based on specific requirements
         const agents = this.customizeAgents(pattern.agents, context, requirements);
@@ -422,16 +433,27 @@ class CrewAIExpert {
     /**
      * Generate specific tasks based on pattern and request
      */
-    generateTasks(pattern, task_description, context, requirements) {
+    generateTasks(pattern, task_description, context, requirements, process_type = pattern.process_type) {
         const tasks = [];
         
-        // Create tasks for each agent
+        // Create tasks for each agent. In sequential crews a task waits for
+        // the agents whose output it builds on (builds_on, by default the
+        // agent before it), so tasks that only need the lead's plan run in
+        // parallel; hierarchical specialists work independently and only
+        // the synthesis depends on them all
+        const taskIds = new Map(pattern.agents.map((agent, index) => [agent.role, `task_${index + 1}`]));
         pattern.agents.forEach((agent, index) => {
+            let dependencies = [];
+            if (process_type === 'sequential' && index > 0) {
+                dependencies = agent.builds_on
+                    ? agent.builds_on.map(role => taskIds.get(role))
+                    : [`task_${index}`];
+            }
             const task = {
                 id: `task_${index + 1}`,
                 description: `${agent.role}: ${this.generateTaskDescription(agent, task_description)}`,
                 agent: agent.role,
-                dependencies: index > 0 ? [`task_${index}`] : [],
+                dependencies,
                 expected_output: this.generateExpectedOutput(agent.role, pattern.name),
                 tools: agent.tools,
                 context_variables: ['task_description', 'requirements', 'previous_outputs'],
@@ -610,7 +632,8 @@ class CrewAIExpert {
     }
 
     /**
-     * Estimate task completion time based on role
+     * Estimate task completion time based on role. Used as each task's
+     * max_time and as the prior until estimator.js has learned the role.
      */
     estimateTaskTime(role) {
         const times = {
@@ -0,0 +1,220 @@
+/**
+ * Duration Estimator Module
+ *
+ * Learns how long jobs take from the jobs this server has completed,
+ * instead of the fixed per-role guesses in CrewAIExpert.estimateTaskTime:
+ *
+ *   - dev-tasks, crews and autogen teams: per task_type and model, a linear
+ *     fit of service time (finishedOn - processedOn, minus time spent waiting
+ *     for a generation slot) against input tokens
+ *   - expert crew tasks: per agent role and model, from each task's start and
+ *     finish in the executor's results
+ *
+ * Statistics decay exponentially (halfLife observations), so the model
+ * follows hardware, model and prompt changes. Predictions fall back from
+ * the most specific key with enough samples to broader ones, and finally to
+ * the caller's prior. State is saved to a JSON file so restarts keep it.
+ */
+
+const fs = require('fs-extra');
+const path = require('path');
+
+const MIN_SAMPLES = 3;
+
+class DurationEstimator {
+    /**
+     * @param {Object} options
+     * @param {string} options.path - JSON file the learned statistics are kept in
+     * @param {number} options.halfLife - Observations after which an old sample counts half
+     */
+    constructor({ path: statePath = null, halfLife = 200 } = {}) {
+        this.path = statePath;
+        this.decay = Math.pow(0.5, 1 / halfLife);
+        this.stats = new Map(); // key -> { n, sx, sy, sxx, sxy }
+        this.observations = 0;
+        this.dirty = false;
+    }
+
+    _observe(key, x, ms) {
+        const s = this.stats.get(key) || { n: 0, sx: 0, sy: 0, sxx: 0, sxy: 0 };
+        for (const field of ['n', 'sx', 'sy', 'sxx', 'sxy']) s[field] *= this.decay;
+        s.n += 1;
+        s.sx += x;
+        s.sy += ms;
+        s.sxx += x * x;
+        s.sxy += x * ms;
+        this.stats.set(key, s);
+    }
+
+    _predict(keys, x, priorMs) {
+        for (const key of keys) {
+            const s = this.stats.get(key);
+            if (!s || s.n < MIN_SAMPLES) continue;
+            const mean = s.sy / s.n;
+            const variance = s.n * s.sxx - s.sx * s.sx;
+            let ms = mean;
+            if (variance > 1e-6 * s.n * s.n) {
+                const slope = (s.n * s.sxy - s.sx * s.sy) / variance;
+                // A negative slope is noise; fall back to the mean
+                if (slope > 0) ms = mean + slope * (x - s.sx / s.n);
+            }
+            return { ms: Math.round(Math.max(ms, mean * 0.1)), basis: key, samples: Math.round(s.n) };
+        }
+        return { ms: priorMs === undefined ? null : Math.round(priorMs), basis: 'prior', samples: 0 };
+    }
+
+    /** Record one generation's service time. */
+    observeTask(taskType, model, inputTokens, ms) {
+        if (!(ms > 0)) return;
+        this._observe(`task:${taskType}|${model}`, inputTokens || 0, ms);
+        this._observe(`task:${taskType}`, inputTokens || 0, ms);
+        this.observations++;
+        this.dirty = true;
+    }
+
+    /** Record one expert crew task's duration. */
+    observeRole(role, model, ms) {
+        if (!(ms > 0)) return;
+        this._observe(`role:${role}|${model}`, 0, ms);
+        this._observe(`role:${role}`, 0, ms);
+        this.observations++;
+        this.dirty = true;
+    }
+
+    /** Learn from a completed Bull job and its return value. */
+    observeJob(job, result) {
+        if (!result || !job.processedOn || !job.finishedOn) return;
+        if (Array.isArray(result.tasks)) {
+            // Expert crew: one sample per executed task
+            for (const task of result.tasks) {
+                if (task.status !== 'completed' || !task.started_at || !task.finished_at) continue;
+                // Continued from a checkpoint: only part of the generation was timed
+                if (task.resumed_chars) continue;
+                const slotWait = (task.telemetry && task.telemetry.slot_wait_ms) || 0;
+                const ms = Date.parse(task.finished_at) - Date.parse(task.started_at) - slotWait;
+                this.observeRole(task.agent, task.model_used, ms);
+            }
+            return;
+        }
+        if (!result.task_type || !result.model_used) return;
+        // An escalated cascade ran on two models; its time belongs to neither
+        if (result.cascade && result.cascade.escalated) return;
+        // A resumed job's time covers only the part generated after the restart
+        if (result.recovery && result.recovery.resumes.length > 0) return;
+        const slotWait = (result.telemetry && result.telemetry.slot_wait_ms) || 0;
+        const inputTokens = result.routing ? result.routing.input_tokens : 0;
+        this.observeTask(result.task_type, result.model_used, inputTokens,
+            job.finishedOn - job.processedOn - slotWait);
+    }
+
+    /** Expected service time of a generation; { ms, basis, samples }. */
+    estimateTask(taskType, model, inputTokens = 0, priorMs) {
+        return this._predict([`task:${taskType}|${model}`, `task:${taskType}`], inputTokens, priorMs);
+    }
+
+    /** Expected duration of an expert crew task done by role. */
+    estimateRole(role, model, priorMs) {
+        return this._predict([`role:${role}|${model}`, `role:${role}`], 0, priorMs);
+    }
+
+    /**
+     * Estimate a crew plan: each task from its role (prior: its static
+     * max_time), and the total by simulating the executor's schedule with
+     * parallel tasks at a time.
+     */
+    estimatePlan(config, parallel = 1) {
+        const tasks = config.tasks || [];
+        const estimates = tasks.map(task => {
+            const model = (task.context_variables || []).includes('all_outputs')
+                ? config.manager_llm : config.agent_llm;
+            return { id: task.id, agent: task.agent, ...this.estimateRole(task.agent, model, task.max_time * 1000) };
+        });
+        const durations = new Map(estimates.map(e => [e.id, e.ms]));
+        return {
+            total_ms: planDuration(tasks, durations, parallel),
+            sequential_ms: estimates.reduce((sum, e) => sum + e.ms, 0),
+            learned: estimates.filter(e => e.basis !== 'prior').length,
+            tasks: estimates
+        };
+    }
+
+    /** Seed the model from completed jobs when nothing has been learned yet. */
+    train(jobs) {
+        if (this.observations > 0) return 0;
+        for (const job of jobs) this.observeJob(job, job.returnvalue);
+        return this.observations;
+    }
+
+    getStats() {
+        const keys = {};
+        for (const [key, s] of this.stats) {
+            keys[key] = { samples: +s.n.toFixed(1), mean_ms: Math.round(s.sy / s.n) };
+        }
+        return { observations: this.observations, min_samples: MIN_SAMPLES, keys };
+    }
+
+    load() {
+        if (!this.path) return this;
+        try {
+            const state = fs.readJsonSync(this.path);
+            this.stats = new Map(Object.entries(state.stats || {}));
+            this.observations = state.observations || 0;
+        } catch (error) {
+            if (error.code !== 'ENOENT') console.warn(`⚠️  Could not load duration model: ${error.message}`);
+        }
+        return this;
+    }
+
+    save() {
+        if (!this.path || !this.dirty) return;
+        try {
+            fs.ensureDirSync(path.dirname(this.path));
+            fs.writeJsonSync(this.path, {
+                observations: this.observations,
+                stats: Object.fromEntries(this.stats)
+            });
+            this.dirty = false;
+        } catch (error) {
+            console.warn(`⚠️  Could not save duration model: ${error.message}`);
+        }
+    }
+
+    start(intervalMs = 60000) {
+        this.timer = setInterval(() => this.save(), intervalMs);
+        this.timer.unref();
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.save();
+    }
+}
+
+/**
+ * Makespan of a task graph when ready tasks start in plan order, at most
+ * `parallel` at a time, as crew-executor.js runs them.
+ */
+function planDuration(tasks, durations, parallel = 1) {
+    const finish = new Map();
+    const running = []; // { id, end }
+    const pending = [...tasks];
+    let now = 0;
+
+    while (pending.length > 0 || running.length > 0) {
+        const ready = pending.filter(task => (task.dependencies || []).every(dep => finish.has(dep)));
+        while (running.length < parallel && ready.length > 0) {
+            const task = ready.shift();
+            pending.splice(pending.indexOf(task), 1);
+            running.push({ id: task.id, end: now + (durations.get(task.id) || 0) });
+        }
+        if (running.length === 0) break; // Unsatisfiable dependencies
+        running.sort((a, b) => a.end - b.end);
+        const done = running.shift();
+        now = done.end;
+        finish.set(done.id, now);
+    }
+    return now;
+}
+
+module.exports = { DurationEstimator, planDuration };
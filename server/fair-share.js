@@ -0,0 +1,301 @@
+/**
+ * Fair Share Module
+ *
+ * Without admission control one client's 500-file batch fills a lane and
+ * everyone else waits behind it. This module gives every caller an
+ * identity and shares each lane between identities:
+ *
+ *   ClientRegistry - callers are identified by their X-API-Key header
+ *     (named and weighted in CLIENTS_FILE; unknown keys get a name derived
+ *     from a hash of the key, no key is "anonymous"). Each client has a
+ *     token bucket limiting how many jobs per minute it may submit; a
+ *     submission over the limit gets 429 with Retry-After. Per-client
+ *     usage is reported in /api/stats.
+ *
+ *   FairQueue - start-time fair queueing over Bull priorities. Each job
+ *     gets a virtual start tag: max(lane's virtual time, the client's
+ *     previous finish tag), and the client's finish tag advances by
+ *     SCALE / weight. Bull dequeues by tag, so clients with work waiting
+ *     are served in proportion to their weights however much each has
+ *     queued, while each client's own jobs keep their order.
+ *
+ * Priorities are one model everywhere: 'high', 'normal' or 'low'. Integers
+ * from older clients map by sign (> 0 high, 0 normal, < 0 low). A priority
+ * class is a band of Bull priorities, so high always dequeues before
+ * normal, and fair sharing applies within a band.
+ */
+
+const crypto = require('crypto');
+const fs = require('fs-extra');
+
+const PRIORITIES = ['high', 'normal', 'low'];
+
+// Bull priorities are 1 (first) .. 2^21; each class gets one band of them
+const BAND_SIZE = 500000;
+// Tag units per job at weight 1; divisible by common weights so tags stay integers
+const SCALE = 12;
+
+/** 'high' | 'normal' | 'low' for a submitted priority, or null if it isn't one. */
+function normalizePriority(value) {
+    if (value === undefined || value === null || value === '') return 'normal';
+    if (typeof value === 'string') {
+        const name = value.trim().toLowerCase();
+        if (PRIORITIES.includes(name)) return name;
+        if (!/^-?\d+$/.test(name)) return null;
+        value = parseInt(name, 10);
+    }
+    if (typeof value !== 'number' || Number.isNaN(value)) return null;
+    return value > 0 ? 'high' : value < 0 ? 'low' : 'normal';
+}
+
+class TokenBucket {
+    /**
+     * @param {Object} options
+     * @param {number} options.ratePerMin - Tokens added per minute
+     * @param {number} options.burst - Bucket size
+     */
+    constructor({ ratePerMin, burst }) {
+        this.ratePerMin = ratePerMin;
+        this.burst = Math.max(1, burst);
+        this.tokens = this.burst;
+        this.updated = Date.now();
+    }
+
+    _refill() {
+        const now = Date.now();
+        this.tokens = Math.min(this.burst, this.tokens + (now - this.updated) * this.ratePerMin / 60000);
+        this.updated = now;
+    }
+
+    /**
+     * Take n tokens. Succeeds whenever at least one token is available and
+     * may leave the bucket in debt, so a batch larger than the burst is
+     * admitted once and then paid back before the next submission.
+     * @returns {Object} { ok, retryAfterMs }
+     */
+    take(n = 1) {
+        this._refill();
+        if (this.tokens < 1) {
+            return { ok: false, retryAfterMs: Math.ceil((1 - this.tokens) * 60000 / this.ratePerMin) };
+        }
+        this.tokens -= n;
+        return { ok: true, retryAfterMs: 0 };
+    }
+
+    /** Wait until a token is available, then take it. */
+    async acquire() {
+        for (;;) {
+            const { ok, retryAfterMs } = this.take(1);
+            if (ok) return;
+            await new Promise(resolve => setTimeout(resolve, retryAfterMs));
+        }
+    }
+
+    available() {
+        this._refill();
+        return Math.floor(this.tokens * 10) / 10;
+    }
+}
+
+class ClientRegistry {
+    /**
+     * @param {Object} options
+     * @param {Object} options.clients - API key => { name, weight, rpm, burst }
+     * @param {Object} options.defaults - { weight, rpm, burst } for everyone else
+     */
+    constructor({ clients = {}, defaults = {} } = {}) {
+        this.keys = clients;
+        // Settings by client name too, since jobs only carry the name
+        this.named = Object.fromEntries(Object.values(clients).filter(c => c.name).map(c => [c.name, c]));
+        this.defaults = { weight: 1, rpm: 120, burst: 600, ...defaults };
+        this.clients = new Map(); // name -> { name, weight, bucket, usage }
+    }
+
+    /** Registry configured from CLIENTS_FILE and the CLIENT_* defaults. */
+    static fromEnv(env = process.env) {
+        const clients = env.CLIENTS_FILE && fs.pathExistsSync(env.CLIENTS_FILE)
+            ? fs.readJsonSync(env.CLIENTS_FILE)
+            : {};
+        const num = (name, fallback) => (env[name] ? parseFloat(env[name]) : fallback);
+        return new ClientRegistry({
+            clients,
+            defaults: {
+                weight: num('CLIENT_DEFAULT_WEIGHT', 1),
+                rpm: num('CLIENT_RATE_PER_MIN', 120),
+                burst: num('CLIENT_BURST', 600)
+            }
+        });
+    }
+
+    /** Client name for an API key; raw keys never appear in stats. */
+    nameFor(apiKey) {
+        if (!apiKey) return 'anonymous';
+        const known = this.keys[apiKey];
+        if (known && known.name) return known.name;
+        return `key-${crypto.createHash('sha256').update(apiKey).digest('hex').slice(0, 8)}`;
+    }
+
+    get(name) {
+        let client = this.clients.get(name);
+        if (!client) {
+            const config = { ...this.defaults, ...this.named[name] };
+            client = {
+                name,
+                weight: Math.max(0.1, config.weight),
+                bucket: new TokenBucket({ ratePerMin: config.rpm, burst: config.burst }),
+                usage: { submitted: 0, rate_limited: 0, started: 0, completed: 0, failed: 0, tokens_generated: 0, processing_ms: 0 }
+            };
+            this.clients.set(name, client);
+        }
+        return client;
+    }
+
+    identify(req) {
+        return this.get(this.nameFor(req.get('X-API-Key')));
+    }
+
+    weightOf(name) {
+        return this.get(name).weight;
+    }
+
+    /**
+     * Express middleware for job-submitting routes: identifies the caller
+     * (req.client), validates priorities and charges cost(req) tokens.
+     */
+    admit(cost = () => 1) {
+        return (req, res, next) => {
+            if (req.method !== 'POST') return next();
+            const body = req.body && typeof req.body === 'object' ? req.body : {};
+            const priorities = Array.isArray(body.tasks) ? body.tasks.map(t => (t || {}).priority) : [body.priority];
+            const invalid = priorities.find(p => normalizePriority(p) === null);
+            if (invalid !== undefined) {
+                return res.status(400).json({ error: `Invalid priority ${JSON.stringify(invalid)}; use ${PRIORITIES.join(', ')}` });
+            }
+
+            const client = this.identify(req);
+            const n = cost(req);
+            const { ok, retryAfterMs } = client.bucket.take(n);
+            if (!ok) {
+                client.usage.rate_limited += n;
+                res.set('Retry-After', String(Math.ceil(retryAfterMs / 1000)));
+                return res.status(429).json({
+                    error: `Rate limit exceeded for client ${client.name}`,
+                    client: client.name,
+                    retry_after_ms: retryAfterMs
+                });
+            }
+            client.usage.submitted += n;
+            req.client = client.name;
+            next();
+        };
+    }
+
+    recordStart(name) {
+        this.get(name || 'anonymous').usage.started++;
+    }
+
+    recordFinish(name, job, result, failed = false) {
+        const usage = this.get(name || 'anonymous').usage;
+        usage[failed ? 'failed' : 'completed']++;
+        if (job.processedOn && job.finishedOn) usage.processing_ms += job.finishedOn - job.processedOn;
+        if (result && typeof result === 'object') usage.tokens_generated += result.tokens_generated || 0;
+    }
+
+    getStats(queued = {}) {
+        const stats = {};
+        for (const client of this.clients.values()) {
+            stats[client.name] = {
+                weight: client.weight,
+                rate: { per_min: client.bucket.ratePerMin, burst: client.bucket.burst, available: client.bucket.available() },
+                queued: queued[client.name] || {},
+                ...client.usage
+            };
+        }
+        return stats;
+    }
+}
+
+class FairQueue {
+    /**
+     * @param {Object} options
+     * @param {Function} options.weightOf - client name => weight
+     */
+    constructor({ weightOf = () => 1 } = {}) {
+        this.weightOf = weightOf;
+        this.lanes = new Map(); // lane -> { virtual, finish: Map(client -> tag), queued: Map(client -> n) }
+    }
+
+    _lane(name) {
+        if (!this.lanes.has(name)) {
+            this.lanes.set(name, { virtual: 0, finish: new Map(), queued: new Map() });
+        }
+        return this.lanes.get(name);
+    }
+
+    /** Start a new busy period; called when a lane has nothing waiting. */
+    reset(laneName) {
+        this.lanes.set(laneName, { virtual: 0, finish: new Map(), queued: new Map() });
+    }
+
+    /** Bull priority for a new job of client in laneName. */
+    assign(laneName, client, priority) {
+        const lane = this._lane(laneName);
+        const band = PRIORITIES.indexOf(normalizePriority(priority) || 'normal');
+        const start = Math.max(lane.virtual, lane.finish.get(client) || 0);
+        lane.finish.set(client, start + Math.max(1, Math.round(SCALE / this.weightOf(client))));
+        lane.queued.set(client, (lane.queued.get(client) || 0) + 1);
+        // Past the band's end tags degrade to FIFO within the band
+        return band * BAND_SIZE + 1 + Math.min(start, BAND_SIZE - 1);
+    }
+
+    /** A job left the waiting list: virtual time moves up to its start tag. */
+    started(laneName, job) {
+        const lane = this._lane(laneName);
+        const tag = ((job.opts.priority || 1) - 1) % BAND_SIZE;
+        lane.virtual = Math.max(lane.virtual, tag);
+        this._dequeued(lane, job);
+    }
+
+    /** A job was removed; if it never started it is no longer queued. */
+    removed(laneName, job) {
+        if (!job.processedOn) this._dequeued(this._lane(laneName), job);
+    }
+
+    _dequeued(lane, job) {
+        const client = job.data.client || 'anonymous';
+        if (lane.queued.get(client) > 1) {
+            lane.queued.set(client, lane.queued.get(client) - 1);
+        } else {
+            lane.queued.delete(client);
+        }
+    }
+
+    /** Rebuild tags and counts from the jobs waiting in a lane (after a restart). */
+    restore(laneName, waitingJobs) {
+        this.reset(laneName);
+        const lane = this._lane(laneName);
+        let virtual = Infinity;
+        for (const job of waitingJobs.filter(Boolean)) {
+            const client = job.data.client || 'anonymous';
+            const tag = ((job.opts.priority || 1) - 1) % BAND_SIZE;
+            virtual = Math.min(virtual, tag);
+            const finish = tag + Math.max(1, Math.round(SCALE / this.weightOf(client)));
+            lane.finish.set(client, Math.max(lane.finish.get(client) || 0, finish));
+            lane.queued.set(client, (lane.queued.get(client) || 0) + 1);
+        }
+        lane.virtual = Number.isFinite(virtual) ? virtual : 0;
+    }
+
+    /** { client: { lane: waiting jobs } } */
+    queuedByClient() {
+        const out = {};
+        for (const [laneName, lane] of this.lanes) {
+            for (const [client, n] of lane.queued) {
+                out[client] = { ...out[client], [laneName]: n };
+            }
+        }
+        return out;
+    }
+}
+
+module.exports = { ClientRegistry, FairQueue, TokenBucket, normalizePriority, PRIORITIES };
@@ -0,0 +1,173 @@
+/**
+ * Job Events Module
+ *
+ * Streams Bull job lifecycle events (progress, completed, failed) to clients
+ * as server-sent events, so waiters get pushed completions instead of polling
+ * /api/job/:id on a fixed interval.
+ *
+ *   GET /api/jobs/events?ids=12,13,14   - events for a set of jobs
+ *   GET /api/job/:id/events             - events for a single job
+ *
+ * Add include=result to receive each job's return value in its
+ * "completed" event, which saves batch waiters a status request per job.
+ * Results are passed through options.resolveResult first, so blob
+ * references (blob-store.js) arrive as their content.
+ *
+ * Each client receives a snapshot of the current state of its jobs on
+ * connect, so a job that finished before the stream opened is not missed.
+ */
+
+const HEARTBEAT_INTERVAL = 15000; // Keeps proxies and client read timeouts happy
+const TERMINAL_STATES = ['completed', 'failed'];
+
+/**
+ * @param {Object} app - Express app
+ * @param {Object} devQueue - Queue or LaneSet
+ * @param {Object} options
+ * @param {Function} options.resolveResult - async result => result sent to include=result streams
+ */
+function addJobEventEndpoints(app, devQueue, { resolveResult = async result => result } = {}) {
+    // job id -> Set of subscriber objects
+    const subscribers = new Map();
+
+    function publish(jobId, event, data, result) {
+        const subs = subscribers.get(String(jobId));
+        if (!subs) return;
+
+        for (const sub of subs) {
+            sub.send(event, sub.includeResult && result !== undefined ? { ...data, result } : data);
+            if (TERMINAL_STATES.includes(event)) {
+                sub.finish(jobId);
+            }
+        }
+    }
+
+    // Global events fire for jobs processed by any worker on this queue
+    devQueue.on('global:progress', (jobId, progress) => {
+        publish(jobId, 'progress', { job_id: String(jobId), progress });
+    });
+
+    devQueue.on('global:completed', async (jobId, result) => {
+        // Global events carry the return value serialized
+        let parsed = result;
+        try {
+            parsed = JSON.parse(result);
+        } catch (e) {
+            // Keep raw value
+        }
+        // Result only goes to streams that asked for it; others fetch /api/job/:id
+        const subs = subscribers.get(String(jobId));
+        if (subs && [...subs].some(sub => sub.includeResult)) {
+            parsed = await resolveResult(parsed);
+        }
+        publish(jobId, 'completed', { job_id: String(jobId), state: 'completed' }, parsed);
+    });
+
+    devQueue.on('global:failed', (jobId, failedReason) => {
+        publish(jobId, 'failed', { job_id: String(jobId), state: 'failed', failedReason });
+    });
+
+    async function streamJobs(req, res, jobIds) {
+        const includeResult = req.query.include === 'result';
+
+        if (jobIds.length === 0) {
+            return res.status(400).json({ error: 'At least one job id is required' });
+        }
+
+        res.set({
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        });
+        res.flushHeaders();
+
+        const pending = new Set(jobIds);
+        const sub = {
+            includeResult,
+            send(event, data) {
+                if (res.writableEnded) return;
+                res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+            },
+            finish(jobId) {
+                pending.delete(String(jobId));
+                if (pending.size === 0 && !res.writableEnded) {
+                    res.write('event: end\ndata: {}\n\n');
+                    res.end();
+                }
+            }
+        };
+
+        const heartbeat = setInterval(() => {
+            if (!res.writableEnded) res.write(': heartbeat\n\n');
+        }, HEARTBEAT_INTERVAL);
+        const cleanup = () => {
+            clearInterval(heartbeat);
+            for (const id of jobIds) {
+                const subs = subscribers.get(id);
+                if (subs) {
+                    subs.delete(sub);
+                    if (subs.size === 0) subscribers.delete(id);
+                }
+            }
+        };
+        res.on('close', cleanup);
+
+        // Subscribe before reading state so no transition slips through the gap
+        for (const id of jobIds) {
+            if (!subscribers.has(id)) subscribers.set(id, new Set());
+            subscribers.get(id).add(sub);
+        }
+
+        for (const id of jobIds) {
+            if (!pending.has(id)) continue; // Already finished via a live event
+            const job = await devQueue.getJob(id);
+            if (!job) {
+                sub.send('missing', { job_id: id, error: 'Job not found' });
+                sub.finish(id);
+                continue;
+            }
+
+            const state = await job.getState();
+            if (!pending.has(id)) continue;
+            if (state === 'completed') {
+                const data = { job_id: id, state };
+                if (includeResult) data.result = await resolveResult(job.returnvalue);
+                sub.send('completed', data);
+                sub.finish(id);
+            } else if (state === 'failed') {
+                sub.send('failed', { job_id: id, state, failedReason: job.failedReason });
+                sub.finish(id);
+            } else {
+                sub.send('state', { job_id: id, state, progress: job.progress() });
+            }
+        }
+    }
+
+    app.get('/api/jobs/events', (req, res) => {
+        const ids = String(req.query.ids || '')
+            .split(',')
+            .map(id => id.trim())
+            .filter(Boolean);
+
+        streamJobs(req, res, [...new Set(ids)]).catch(error => {
+            if (!res.headersSent) {
+                res.status(500).json({ error: error.message });
+            } else {
+                res.end();
+            }
+        });
+    });
+
+    app.get('/api/job/:id/events', (req, res) => {
+        streamJobs(req, res, [String(req.params.id)]).catch(error => {
+            if (!res.headersSent) {
+                res.status(500).json({ error: error.message });
+            } else {
+                res.end();
+            }
+        });
+    });
+}
+
+module.exports = { addJobEventEndpoints };
@@ -0,0 +1,349 @@
+/**
+ * Workload Lanes Module
+ *
+ * Every workload class gets its own Bull queue, its own processor
+ * concurrency and its own reserved share of Ollama's parallel slots, which
+ * all lanes draw from as one pool (SlotPool). A 16k-token crew
+ * simulation then occupies the agent lane only, and quick dev-tasks keep
+ * flowing through the interactive lane:
+ *
+ *   interactive - single dev-tasks from editors and the CLI
+ *   batch       - /api/dev-tasks/batch and bulk file analysis
+ *   agent       - execute-crew / execute-autogen simulations
+ *
+ * Interactive jobs stay on the original "Development Tasks" queue with plain
+ * ids, so existing job ids and clients keep working. Jobs in the other lanes
+ * get ids prefixed with the lane name ("batch-…", "agent-…"), so an id alone
+ * says which queue holds the job.
+ *
+ * LaneSet offers getJob/on/add like a single Bull queue, so modules written
+ * against one queue (job events, crew endpoints) work across all lanes.
+ *
+ * With a FairQueue (fair-share.js) every job added to a lane gets its Bull
+ * priority from its data.client and data.priority, so clients share each
+ * lane by weight instead of in submission order.
+ */
+
+const crypto = require('crypto');
+const Queue = require('bull');
+const { createDevTaskSubmitter } = require('./coalescing');
+const { ModelScheduler, SlotPool } = require('./model-scheduler');
+
+const LANE_NAMES = ['interactive', 'batch', 'agent'];
+const AGENT_JOBS = ['execute-crew', 'execute-autogen', 'expert-crew', 'expert-crew-advanced'];
+const WAIT_SAMPLES = 200; // Recent queue waits kept per lane for stats
+// Most agent calls an expert crew makes at once (execution_strategy.parallel_tasks for high priority)
+const MAX_CREW_PARALLEL = 4;
+
+function envInt(name, fallback) {
+    const value = parseInt(process.env[name], 10);
+    return Number.isNaN(value) ? fallback : value;
+}
+
+/**
+ * Lane settings from the environment:
+ *   LANE_TOTAL_SLOTS        - Ollama generations all lanes together run at once
+ *   LANE_<NAME>_CONCURRENCY - jobs Bull hands to the lane's processor at once
+ *   LANE_<NAME>_SLOTS       - Most of the total one lane may use
+ *   LANE_<NAME>_RESERVED    - Slots of the total held for the lane alone
+ *   LANE_AGENT_ATTEMPTS     - Runs of an agent job; retries resume from its checkpoint
+ *   LANE_AGENT_RETRY_DELAY_MS - First retry delay (doubling), long enough for Ollama to restart
+ *   LANE_AGENT_MAX_STALLED  - Server restarts an agent job may be recovered from
+ * The lanes share one pool of OLLAMA_NUM_PARALLEL slots per Ollama backend,
+ * so together they never send Ollama more than it runs at once. When there
+ * are at least as many slots as lanes, each lane has one reserved, so a crew
+ * can't hold every slot while dev-tasks wait. Batch work may use half of the
+ * slots; an expert crew runs independent tasks in parallel, up to
+ * MAX_CREW_PARALLEL of them.
+ */
+function laneConfigFromEnv() {
+    const parallel = envInt('OLLAMA_NUM_PARALLEL', 1);
+    const backends = (process.env.OLLAMA_BACKENDS || 'http://localhost:11434').split(',').filter(url => url.trim()).length;
+    const totalSlots = envInt('LANE_TOTAL_SLOTS', parallel * backends);
+    const reserved = totalSlots >= LANE_NAMES.length ? 1 : 0;
+    const lookahead = envInt('DEV_TASK_LOOKAHEAD', 8);
+    return {
+        totalSlots,
+        interactive: {
+            queueName: 'Development Tasks',
+            concurrency: envInt('LANE_INTERACTIVE_CONCURRENCY', lookahead),
+            slots: envInt('LANE_INTERACTIVE_SLOTS', totalSlots),
+            reserved: envInt('LANE_INTERACTIVE_RESERVED', reserved)
+        },
+        batch: {
+            queueName: 'Development Tasks (batch)',
+            concurrency: envInt('LANE_BATCH_CONCURRENCY', lookahead),
+            slots: envInt('LANE_BATCH_SLOTS', Math.max(1, Math.floor(totalSlots / 2))),
+            reserved: envInt('LANE_BATCH_RESERVED', reserved)
+        },
+        agent: {
+            queueName: 'Development Tasks (agent)',
+            // Agent jobs are long; the slots are for one expert crew's parallel tasks
+            concurrency: envInt('LANE_AGENT_CONCURRENCY', 1),
+            slots: envInt('LANE_AGENT_SLOTS', Math.max(1, Math.min(MAX_CREW_PARALLEL, totalSlots))),
+            reserved: envInt('LANE_AGENT_RESERVED', reserved),
+            // Agent jobs checkpoint as they go (checkpoints.js), so running them again is cheap
+            jobOptions: {
+                attempts: envInt('LANE_AGENT_ATTEMPTS', 3),
+                backoff: { type: 'exponential', delay: envInt('LANE_AGENT_RETRY_DELAY_MS', 30000) }
+            },
+            maxStalledCount: envInt('LANE_AGENT_MAX_STALLED', 5)
+        }
+    };
+}
+
+class Lane {
+    constructor(name, { queueName, concurrency, slots, reserved = 0, jobOptions = {}, maxStalledCount }, { redis, defaultJobOptions, maxWaitMs, keepAliveFor, windowMs, policy, prepareDevTask, fairShare, pool }) {
+        this.name = name;
+        this.concurrency = concurrency;
+        this.slots = slots;
+        this.reserved = reserved;
+        this.idPrefix = name === 'interactive' ? '' : `${name}-`;
+        this.queue = new Queue(queueName, {
+            redis,
+            defaultJobOptions: { ...defaultJobOptions, ...jobOptions },
+            // A job that was active when the server stopped is run again, this many times
+            ...(maxStalledCount !== undefined ? { settings: { maxStalledCount } } : {})
+        });
+        this.scheduler = new ModelScheduler({ slots, maxWaitMs, keepAliveFor, policy, pool, reserved });
+        this.fairShare = fairShare;
+        this.addDevTasks = createDevTaskSubmitter(this.queue, {
+            windowMs,
+            idPrefix: this.idPrefix,
+            prepare: prepareDevTask,
+            priorityFor: fairShare ? task => this.priorityFor(task) : null
+        });
+        if (fairShare) {
+            this.queue.on('active', job => fairShare.started(name, job));
+            this.queue.on('removed', job => fairShare.removed(name, job));
+        }
+        this.submitting = Promise.resolve();
+        this.waits = [];
+        this.started = 0;
+    }
+
+    /** Bull priority for new job data: its priority class, fair-shared by client. */
+    priorityFor(data) {
+        return this.fairShare.assign(this.name, data.client || 'anonymous', data.priority);
+    }
+
+    /**
+     * Run fn, which assigns fair-share tags and adds jobs, after earlier
+     * submissions to this lane; an empty lane first starts a new fair-share
+     * period. Serialized, so one submission can't find the lane empty and
+     * reset tags another has assigned but not yet added.
+     */
+    submit(fn) {
+        if (!this.fairShare) return fn();
+        const run = this.submitting.then(async () => {
+            if (await this.queue.getWaitingCount() === 0) this.fairShare.reset(this.name);
+            return fn();
+        });
+        this.submitting = run.catch(() => {});
+        return run;
+    }
+
+    /** Called when a job starts processing; records how long it queued. */
+    recordStart(job) {
+        const wait = (job.processedOn || Date.now()) - job.timestamp;
+        this.waits.push(wait);
+        if (this.waits.length > WAIT_SAMPLES) this.waits.shift();
+        this.started++;
+    }
+
+    /** Job id for a new job in this lane; interactive jobs keep Bull's own ids. */
+    jobId() {
+        return this.idPrefix ? `${this.idPrefix}${crypto.randomBytes(12).toString('hex')}` : undefined;
+    }
+
+    async getStats() {
+        const [waiting, active, delayed, waitingJobs] = await Promise.all([
+            this.queue.getWaitingCount(),
+            this.queue.getActiveCount(),
+            this.queue.getDelayedCount(),
+            this.queue.getWaiting(0, 199)
+        ]);
+        const now = Date.now();
+        const oldest = waitingJobs.reduce((min, job) => Math.min(min, job.timestamp), now);
+        const sorted = [...this.waits].sort((a, b) => a - b);
+
+        return {
+            queue: this.queue.name,
+            concurrency: this.concurrency,
+            slots: this.slots,
+            reserved: this.reserved,
+            depth: waiting + delayed,
+            active,
+            wait_ms: {
+                oldest_waiting: now - oldest,
+                recent_avg: sorted.length ? Math.round(sorted.reduce((a, b) => a + b, 0) / sorted.length) : 0,
+                recent_p95: sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * 0.95))] : 0,
+                samples: sorted.length
+            },
+            started: this.started,
+            scheduler: this.scheduler.getStats()
+        };
+    }
+}
+
+class LaneSet {
+    /**
+     * @param {Object} options
+     * @param {Object} options.redis - Bull redis options
+     * @param {Object} options.defaultJobOptions - Bull default job options for every lane
+     * @param {number} options.maxWaitMs - Scheduler aging limit
+     * @param {Function} options.keepAliveFor - model => keep_alive value
+     * @param {number} options.windowMs - Dev-task coalescing window
+     * @param {string} options.policy - Scheduler order: 'affinity' or 'sjf'
+     * @param {Function} options.prepareDevTask - async task => stored job data (see coalescing.js)
+     * @param {FairQueue} options.fairShare - Per-client fair sharing of each lane (optional)
+     * @param {Object} options.config - Lane settings (default laneConfigFromEnv())
+     */
+    constructor({ redis, defaultJobOptions, maxWaitMs, keepAliveFor, windowMs, policy, prepareDevTask, fairShare = null, config = laneConfigFromEnv() }) {
+        this.fairShare = fairShare;
+        // Without a total, every lane only has its own slots
+        this.pool = config.totalSlots ? new SlotPool(config.totalSlots) : null;
+        this.lanes = {};
+        for (const name of LANE_NAMES) {
+            this.lanes[name] = new Lane(name, config[name], { redis, defaultJobOptions, maxWaitMs, keepAliveFor, windowMs, policy, prepareDevTask, fairShare, pool: this.pool });
+        }
+    }
+
+    /** Rebuild fair-share state from the jobs still waiting (e.g. after a restart). */
+    async restoreFairShare() {
+        if (!this.fairShare) return;
+        await Promise.all(this.all().map(async lane => {
+            this.fairShare.restore(lane.name, await lane.queue.getWaiting(0, -1));
+        }));
+    }
+
+    all() {
+        return Object.values(this.lanes);
+    }
+
+    /** Generations the lanes can run at once, together. */
+    totalSlots() {
+        const laneSlots = this.all().reduce((sum, lane) => sum + lane.slots, 0);
+        return this.pool ? Math.min(this.pool.total, laneSlots) : laneSlots;
+    }
+
+    /** Slots held for single lanes; more than the pool leaves some lanes unable to run. */
+    reservedSlots() {
+        return this.all().reduce((sum, lane) => sum + lane.reserved, 0);
+    }
+
+    /** Lane for a new job: an explicit data.lane wins, then the job kind, then fallback. */
+    laneFor(name, data = {}, fallback = 'interactive') {
+        if (data.lane && this.lanes[data.lane]) return this.lanes[data.lane];
+        if (AGENT_JOBS.includes(name)) return this.lanes.agent;
+        if (data.task_type === 'batch-processing') return this.lanes.batch;
+        return this.lanes[fallback] || this.lanes.interactive;
+    }
+
+    laneForJobId(id) {
+        const prefixed = this.all().find(lane => lane.idPrefix && String(id).startsWith(lane.idPrefix));
+        return prefixed || this.lanes.interactive;
+    }
+
+    getJob(id) {
+        return this.laneForJobId(id).queue.getJob(id);
+    }
+
+    /** Register a queue event handler on every lane. */
+    on(event, handler) {
+        for (const lane of this.all()) lane.queue.on(event, handler);
+        return this;
+    }
+
+    async add(name, data, opts = {}) {
+        const lane = this.laneFor(name, data);
+        const jobId = opts.jobId || lane.jobId();
+        return lane.submit(() => lane.queue.add(name, data, {
+            ...opts,
+            ...(this.fairShare ? { priority: lane.priorityFor(data) } : {}),
+            ...(jobId ? { jobId } : {})
+        }));
+    }
+
+    /**
+     * Add dev-tasks with coalescing, each to its lane.
+     * Returns [{ job, coalesced, state }] in input order.
+     */
+    async addDevTasks(tasks, fallback = 'interactive') {
+        const groups = new Map(); // lane -> [{ index, task }]
+        tasks.forEach((task, index) => {
+            const lane = this.laneFor('dev-task', task, fallback);
+            if (!groups.has(lane)) groups.set(lane, []);
+            groups.get(lane).push({ index, task });
+        });
+
+        const results = new Array(tasks.length);
+        await Promise.all([...groups].map(async ([lane, entries]) => {
+            const added = await lane.submit(() => lane.addDevTasks(entries.map(e => e.task)));
+            entries.forEach((e, k) => { results[e.index] = added[k]; });
+        }));
+        return results;
+    }
+
+    /** Jobs of the given types from every lane, newest finished/started first. */
+    async getJobs(types, start = 0, end = 50) {
+        const perLane = await Promise.all(this.all().map(async lane => {
+            const jobs = await lane.queue.getJobs(types, start, end);
+            return jobs.filter(Boolean).map(job => Object.assign(job, { lane: lane.name }));
+        }));
+        return perLane.flat()
+            .sort((a, b) => (b.finishedOn || b.processedOn || b.timestamp) - (a.finishedOn || a.processedOn || a.timestamp))
+            .slice(0, end - start + 1);
+    }
+
+    async getCounts() {
+        const perLane = await Promise.all(this.all().map(lane => lane.queue.getJobCounts()));
+        const totals = { waiting: 0, active: 0, completed: 0, failed: 0, delayed: 0 };
+        for (const counts of perLane) {
+            for (const key of Object.keys(totals)) totals[key] += counts[key] || 0;
+        }
+        return totals;
+    }
+
+    async getStats() {
+        const stats = await Promise.all(this.all().map(lane => lane.getStats()));
+        return Object.fromEntries(this.all().map((lane, i) => [lane.name, stats[i]]));
+    }
+
+    // demand()/isIdle()/getStats() across lanes, so one ResidencyManager
+    // can treat all lane schedulers as a single scheduler
+
+    demand() {
+        const counts = new Map();
+        for (const lane of this.all()) {
+            for (const [model, count] of lane.scheduler.demand()) {
+                counts.set(model, (counts.get(model) || 0) + count);
+            }
+        }
+        return counts;
+    }
+
+    isIdle() {
+        return this.all().every(lane => lane.scheduler.isIdle());
+    }
+
+    schedulerStats() {
+        const totals = { dispatched: 0, model_switches: 0, aged_dispatches: 0, sjf_reorders: 0, reloads: 0, reload_time_ms: 0, slots: 0, waiting: 0, running: 0 };
+        for (const lane of this.all()) {
+            const stats = lane.scheduler.getStats();
+            for (const key of Object.keys(totals)) totals[key] += stats[key];
+        }
+        totals.slots = this.totalSlots();
+        return totals;
+    }
+
+    async clean(grace, state) {
+        await Promise.all(this.all().map(lane => lane.queue.clean(grace, state)));
+    }
+
+    async close() {
+        await Promise.all(this.all().map(lane => lane.queue.close()));
+    }
+}
+
+module.exports = { LaneSet, laneConfigFromEnv, LANE_NAMES };
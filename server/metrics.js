@@ -0,0 +1,195 @@
+/**
+ * Inference Metrics Module
+ *
+ * Turns the timing Ollama reports for every generation (load, prompt
+ * evaluation, generation, in nanoseconds) plus the time the generation
+ * waited for a slot into a telemetry record, and aggregates those records
+ * into histograms by task_type and model. A job can make several
+ * generations (cascade escalations, one per crew task), so jobs, their
+ * queue wait and generations are counted separately.
+ *
+ *   GET /api/metrics   - Prometheus text exposition format
+ *
+ * Kept dependency-free: the handful of histograms and counters needed here
+ * don't justify prom-client.
+ */
+
+const DURATION_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600];
+const THROUGHPUT_BUCKETS = [1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200];
+
+function labelString(labels) {
+    const parts = Object.entries(labels)
+        .map(([key, value]) => `${key}="${String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`);
+    return parts.length ? `{${parts.join(',')}}` : '';
+}
+
+class Histogram {
+    constructor(name, help, buckets) {
+        this.name = name;
+        this.help = help;
+        this.buckets = buckets;
+        this.series = new Map(); // label string -> { counts, sum, count }
+    }
+
+    observe(labels, value) {
+        if (value === undefined || value === null || Number.isNaN(value)) return;
+        const key = labelString(labels);
+        let series = this.series.get(key);
+        if (!series) {
+            series = { labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+            this.series.set(key, series);
+        }
+        this.buckets.forEach((bound, i) => {
+            if (value <= bound) series.counts[i]++;
+        });
+        series.sum += value;
+        series.count++;
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+        for (const { labels, counts, sum, count } of this.series.values()) {
+            this.buckets.forEach((bound, i) => {
+                lines.push(`${this.name}_bucket${labelString({ ...labels, le: bound })} ${counts[i]}`);
+            });
+            lines.push(`${this.name}_bucket${labelString({ ...labels, le: '+Inf' })} ${count}`);
+            lines.push(`${this.name}_sum${labelString(labels)} ${sum}`);
+            lines.push(`${this.name}_count${labelString(labels)} ${count}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+class Counter {
+    constructor(name, help) {
+        this.name = name;
+        this.help = help;
+        this.series = new Map();
+    }
+
+    inc(labels, value = 1) {
+        const key = labelString(labels);
+        const series = this.series.get(key) || { labels, value: 0 };
+        series.value += value;
+        this.series.set(key, series);
+    }
+
+    render() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+        for (const { labels, value } of this.series.values()) {
+            lines.push(`${this.name}${labelString(labels)} ${value}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+/**
+ * Telemetry for one generation from its Bull job, Ollama's response body and
+ * the times its generation slot was requested and granted. Durations are in
+ * milliseconds; queue_wait_ms is the job's, the same for each of its generations.
+ */
+function inferenceTelemetry(job, ollama = {}, slotGrantedAt = Date.now(), slotRequestedAt = job.processedOn) {
+    const ms = ns => (ns ? Math.round(ns / 1e6) : 0);
+    const startedAt = job.processedOn || slotGrantedAt;
+    const generationMs = ms(ollama.eval_duration);
+    const promptEvalMs = ms(ollama.prompt_eval_duration);
+    return {
+        queue_wait_ms: startedAt - job.timestamp,
+        slot_wait_ms: Math.max(0, slotGrantedAt - (slotRequestedAt || slotGrantedAt)),
+        load_ms: ms(ollama.load_duration),
+        prompt_eval_ms: promptEvalMs,
+        generation_ms: generationMs,
+        total_ms: ms(ollama.total_duration),
+        prompt_tokens: ollama.prompt_eval_count || 0,
+        tokens_generated: ollama.eval_count || 0,
+        tokens_per_sec: generationMs ? +((ollama.eval_count || 0) / (generationMs / 1000)).toFixed(2) : 0,
+        prompt_tokens_per_sec: promptEvalMs ? +((ollama.prompt_eval_count || 0) / (promptEvalMs / 1000)).toFixed(2) : 0
+    };
+}
+
+class InferenceMetrics {
+    constructor() {
+        this.histograms = {
+            queue_wait: new Histogram('cmini_job_queue_wait_seconds', 'Time a job waited in its queue before processing', DURATION_BUCKETS),
+            slot_wait: new Histogram('cmini_job_slot_wait_seconds', 'Time a generation waited for an Ollama generation slot', DURATION_BUCKETS),
+            load: new Histogram('cmini_model_load_seconds', 'Model load time reported by Ollama', DURATION_BUCKETS),
+            prompt_eval: new Histogram('cmini_prompt_eval_seconds', 'Prompt evaluation time reported by Ollama', DURATION_BUCKETS),
+            generation: new Histogram('cmini_generation_seconds', 'Token generation time reported by Ollama', DURATION_BUCKETS),
+            total: new Histogram('cmini_inference_seconds', 'Total Ollama request time', DURATION_BUCKETS),
+            throughput: new Histogram('cmini_generation_tokens_per_second', 'Generation throughput', THROUGHPUT_BUCKETS)
+        };
+        this.counters = {
+            jobs: new Counter('cmini_jobs_total', 'Jobs processed by outcome'),
+            generations: new Counter('cmini_generations_total', 'Ollama generations by outcome'),
+            prompt_tokens: new Counter('cmini_prompt_tokens_total', 'Prompt tokens evaluated'),
+            generated_tokens: new Counter('cmini_generated_tokens_total', 'Tokens generated')
+        };
+        this.gauges = []; // async () => [{ name, help, samples: [{ labels, value }] }]
+    }
+
+    /** Record a finished generation; telemetry comes from inferenceTelemetry(). */
+    record(taskType, model, telemetry) {
+        const labels = { task_type: taskType, model };
+        const h = this.histograms;
+        h.slot_wait.observe(labels, telemetry.slot_wait_ms / 1000);
+        h.load.observe(labels, telemetry.load_ms / 1000);
+        h.prompt_eval.observe(labels, telemetry.prompt_eval_ms / 1000);
+        h.generation.observe(labels, telemetry.generation_ms / 1000);
+        h.total.observe(labels, telemetry.total_ms / 1000);
+        if (telemetry.tokens_per_sec) h.throughput.observe(labels, telemetry.tokens_per_sec);
+
+        this.counters.generations.inc({ ...labels, status: 'completed' });
+        this.counters.prompt_tokens.inc(labels, telemetry.prompt_tokens);
+        this.counters.generated_tokens.inc(labels, telemetry.tokens_generated);
+    }
+
+    /** Record a generation that failed. */
+    recordFailure(taskType, model) {
+        this.counters.generations.inc({ task_type: taskType, model, status: 'failed' });
+    }
+
+    /** Record the time a job waited in its queue, once, when it first starts. */
+    recordQueueWait(taskType, model, waitMs) {
+        this.histograms.queue_wait.observe({ task_type: taskType, model }, Math.max(0, waitMs) / 1000);
+    }
+
+    /** Record a finished job, once, whatever it cost in generations. */
+    recordJob(taskType, model, status) {
+        this.counters.jobs.inc({ task_type: taskType, model, status });
+    }
+
+    /** Register a callback that reports point-in-time values at scrape time. */
+    addGauge(collect) {
+        this.gauges.push(collect);
+    }
+
+    async render() {
+        const blocks = [
+            ...Object.values(this.histograms).map(h => h.render()),
+            ...Object.values(this.counters).map(c => c.render())
+        ];
+        for (const collect of this.gauges) {
+            for (const { name, help, samples } of await collect()) {
+                blocks.push([
+                    `# HELP ${name} ${help}`,
+                    `# TYPE ${name} gauge`,
+                    ...samples.map(({ labels, value }) => `${name}${labelString(labels || {})} ${value}`)
+                ].join('\n'));
+            }
+        }
+        return blocks.join('\n') + '\n';
+    }
+}
+
+function addMetricsEndpoint(app, metrics) {
+    app.get('/api/metrics', async (req, res) => {
+        try {
+            res.set('Content-Type', 'text/plain; version=0.0.4');
+            res.send(await metrics.render());
+        } catch (error) {
+            res.status(500).json({ error: error.message });
+        }
+    });
+}
+
+module.exports = { InferenceMetrics, inferenceTelemetry, addMetricsEndpoint, Histogram, Counter };
@@ -0,0 +1,327 @@
+/**
+ * Model Scheduler Module
+ *
+ * Ollama swaps multi-GB weights whenever consecutive requests target
+ * different models, and interleaved queue order makes that happen on almost
+ * every job. Two pieces reduce the churn:
+ *
+ * ModelScheduler - every Ollama call goes through run(model, fn). Calls wait
+ *   for one of `slots` generation slots, and waiting calls for the model that
+ *   is already loaded go first. A call that has waited longer than
+ *   maxWaitMs is served next regardless of model (aging), so no model starves.
+ *   With policy 'sjf', waiting calls are instead served shortest expected
+ *   job first: each call's expected duration plus a model-switch penalty,
+ *   minus the time it has already waited, so long jobs still move up.
+ *
+ * SlotPool - Ollama's parallel slots shared by several ModelSchedulers (one
+ *   per lane). A scheduler dispatches only while both its own slots and the
+ *   pool have room; slots reserved for another scheduler that isn't using
+ *   them are held back, so each one always gets its minimum.
+ *
+ * ResidencyManager - looks at what is queued and keeps the models with
+ *   pending work resident via keep_alive, preloads the most demanded model
+ *   when the scheduler is idle, and lets unneeded models expire.
+ *
+ * Reloads are detected from Ollama's load_duration and counted per model,
+ * together with the time lost to them.
+ */
+
+const axios = require('axios');
+
+// A load_duration above this means weights were (re)loaded, not just warm-started
+const RELOAD_THRESHOLD_NS = 1e9;
+
+// SJF cost of switching to a model with no recorded reloads yet
+const DEFAULT_SWITCH_PENALTY_MS = 15000;
+
+class ModelScheduler {
+    constructor({ slots = 1, maxWaitMs = 120000, keepAliveFor = () => undefined, policy = 'affinity', pool = null, reserved = 0 } = {}) {
+        this.slots = slots;
+        this.maxWaitMs = maxWaitMs;
+        this.keepAliveFor = keepAliveFor;
+        this.policy = policy;
+        this.pool = pool;
+        if (pool) pool.join(this, reserved);
+        this.waiting = []; // FIFO of { model, enqueuedAt, expectedMs, resolve }
+        this.running = new Map(); // model -> running count
+        this.currentModel = null;
+        this.stats = {
+            dispatched: 0,
+            model_switches: 0,
+            aged_dispatches: 0,
+            sjf_reorders: 0,
+            reloads: 0,
+            reload_time_ms: 0,
+            by_model: {}
+        };
+    }
+
+    /**
+     * Run fn once a generation slot is granted for model.
+     * fn receives the keep_alive value to send to Ollama and should return
+     * the axios response, whose load_duration is recorded. expectedMs is
+     * the call's estimated duration, used by the 'sjf' policy.
+     */
+    async run(model, fn, { expectedMs } = {}) {
+        await new Promise(resolve => {
+            this.waiting.push({ model, enqueuedAt: Date.now(), expectedMs, resolve });
+            this._dispatch();
+        });
+
+        try {
+            const response = await fn(this.keepAliveFor(model));
+            this.recordLoad(model, response && response.data && response.data.load_duration);
+            return response;
+        } finally {
+            this.running.set(model, this.running.get(model) - 1);
+            if (this.running.get(model) === 0) this.running.delete(model);
+            if (this.pool) {
+                this.pool.release(this);
+            } else {
+                this._dispatch();
+            }
+        }
+    }
+
+    recordLoad(model, loadDurationNs) {
+        const entry = this._modelStats(model);
+        if (loadDurationNs && loadDurationNs > RELOAD_THRESHOLD_NS) {
+            const ms = loadDurationNs / 1e6;
+            this.stats.reloads++;
+            this.stats.reload_time_ms += ms;
+            entry.reloads++;
+            entry.reload_time_ms += ms;
+        }
+    }
+
+    /** Models with calls waiting or running in this process, with counts. */
+    demand() {
+        const counts = new Map(this.running);
+        for (const w of this.waiting) {
+            counts.set(w.model, (counts.get(w.model) || 0) + 1);
+        }
+        return counts;
+    }
+
+    isIdle() {
+        return this.waiting.length === 0 && this.running.size === 0;
+    }
+
+    getStats() {
+        const now = Date.now();
+        return {
+            ...this.stats,
+            slots: this.slots,
+            policy: this.policy,
+            max_wait_ms: this.maxWaitMs,
+            current_model: this.currentModel,
+            waiting: this.waiting.length,
+            running: [...this.running.values()].reduce((a, b) => a + b, 0),
+            oldest_wait_ms: this.waiting.length ? now - this.waiting[0].enqueuedAt : 0
+        };
+    }
+
+    _modelStats(model) {
+        if (!this.stats.by_model[model]) {
+            this.stats.by_model[model] = { dispatched: 0, reloads: 0, reload_time_ms: 0 };
+        }
+        return this.stats.by_model[model];
+    }
+
+    _next() {
+        // Aging: the oldest call wins once it has waited too long
+        if (Date.now() - this.waiting[0].enqueuedAt >= this.maxWaitMs) {
+            if (this.waiting[0].model !== this.currentModel) this.stats.aged_dispatches++;
+            return 0;
+        }
+        if (this.policy === 'sjf') return this._shortest();
+        // Affinity: stay on a model that is loaded or already running
+        const affine = this.waiting.findIndex(w => w.model === this.currentModel || this.running.has(w.model));
+        return affine >= 0 ? affine : 0;
+    }
+
+    _switchPenalty(model) {
+        if (model === this.currentModel || this.running.has(model)) return 0;
+        const entry = this.stats.by_model[model];
+        return entry && entry.reloads ? entry.reload_time_ms / entry.reloads : DEFAULT_SWITCH_PENALTY_MS;
+    }
+
+    _shortest() {
+        // Calls without an estimate rank as the average of those with one
+        const known = this.waiting.filter(w => w.expectedMs !== undefined && w.expectedMs !== null);
+        const fallback = known.length ? known.reduce((sum, w) => sum + w.expectedMs, 0) / known.length : 0;
+        const now = Date.now();
+
+        let best = 0;
+        let bestCost = Infinity;
+        this.waiting.forEach((w, i) => {
+            const expected = w.expectedMs !== undefined && w.expectedMs !== null ? w.expectedMs : fallback;
+            // Every ms waited offsets one ms of expected duration
+            const cost = expected + this._switchPenalty(w.model) - (now - w.enqueuedAt);
+            if (cost < bestCost) {
+                best = i;
+                bestCost = cost;
+            }
+        });
+        if (best !== 0) this.stats.sjf_reorders++;
+        return best;
+    }
+
+    _dispatch() {
+        let busy = [...this.running.values()].reduce((a, b) => a + b, 0);
+        while (busy < this.slots && this.waiting.length > 0 && (!this.pool || this.pool.tryAcquire(this))) {
+            const [next] = this.waiting.splice(this._next(), 1);
+            if (next.model !== this.currentModel) {
+                if (this.currentModel) this.stats.model_switches++;
+                this.currentModel = next.model;
+            }
+            this.running.set(next.model, (this.running.get(next.model) || 0) + 1);
+            this.stats.dispatched++;
+            this._modelStats(next.model).dispatched++;
+            busy++;
+            next.resolve();
+        }
+    }
+}
+
+class SlotPool {
+    constructor(total) {
+        this.total = total;
+        this.members = []; // { scheduler, reserved }
+        this.used = new Map(); // scheduler -> slots in use
+    }
+
+    join(scheduler, reserved = 0) {
+        this.members.push({ scheduler, reserved });
+        this.used.set(scheduler, 0);
+    }
+
+    /** Take a slot for scheduler if one is free beyond other members' unused reservations. */
+    tryAcquire(scheduler) {
+        let free = this.total;
+        let heldBack = 0;
+        for (const { scheduler: member, reserved } of this.members) {
+            const used = this.used.get(member);
+            free -= used;
+            if (member !== scheduler) heldBack += Math.max(0, reserved - used);
+        }
+        if (free - heldBack <= 0) return false;
+        this.used.set(scheduler, this.used.get(scheduler) + 1);
+        return true;
+    }
+
+    /** Return scheduler's slot; the other members get the first chance to use it. */
+    release(scheduler) {
+        this.used.set(scheduler, this.used.get(scheduler) - 1);
+        const from = this.members.findIndex(m => m.scheduler === scheduler);
+        for (let k = 1; k <= this.members.length; k++) {
+            this.members[(from + k) % this.members.length].scheduler._dispatch();
+        }
+    }
+
+    getStats() {
+        const inUse = [...this.used.values()].reduce((a, b) => a + b, 0);
+        return { total: this.total, in_use: inUse };
+    }
+}
+
+class ResidencyManager {
+    constructor({
+        ollamaUrl = 'http://localhost:11434',
+        scheduler,
+        getQueuedModels = async () => new Map(),
+        numCtxFor = () => undefined,
+        pinKeepAlive = '30m',
+        idleKeepAlive = '5m',
+        intervalMs = 30000
+    } = {}) {
+        this.ollamaUrl = ollamaUrl;
+        this.scheduler = scheduler;
+        this.getQueuedModels = getQueuedModels;
+        this.numCtxFor = numCtxFor;
+        this.pinKeepAlive = pinKeepAlive;
+        this.idleKeepAlive = idleKeepAlive;
+        this.intervalMs = intervalMs;
+        this.queued = new Map();
+        this.pinned = new Set();
+        this.loaded = [];
+        this.stats = { preloads: 0, unpins: 0, last_tick: null, last_error: null };
+    }
+
+    /** keep_alive for a request: pinned while more work for the model is pending. */
+    keepAliveFor(model) {
+        const pending = (this.queued.get(model) || 0) +
+            (this.scheduler ? (this.scheduler.demand().get(model) || 0) : 0);
+        return pending > 1 ? this.pinKeepAlive : this.idleKeepAlive;
+    }
+
+    async tick() {
+        try {
+            this.queued = await this.getQueuedModels();
+            const demand = new Map(this.queued);
+            for (const [model, count] of this.scheduler.demand()) {
+                demand.set(model, (demand.get(model) || 0) + count);
+            }
+
+            const ps = await axios.get(`${this.ollamaUrl}/api/ps`, { timeout: 5000 });
+            this.loaded = (ps.data.models || []).map(m => m.name);
+
+            // Preload only when idle; loading now would evict a model mid-generation
+            const [top] = [...demand.entries()].sort((a, b) => b[1] - a[1]);
+            if (top && this.scheduler.isIdle() && !this.loaded.includes(top[0])) {
+                await this._setKeepAlive(top[0], this.pinKeepAlive);
+                this.pinned.add(top[0]);
+                this.stats.preloads++;
+            }
+
+            for (const model of [...this.pinned]) {
+                if (!demand.get(model)) {
+                    await this._setKeepAlive(model, this.idleKeepAlive);
+                    this.pinned.delete(model);
+                    this.stats.unpins++;
+                }
+            }
+            for (const [model, count] of demand) {
+                if (count > 0 && this.loaded.includes(model)) this.pinned.add(model);
+            }
+
+            this.stats.last_tick = new Date().toISOString();
+            this.stats.last_error = null;
+        } catch (error) {
+            this.stats.last_error = error.message;
+        }
+    }
+
+    start() {
+        this.tick();
+        this.timer = setInterval(() => this.tick(), this.intervalMs);
+        this.timer.unref();
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+    }
+
+    getStats() {
+        return {
+            ...this.stats,
+            loaded: this.loaded,
+            pinned: [...this.pinned],
+            queued: Object.fromEntries(this.queued)
+        };
+    }
+
+    _setKeepAlive(model, keepAlive) {
+        // A generate call without a prompt loads the model (if needed) and sets its keep_alive.
+        // It carries the num_ctx generations use; a different one would reload the model
+        const numCtx = this.numCtxFor(model);
+        return axios.post(`${this.ollamaUrl}/api/generate`, {
+            model,
+            keep_alive: keepAlive,
+            ...(numCtx ? { options: { num_ctx: numCtx } } : {})
+        }, { timeout: 0 });
+    }
+}
+
+module.exports = { ModelScheduler, SlotPool, ResidencyManager, RELOAD_THRESHOLD_NS };
@@ -0,0 +1,190 @@
+/**
+ * Ollama Pool Module
+ *
+ * Generations can be spread over several Ollama hosts (the Mini plus, say,
+ * a desktop GPU box) listed in OLLAMA_BACKENDS. Each backend's installed
+ * models are read from /api/tags periodically, and every request goes to:
+ *
+ *   1. a healthy backend that has the model, with the fewest requests in flight
+ *   2. failing that, any healthy backend (Ollama pulls nothing on its own, so
+ *      this surfaces a clear "model not found" rather than a hang)
+ *   3. failing that, any backend at all
+ *
+ * A backend that refuses the connection is marked unhealthy until its next
+ * successful /api/tags check, and the request moves on to the next
+ * candidate. Timeouts, resets and HTTP errors are not retried elsewhere: the
+ * generation may already be running, or would fail the same way.
+ *
+ * The first backend is the primary; residency management (/api/ps
+ * preloading) only looks at it.
+ */
+
+const axios = require('axios');
+
+// Errors raised before a connection existed, so the request never reached Ollama.
+// ECONNRESET is not one: a reset can come after Ollama accepted the generation
+const CONNECT_ERRORS = new Set(['ECONNREFUSED', 'EHOSTUNREACH', 'ENETUNREACH', 'ENOTFOUND', 'EAI_AGAIN']);
+const TAGS_TIMEOUT_MS = 3000;
+
+/** Ollama treats "name" and "name:latest" as the same model. */
+function normalizeModel(name) {
+    return name.includes(':') ? name : `${name}:latest`;
+}
+
+/** Count a streamed response as outstanding until it finishes, however it finishes. */
+function releaseOnClose(stream, backend) {
+    let released = false;
+    const release = () => {
+        if (released) return;
+        released = true;
+        backend.outstanding--;
+    };
+    stream.once('end', release);
+    stream.once('error', release);
+    stream.once('close', release);
+}
+
+class OllamaPool {
+    /**
+     * @param {Object} options
+     * @param {string[]} options.backends - Base URLs, primary first
+     * @param {number} options.refreshMs - Interval between /api/tags checks
+     */
+    constructor({ backends = ['http://localhost:11434'], refreshMs = 30000 } = {}) {
+        if (backends.length === 0) throw new Error('OllamaPool needs at least one backend');
+        this.refreshMs = refreshMs;
+        this.backends = backends.map(url => ({
+            url: url.replace(/\/+$/, ''),
+            models: null, // Unknown until the first refresh
+            healthy: true,
+            outstanding: 0,
+            requests: 0,
+            failures: 0,
+            last_error: null,
+            last_checked: null
+        }));
+    }
+
+    get primary() {
+        return this.backends[0].url;
+    }
+
+    async _check(backend) {
+        try {
+            const response = await axios.get(`${backend.url}/api/tags`, { timeout: TAGS_TIMEOUT_MS });
+            backend.models = new Set((response.data.models || []).map(m => normalizeModel(m.name)));
+            backend.healthy = true;
+        } catch (error) {
+            backend.healthy = false;
+            backend.last_error = error.message;
+        }
+        backend.last_checked = Date.now();
+    }
+
+    /** Re-read every backend's installed models. */
+    async refresh() {
+        await Promise.all(this.backends.map(backend => this._check(backend)));
+        return this.getStats();
+    }
+
+    /** Backends in the order a request for model should try them. */
+    candidates(model, exclude = new Set()) {
+        const wanted = model ? normalizeModel(model) : null;
+        const rank = backend => [
+            backend.healthy ? 0 : 1,
+            // Unknown model lists (never refreshed) may still have it
+            !wanted || !backend.models || backend.models.has(wanted) ? 0 : 1,
+            backend.outstanding,
+            backend.requests
+        ];
+        return this.backends
+            .filter(backend => !exclude.has(backend))
+            .map((backend, index) => ({ backend, key: [...rank(backend), index] }))
+            .sort((a, b) => {
+                for (let i = 0; i < a.key.length; i++) {
+                    if (a.key[i] !== b.key[i]) return a.key[i] - b.key[i];
+                }
+                return 0;
+            })
+            .map(({ backend }) => backend);
+    }
+
+    /** Base URL a request for model would be sent to now. */
+    pick(model) {
+        return this.candidates(model)[0].url;
+    }
+
+    /**
+     * POST to the best backend for body.model, moving on to the next one
+     * when a backend can't be reached. With responseType 'stream' the
+     * request stays outstanding until the stream ends or is destroyed.
+     */
+    async post(path, body, config = {}) {
+        const tried = new Set();
+        let lastError;
+        while (tried.size < this.backends.length) {
+            const backend = this.candidates(body.model, tried)[0];
+            tried.add(backend);
+            backend.outstanding++;
+            backend.requests++;
+            let streaming = false;
+            try {
+                const response = await axios.post(`${backend.url}${path}`, body, config);
+                response.backend = backend.url;
+                if (config.responseType === 'stream' && response.data && typeof response.data.once === 'function') {
+                    streaming = true;
+                    releaseOnClose(response.data, backend);
+                }
+                return response;
+            } catch (error) {
+                lastError = error;
+                backend.failures++;
+                backend.last_error = error.message;
+                if (!CONNECT_ERRORS.has(error.code)) throw error;
+                backend.healthy = false;
+                console.warn(`⚠️  Ollama backend ${backend.url} unreachable (${error.code}); trying the next one`);
+            } finally {
+                if (!streaming) backend.outstanding--;
+            }
+        }
+        throw lastError;
+    }
+
+    generate(body, config) {
+        return this.post('/api/generate', body, config);
+    }
+
+    /** Every model installed on at least one healthy backend. */
+    installedModels() {
+        const models = new Set();
+        for (const backend of this.backends) {
+            if (backend.healthy && backend.models) backend.models.forEach(m => models.add(m));
+        }
+        return [...models];
+    }
+
+    /** True if model is installed on a healthy backend. */
+    hasModel(model) {
+        return this.installedModels().includes(normalizeModel(model));
+    }
+
+    start() {
+        this.refresh().catch(() => {});
+        this.timer = setInterval(() => this.refresh().catch(() => {}), this.refreshMs);
+        this.timer.unref();
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+    }
+
+    getStats() {
+        return this.backends.map(({ models, ...backend }) => ({
+            ...backend,
+            models: models ? [...models] : null
+        }));
+    }
+}
+
+module.exports = { OllamaPool, normalizeModel };
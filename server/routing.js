@@ -0,0 +1,143 @@
+/**
+ * Model Routing Module
+ *
+ * Sizes every generation request from its prompt instead of sending the
+ * same model and num_predict for every input:
+ *   - estimates the prompt's token count
+ *   - picks the task type's fast model when the input is small enough for
+ *     it (per-task-type policy), otherwise the configured model
+ *   - derives an output budget (num_predict) from the input size
+ *   - sends each model's fixed num_ctx, so long inputs aren't silently
+ *     truncated to Ollama's default context, and clamps the output to fit
+ *
+ * num_ctx is one value per model (its window, capped at MAX_NUM_CTX, or a
+ * configured override), never sized per request: Ollama reloads a model
+ * whenever num_ctx changes, so a per-request value would reload it between
+ * requests of different sizes.
+ */
+
+// Code tokenizes denser than prose; matches the client's chunking estimate
+const CHARS_PER_TOKEN = 3;
+
+const CONTEXT_WINDOWS = {
+    'qwen2.5-coder:32b-instruct-q4_K_M': 32768,
+    'qwen2.5-coder:14b-instruct-q4_K_M': 32768,
+    'llama3.2:3b': 131072
+};
+const DEFAULT_CONTEXT_WINDOW = 8192;
+
+// Larger windows cost KV-cache memory on every load, whatever the prompt size
+const MAX_NUM_CTX = 32768;
+const CONTEXT_MARGIN = 256; // Template/tokenizer slack on top of the estimate
+const DEFAULT_OUTPUT = { ratio: 1, min: 1024, max: 8192 };
+
+function estimateTokens(text) {
+    return Math.ceil((text || '').length / CHARS_PER_TOKEN);
+}
+
+class ModelRouter {
+    /**
+     * @param {Object} options
+     * @param {Object} options.models - task_type -> default model (DEV_MODELS)
+     * @param {Object} options.policy - task_type -> { fast, fastMaxInputTokens, output: { ratio, min, max } }
+     * @param {boolean} options.enabled - false keeps every task on its default model
+     * @param {Object} options.numCtx - model -> num_ctx, overriding the window-based default
+     * @param {Function} options.templateFor - task_type => prompt template, for modelFor()'s estimate
+     */
+    constructor({ models, policy = {}, enabled = true, contextWindows = CONTEXT_WINDOWS, numCtx = {}, templateFor = () => '' }) {
+        this.models = models;
+        this.policy = policy;
+        this.enabled = enabled;
+        this.contextWindows = contextWindows;
+        this.numCtx = numCtx;
+        this.templateFor = templateFor;
+        this.stats = { routed: 0, fast: 0, clamped: 0, over_window: 0 };
+    }
+
+    contextWindow(model) {
+        return this.contextWindows[model] || DEFAULT_CONTEXT_WINDOW;
+    }
+
+    /** num_ctx every request to the model is sent with. */
+    numCtxFor(model) {
+        return this.numCtx[model] || Math.min(this.contextWindow(model), MAX_NUM_CTX);
+    }
+
+    /**
+     * Model a dev-task would be routed to, from its job data; for queue-level
+     * bookkeeping. Estimates the prompt decide() will see (template + content +
+     * context, or custom_prompt), so both pick the same model. Fields may be
+     * blob references (blob-store.js), whose size stands in for the text.
+     */
+    modelFor(taskType, { content = '', context = '', custom_prompt: customPrompt = null } = {}) {
+        const length = text => (text && typeof text === 'object' ? text.bytes || 0 : (text || '').length);
+        const chars = customPrompt
+            ? length(customPrompt)
+            : length(this.templateFor(taskType).replace('{code}', '').replace('{context}', '')) +
+                length(content) + length(context);
+        return this._route(taskType, Math.ceil(chars / CHARS_PER_TOKEN)).model;
+    }
+
+    _route(taskType, inputTokens) {
+        const policy = this.policy[taskType] || {};
+        if (this.enabled && policy.fast && inputTokens <= policy.fastMaxInputTokens) {
+            return { model: policy.fast, reason: `input ${inputTokens} <= ${policy.fastMaxInputTokens} tokens`, fast: true };
+        }
+        return { model: this.models[taskType] || this.models['code-analysis'], reason: 'task type default' };
+    }
+
+    /**
+     * Routing decision for one request.
+     *
+     * @param {string} taskType
+     * @param {string} prompt - Full prompt as sent to Ollama
+     * @param {Object} options
+     * @param {string} options.model - Pinned model (sessions, agent jobs); skips model routing
+     * @param {string} options.tier - Model chosen by the caller (cascade tier); skips model routing
+     * @param {number} options.maxTokens - Explicit output budget from the submitter
+     * @param {number} options.contextTokens - Tokens already in a carried session context
+     */
+    decide(taskType, prompt, { model: pinned, tier, maxTokens, contextTokens = 0 } = {}) {
+        const policy = this.policy[taskType] || {};
+        const output = { ...DEFAULT_OUTPUT, ...(policy.output || {}) };
+        const inputTokens = estimateTokens(prompt) + contextTokens;
+
+        let model = pinned || tier;
+        let reason = pinned ? 'pinned model' : 'cascade tier';
+        if (!model) {
+            const route = this._route(taskType, inputTokens);
+            ({ model, reason } = route);
+            if (route.fast) this.stats.fast++;
+        }
+
+        const numCtx = this.numCtxFor(model);
+        let numPredict = maxTokens ||
+            Math.round(Math.min(output.max, Math.max(output.min, inputTokens * output.ratio)));
+
+        // Keep prompt + output inside the model's num_ctx
+        const room = numCtx - inputTokens - CONTEXT_MARGIN;
+        const overWindow = room < 256;
+        if (numPredict > room) {
+            numPredict = Math.max(256, room);
+            this.stats.clamped++;
+        }
+        if (overWindow) this.stats.over_window++;
+
+        this.stats.routed++;
+        return {
+            model,
+            reason,
+            input_tokens: inputTokens,
+            num_ctx: numCtx,
+            num_predict: numPredict,
+            // Ollama drops the start of prompts longer than num_ctx
+            truncated: overWindow
+        };
+    }
+
+    getStats() {
+        return { ...this.stats, enabled: this.enabled };
+    }
+}
+
+module.exports = { ModelRouter, estimateTokens, CONTEXT_WINDOWS, MAX_NUM_CTX };
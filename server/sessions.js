@@ -0,0 +1,285 @@
+/**
+ * Conversation Sessions Module
+ *
+ * A session pins one model and carries Ollama's `context` (the token state
+ * /api/generate returns) from one dev-task to the next. Follow-up tasks on
+ * the same code refer back to it instead of re-sending it, and Ollama
+ * continues from tokens it has already evaluated, so prompt evaluation for
+ * the code is paid once per session rather than on every call.
+ *
+ *   POST   /api/sessions             - open { model?, task_type?, keep_alive? }
+ *   GET    /api/sessions             - list open sessions
+ *   GET    /api/sessions/:id         - session info
+ *   POST   /api/sessions/:id/tasks   - queue a turn { task_type, content?, context? }
+ *   DELETE /api/sessions/:id         - close
+ *
+ * Sessions live in this process's memory and expire after idleMs without
+ * a turn. Turns of one session run one at a time, in the order they were
+ * submitted, whatever order the lane hands their jobs out in: a turn
+ * waits for the previous one to finish (or fail) before it starts, for at
+ * most idleMs.
+ */
+
+const crypto = require('crypto');
+
+// Stands in for the code when the session's context already contains it
+const CODE_REFERENCE = '[The code from earlier in this conversation]';
+
+class SessionStore {
+    constructor({ idleMs = 15 * 60 * 1000, maxSessions = 100, maxContextTokens = 24000, keepAlive = '30m' } = {}) {
+        this.idleMs = idleMs;
+        this.maxSessions = maxSessions;
+        this.maxContextTokens = maxContextTokens;
+        this.keepAlive = keepAlive;
+        this.sessions = new Map();
+        this.stats = { opened: 0, closed: 0, expired: 0, turns: 0, context_resets: 0, turn_wait_timeouts: 0 };
+    }
+
+    open({ model, keepAlive }) {
+        this.expire();
+        if (this.sessions.size >= this.maxSessions) {
+            throw new Error(`Too many open sessions (max ${this.maxSessions})`);
+        }
+        const session = {
+            id: `s-${crypto.randomBytes(12).toString('hex')}`,
+            model,
+            keepAlive: keepAlive || this.keepAlive,
+            context: null,      // Ollama token state after the last turn
+            code: null,         // Last full code sent, to re-send after a context reset
+            codeSubmitted: false, // A queued turn carries code, so later turns may omit it
+            turns: 0,
+            prompt_tokens: 0,
+            generated_tokens: 0,
+            created: Date.now(),
+            lastUsed: Date.now(),
+            submitted: 0,       // Turns queued so far; each job carries its number
+            finished: new Map() // Turn number -> { promise, resolve }, settled when it's done
+        };
+        this.sessions.set(session.id, session);
+        this.stats.opened++;
+        return session;
+    }
+
+    get(id) {
+        const session = this.sessions.get(id);
+        if (session && Date.now() - session.lastUsed > this.idleMs) {
+            this._remove(session, 'expired');
+            return null;
+        }
+        return session || null;
+    }
+
+    touch(session) {
+        session.lastUsed = Date.now();
+    }
+
+    close(id) {
+        const session = this.sessions.get(id);
+        if (!session) return false;
+        this._remove(session, 'closed');
+        return true;
+    }
+
+    /** Drop sessions idle for longer than idleMs. */
+    expire() {
+        const now = Date.now();
+        for (const session of this.sessions.values()) {
+            if (now - session.lastUsed > this.idleMs) this._remove(session, 'expired');
+        }
+    }
+
+    /** Register a turn being queued; returns its number within the session. */
+    queueTurn(session, content) {
+        if (content) session.codeSubmitted = true;
+        session.submitted++;
+        this.touch(session);
+        return session.submitted;
+    }
+
+    _finished(session, turn) {
+        let entry = session.finished.get(turn);
+        if (!entry) {
+            entry = {};
+            entry.promise = new Promise(resolve => { entry.resolve = resolve; });
+            session.finished.set(turn, entry);
+        }
+        return entry;
+    }
+
+    /** A queued turn that will never run (its job couldn't be added); later turns needn't wait for it. */
+    abandonTurn(session, turn) {
+        this._finished(session, turn).resolve(false);
+    }
+
+    /** Run fn for turn number `turn` once the session's previous turn has finished. */
+    async runTurn(session, turn, fn) {
+        if (turn > 1) {
+            let timer;
+            const gaveUp = new Promise(resolve => {
+                timer = setTimeout(() => resolve(true), this.idleMs);
+            });
+            // A turn whose job never runs (removed from the queue) mustn't block the rest forever
+            if (await Promise.race([this._finished(session, turn - 1).promise, gaveUp])) {
+                this.stats.turn_wait_timeouts++;
+            }
+            clearTimeout(timer);
+            session.finished.delete(turn - 1);
+        }
+        try {
+            return await fn();
+        } finally {
+            this.abandonTurn(session, turn);
+        }
+    }
+
+    /**
+     * Prompt and context for the next turn. The code is only included when
+     * the session's context doesn't already hold it.
+     */
+    prepareTurn(session, { task_type, content, context = '' }, templates) {
+        if (session.context && session.context.length > this.maxContextTokens) {
+            // Too close to the window; start over from the code alone
+            session.context = null;
+            this.stats.context_resets++;
+        }
+
+        let code;
+        if (content && content !== session.code) {
+            code = content;
+            session.code = content;
+        } else {
+            code = session.context ? CODE_REFERENCE : (session.code || '');
+        }
+
+        const template = templates[task_type] || templates['code-analysis'];
+        return {
+            prompt: template.replace('{code}', code).replace('{context}', context),
+            context: session.context || undefined
+        };
+    }
+
+    recordTurn(session, ollama) {
+        session.context = ollama.context || null;
+        session.turns++;
+        session.prompt_tokens += ollama.prompt_eval_count || 0;
+        session.generated_tokens += ollama.eval_count || 0;
+        session.lastUsed = Date.now();
+        this.stats.turns++;
+    }
+
+    describe(session) {
+        return {
+            session_id: session.id,
+            model: session.model,
+            keep_alive: session.keepAlive,
+            turns: session.turns,
+            context_tokens: session.context ? session.context.length : 0,
+            prompt_tokens: session.prompt_tokens,
+            generated_tokens: session.generated_tokens,
+            created: session.created,
+            idle_ms: Date.now() - session.lastUsed,
+            expires_in_ms: Math.max(0, this.idleMs - (Date.now() - session.lastUsed))
+        };
+    }
+
+    getStats() {
+        return { ...this.stats, open: this.sessions.size, idle_ms: this.idleMs };
+    }
+
+    start(intervalMs = 60000) {
+        this.timer = setInterval(() => this.expire(), intervalMs);
+        this.timer.unref();
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+    }
+
+    _remove(session, reason) {
+        this.sessions.delete(session.id);
+        this.stats[reason]++;
+    }
+}
+
+/**
+ * @param {Object} app - Express app
+ * @param {Object} options
+ * @param {SessionStore} options.store
+ * @param {Object} options.queue - Queue or LaneSet turns are added to
+ * @param {Function} options.modelFor - task_type => default model
+ */
+function addSessionEndpoints(app, { store, queue, modelFor }) {
+    app.post('/api/sessions', (req, res) => {
+        try {
+            const { model, task_type, keep_alive } = req.body || {};
+            const session = store.open({ model: model || modelFor(task_type), keepAlive: keep_alive });
+            res.json({ success: true, ...store.describe(session), idle_timeout_ms: store.idleMs });
+        } catch (error) {
+            res.status(429).json({ error: error.message });
+        }
+    });
+
+    app.get('/api/sessions', (req, res) => {
+        store.expire();
+        res.json({
+            sessions: [...store.sessions.values()].map(s => store.describe(s)),
+            stats: store.getStats()
+        });
+    });
+
+    app.get('/api/sessions/:id', (req, res) => {
+        const session = store.get(req.params.id);
+        if (!session) {
+            return res.status(404).json({ error: 'Session not found or expired' });
+        }
+        res.json(store.describe(session));
+    });
+
+    app.post('/api/sessions/:id/tasks', async (req, res) => {
+        let session;
+        let turn;
+        try {
+            session = store.get(req.params.id);
+            if (!session) {
+                return res.status(404).json({ error: 'Session not found or expired' });
+            }
+            const { task_type, content, context, temperature, max_tokens, priority } = req.body;
+            if (!task_type) {
+                return res.status(400).json({ error: 'task_type is required' });
+            }
+            if (!content && !session.codeSubmitted) {
+                return res.status(400).json({ error: 'content is required for the first turn' });
+            }
+
+            // A queued turn keeps the session alive until it runs
+            turn = store.queueTurn(session, content);
+            const job = await queue.add('dev-task', {
+                task_type,
+                content,
+                context: context || '',
+                temperature,
+                max_tokens,
+                session_id: session.id,
+                session_turn: turn,
+                lane: 'interactive',
+                priority,
+                client: req.client
+            });
+
+            res.json({ success: true, job_id: job.id, session_id: session.id });
+        } catch (error) {
+            if (turn) store.abandonTurn(session, turn);
+            res.status(500).json({ error: error.message });
+        }
+    });
+
+    app.delete('/api/sessions/:id', (req, res) => {
+        if (!store.close(req.params.id)) {
+            return res.status(404).json({ error: 'Session not found or expired' });
+        }
+        res.json({ success: true });
+    });
+}
+
+module.exports = { SessionStore, addSessionEndpoints, CODE_REFERENCE };
@@ -471,6 +471,19 @@ app.get('/downloads/claude_mini_expert.py', (req, res) => {
     }
 });
 
+// Serve the shared transport module both Python clients import
+app.get('/downloads/mini_transport.py', (req, res) => {
+    const transportPath = path.join(__dirname, 'client/mini_transport.py');
+    
+    if (fs.existsSync(transportPath)) {
+        res.setHeader('Content-Type', 'text/x-python');
+        res.setHeader('Content-Disposition', 'attachment; filename="mini_transport.py"');
+        res.sendFile(transportPath);
+    } else {
+        res.status(404).send('mini_transport.py not found');
+    }
+});
+
 // Serve CrewAI Expert documentation
 app.get('/docs/crewai-expert', (req, res) => {
     const docsPath = path.join(__dirname, 'CREWAI_EXPERT_GUIDE.md');
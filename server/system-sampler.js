@@ -0,0 +1,243 @@
+/**
+ * System Sampler Module
+ *
+ * Samples the Mini's resource usage in the background so saturation can be
+ * lined up against queue throughput over time, instead of computing one
+ * snapshot per request:
+ *
+ *   cpu          - % busy across all cores, from os.cpus() time deltas
+ *   mem          - % of memory in use
+ *   disk         - % of the root filesystem in use
+ *   ollama_cpu   - % CPU of Ollama and its runners (summed, 100 = one core)
+ *   ollama_rss   - GB resident in Ollama and its runners
+ *   queue_active / queue_waiting - jobs, from the server's gauge
+ *   completed    - jobs finished (per bucket, not averaged)
+ *
+ * Every sample is folded into fixed-size ring buffers at several
+ * resolutions (1s for 10 minutes, 1m for a day, 1h for 30 days), so memory
+ * use is constant and history reads never walk raw samples.
+ *
+ *   GET /api/system-stats/history?resolution=1m&points=120&fields=cpu,mem
+ */
+
+const os = require('os');
+const fs = require('fs');
+const { execFile } = require('child_process');
+const { promisify } = require('util');
+
+const execFileAsync = promisify(execFile);
+
+const RESOLUTIONS = {
+    '1s': { stepMs: 1000, capacity: 600 },
+    '1m': { stepMs: 60 * 1000, capacity: 1440 },
+    '1h': { stepMs: 60 * 60 * 1000, capacity: 720 }
+};
+
+// Fields that accumulate per bucket rather than average
+const SUM_FIELDS = new Set(['completed']);
+const FIELDS = ['cpu', 'mem', 'disk', 'ollama_cpu', 'ollama_rss', 'queue_active', 'queue_waiting', 'completed'];
+
+// Spawning ps/df is the expensive part; these change slowly anyway
+const PROCESS_INTERVAL_MS = 5000;
+const DISK_INTERVAL_MS = 60000;
+
+class Ring {
+    constructor(fields, stepMs, capacity) {
+        this.stepMs = stepMs;
+        this.capacity = capacity;
+        this.buckets = new Float64Array(capacity).fill(-1); // bucket number held by each slot
+        this.sums = {};
+        this.counts = {};
+        for (const field of fields) {
+            this.sums[field] = new Float64Array(capacity);
+            this.counts[field] = new Uint32Array(capacity);
+        }
+    }
+
+    add(time, values) {
+        const bucket = Math.floor(time / this.stepMs);
+        const slot = bucket % this.capacity;
+        if (this.buckets[slot] !== bucket) {
+            this.buckets[slot] = bucket;
+            for (const field in this.sums) {
+                this.sums[field][slot] = 0;
+                this.counts[field][slot] = 0;
+            }
+        }
+        for (const [field, value] of Object.entries(values)) {
+            if (value === null || value === undefined || !this.sums[field]) continue;
+            this.sums[field][slot] += value;
+            this.counts[field][slot]++;
+        }
+    }
+
+    /** The last `points` buckets up to now, oldest first; empty buckets are null. */
+    series(fields, points, now) {
+        points = Math.min(points, this.capacity);
+        const last = Math.floor(now / this.stepMs);
+        const first = last - points + 1;
+        const series = {};
+        for (const field of fields) {
+            const values = new Array(points);
+            for (let i = 0; i < points; i++) {
+                const bucket = first + i;
+                const slot = bucket % this.capacity;
+                const count = this.counts[field][slot];
+                if (this.buckets[slot] !== bucket || count === 0) {
+                    values[i] = SUM_FIELDS.has(field) && this.buckets[slot] === bucket ? 0 : null;
+                } else {
+                    const value = SUM_FIELDS.has(field) ? this.sums[field][slot] : this.sums[field][slot] / count;
+                    values[i] = Math.round(value * 10) / 10;
+                }
+            }
+            series[field] = values;
+        }
+        return { start: first * this.stepMs, step_ms: this.stepMs, series };
+    }
+}
+
+function cpuTimes() {
+    let idle = 0;
+    let total = 0;
+    for (const cpu of os.cpus()) {
+        for (const [kind, ms] of Object.entries(cpu.times)) {
+            total += ms;
+            if (kind === 'idle') idle += ms;
+        }
+    }
+    return { idle, total };
+}
+
+async function diskPercent(mount = '/') {
+    if (fs.promises.statfs) {
+        const s = await fs.promises.statfs(mount);
+        const used = s.blocks - s.bfree;
+        return (used / (used + s.bavail)) * 100; // As df reports it
+    }
+    const { stdout } = await execFileAsync('df', ['-k', mount]);
+    const parts = stdout.trim().split('\n').pop().split(/\s+/);
+    return (parseInt(parts[2], 10) / (parseInt(parts[2], 10) + parseInt(parts[3], 10))) * 100;
+}
+
+async function ollamaUsage() {
+    const { stdout } = await execFileAsync('ps', ['-axo', 'pcpu=,rss=,comm=']);
+    let cpu = 0;
+    let rssKb = 0;
+    let found = false;
+    for (const line of stdout.split('\n')) {
+        const match = line.trim().match(/^([\d.]+)\s+(\d+)\s+(.*)$/);
+        if (!match || !/ollama|llama-server/i.test(match[3])) continue;
+        cpu += parseFloat(match[1]);
+        rssKb += parseInt(match[2], 10);
+        found = true;
+    }
+    return found ? { ollama_cpu: cpu, ollama_rss: rssKb / (1024 ** 2) } : { ollama_cpu: 0, ollama_rss: 0 };
+}
+
+class SystemSampler {
+    /**
+     * @param {Object} options
+     * @param {number} options.intervalMs - Sample period
+     * @param {Function} options.getQueue - async () => { active, waiting }
+     */
+    constructor({ intervalMs = 1000, getQueue = null } = {}) {
+        this.intervalMs = intervalMs;
+        this.getQueue = getQueue;
+        this.rings = {};
+        for (const [name, { stepMs, capacity }] of Object.entries(RESOLUTIONS)) {
+            this.rings[name] = new Ring(FIELDS, stepMs, capacity);
+        }
+        this.lastCpu = cpuTimes();
+        this.slow = { disk: null, ollama_cpu: null, ollama_rss: null };
+        this.slowAt = { disk: 0, process: 0 };
+        this.completed = 0;
+        this.latest = null;
+        this.samples = 0;
+        this.sampling = false;
+    }
+
+    /** Count a finished job towards the current bucket. */
+    recordCompletion() {
+        this.completed++;
+    }
+
+    async _refreshSlow(now) {
+        if (now - this.slowAt.process >= PROCESS_INTERVAL_MS) {
+            this.slowAt.process = now;
+            Object.assign(this.slow, await ollamaUsage().catch(() => ({ ollama_cpu: null, ollama_rss: null })));
+        }
+        if (now - this.slowAt.disk >= DISK_INTERVAL_MS) {
+            this.slowAt.disk = now;
+            this.slow.disk = await diskPercent().catch(() => null);
+        }
+    }
+
+    async sample() {
+        if (this.sampling) return; // A slow ps/df call shouldn't stack samples
+        this.sampling = true;
+        try {
+            const now = Date.now();
+            const cpu = cpuTimes();
+            const total = cpu.total - this.lastCpu.total;
+            const busy = total > 0 ? (1 - (cpu.idle - this.lastCpu.idle) / total) * 100 : 0;
+            this.lastCpu = cpu;
+
+            await this._refreshSlow(now);
+            const queue = this.getQueue ? await this.getQueue().catch(() => null) : null;
+
+            const values = {
+                cpu: busy,
+                mem: (1 - os.freemem() / os.totalmem()) * 100,
+                ...this.slow,
+                queue_active: queue ? queue.active : null,
+                queue_waiting: queue ? queue.waiting : null,
+                completed: this.completed
+            };
+            this.completed = 0;
+            for (const ring of Object.values(this.rings)) ring.add(now, values);
+            this.latest = { time: now, ...values };
+            this.samples++;
+        } finally {
+            this.sampling = false;
+        }
+    }
+
+    /**
+     * Compact history: { resolution, cores, start, step_ms, fields, series: { field: [...] } }.
+     * Series are aligned to step_ms buckets, oldest first, null where nothing was sampled.
+     */
+    history(resolution = '1m', points = 60, fields = FIELDS) {
+        const ring = this.rings[resolution];
+        if (!ring) {
+            throw new Error(`Unknown resolution ${resolution}; use ${Object.keys(RESOLUTIONS).join(', ')}`);
+        }
+        const known = fields.filter(field => FIELDS.includes(field));
+        return { resolution, cores: os.cpus().length, fields: known, ...ring.series(known, points, Date.now()) };
+    }
+
+    start() {
+        this.timer = setInterval(() => {
+            this.sample().catch(error => console.warn(`⚠️  System sample failed: ${error.message}`));
+        }, this.intervalMs);
+        this.timer.unref();
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+    }
+}
+
+function addSystemHistoryEndpoint(app, sampler) {
+    app.get('/api/system-stats/history', (req, res) => {
+        try {
+            const fields = req.query.fields ? String(req.query.fields).split(',') : FIELDS;
+            const points = Math.max(1, parseInt(req.query.points || '60', 10) || 60);
+            res.json(sampler.history(req.query.resolution || '1m', points, fields));
+        } catch (error) {
+            res.status(400).json({ error: error.message });
+        }
+    });
+}
+
+module.exports = { SystemSampler, addSystemHistoryEndpoint, RESOLUTIONS, FIELDS };
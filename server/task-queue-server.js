@@ -1,7 +1,6 @@
 const express = require('express');
 const Redis = require('redis');
 const Queue = require('bull');
-const axios = require('axios');
 const cors = require('cors');
 const helmet = require('helmet');
 const morgan = require('morgan');
@@ -10,9 +9,26 @@ const fs = require('fs-extra');
 const path = require('path');
 const { v4: uuidv4 } = require('uuid');
 const { spawn } = require('child_process');
+const crypto = require('crypto');
+const os = require('os');
 
 // Import monitoring module
 const monitoring = require('./monitoring');
+const { addJobEventEndpoints } = require('./job-events');
+const { ResidencyManager } = require('./model-scheduler');
+const { LaneSet } = require('./lanes');
+const { InferenceMetrics, inferenceTelemetry, addMetricsEndpoint } = require('./metrics');
+const { SessionStore, addSessionEndpoints } = require('./sessions');
+const { ModelRouter } = require('./routing');
+const { addCrewExpertEndpoints } = require('./crew-expert-endpoint');
+const { runCrewPlan, buildTaskPrompt } = require('./crew-executor');
+const { DurationEstimator } = require('./estimator');
+const { BlobStore, addBlobEndpoints, project } = require('./blob-store');
+const { SystemSampler, addSystemHistoryEndpoint } = require('./system-sampler');
+const { validateOutput, CascadeStats } = require('./cascade');
+const { OllamaPool } = require('./ollama-pool');
+const { ClientRegistry, FairQueue, TokenBucket } = require('./fair-share');
+const { JobCheckpoint, generateResumable } = require('./checkpoints');
 
 const app = express();
 const port = 3001;
@@ -36,20 +52,8 @@ const redis = Redis.createClient({
     port: 6379,
 });
 
-// Development task queue - No timeout limits for long-running tasks
-const devQueue = new Queue('Development Tasks', {
-    redis: { host: 'localhost', port: 6379 },
-    defaultJobOptions: {
-        removeOnComplete: 100,  // Keep more completed jobs for reference
-        removeOnFail: 50,       // Keep failed jobs for debugging
-        attempts: 1,            // Don't retry automatically (let user decide)
-        timeout: undefined,     // NO TIMEOUT - tasks can run for days
-        backoff: {
-            type: 'exponential',
-            delay: 3000
-        }
-    }
-});
+// Identical dev-tasks share one job; completed results are reused for this long
+const COALESCE_WINDOW_MS = parseInt(process.env.COALESCE_WINDOW_MS || '600000', 10);
 
 // Development model configurations
 const DEV_MODELS = {
@@ -71,6 +75,195 @@ const DEV_MODELS = {
     'agent-coordination': 'qwen2.5-coder:32b-instruct-q4_K_M'
 };
 
+// Input-size routing: small inputs go to the task type's fast model, and
+// num_predict is sized from the input (ratio of input tokens, within min/max)
+const MODEL_14B = 'qwen2.5-coder:14b-instruct-q4_K_M';
+const ROUTING_POLICY = {
+    'code-analysis': { fast: MODEL_14B, fastMaxInputTokens: 1500, output: { ratio: 0.75, min: 1024, max: 4096 } },
+    'code-generation': { fast: MODEL_14B, fastMaxInputTokens: 400, output: { ratio: 8, min: 2048, max: 8192 } },
+    'code-refactor': { output: { ratio: 1.5, min: 1024, max: 8192 } },
+    'debugging': { fast: MODEL_14B, fastMaxInputTokens: 1000, output: { ratio: 1, min: 1024, max: 4096 } },
+    'documentation': { fast: MODEL_14B, fastMaxInputTokens: 2000, output: { ratio: 1.5, min: 1024, max: 6144 } },
+    'testing': { output: { ratio: 2, min: 2048, max: 8192 } },
+    'review': { fast: MODEL_14B, fastMaxInputTokens: 1500, output: { ratio: 0.75, min: 1024, max: 4096 } },
+    'crewai-crew': { output: { min: 16384, max: 16384 } },
+    'autogen-team': { output: { min: 16384, max: 16384 } }
+};
+// Each model is always sent the same num_ctx (a change reloads it); MODEL_NUM_CTX
+// overrides the window-based default, e.g. "qwen2.5-coder:32b-instruct-q4_K_M=16384"
+const MODEL_NUM_CTX = Object.fromEntries((process.env.MODEL_NUM_CTX || '').split(',')
+    .map(entry => entry.trim()).filter(Boolean)
+    .map(entry => {
+        const at = entry.lastIndexOf('=');
+        return [entry.slice(0, at).trim(), parseInt(entry.slice(at + 1), 10)];
+    }));
+const router = new ModelRouter({
+    models: DEV_MODELS,
+    policy: ROUTING_POLICY,
+    enabled: process.env.MODEL_ROUTING !== 'off',
+    numCtx: MODEL_NUM_CTX,
+    templateFor: taskType => DEV_PROMPTS[taskType] || DEV_PROMPTS['code-analysis']
+});
+
+// Cascade mode: answer on the first tier, escalate only when validation fails.
+// Opt in per task with `cascade: true`, or for whole task types with
+// CASCADE_TASK_TYPES (a task's `cascade: false` still opts out)
+const CASCADE_TIERS = [MODEL_14B, 'qwen2.5-coder:32b-instruct-q4_K_M'];
+const CASCADE_TASK_TYPES = new Set((process.env.CASCADE_TASK_TYPES || '').split(',').map(t => t.trim()).filter(Boolean));
+const cascadeStats = new CascadeStats();
+
+function usesCascade(data) {
+    if (data.session_id) return false; // Sessions stay on their pinned model
+    return data.cascade === undefined ? CASCADE_TASK_TYPES.has(data.task_type) : Boolean(data.cascade);
+}
+
+function modelForJob(job) {
+    if (job.name === 'execute-crew') return DEV_MODELS['crewai-crew'];
+    if (job.name === 'execute-autogen') return DEV_MODELS['autogen-team'];
+    if (job.name.startsWith('expert-crew')) return job.data.config.agent_llm || DEV_MODELS['agent-coordination'];
+    const session = job.data.session_id && sessions.get(job.data.session_id);
+    if (session) return session.model;
+    return usesCascade(job.data) ? CASCADE_TIERS[0] : router.modelFor(job.data.task_type, job.data);
+}
+
+// Ollama hosts generations are spread over; the first is the primary
+const ollama = new OllamaPool({
+    backends: (process.env.OLLAMA_BACKENDS || 'http://localhost:11434').split(',').map(url => url.trim()).filter(Boolean),
+    refreshMs: parseInt(process.env.OLLAMA_REFRESH_MS || '30000', 10)
+}).start();
+
+// Model-affinity scheduling: each lane's processor looks ahead at up to its
+// concurrency in jobs, and the lane's scheduler releases them to Ollama
+// grouped by model
+const residency = new ResidencyManager({
+    ollamaUrl: ollama.primary,
+    numCtxFor: model => router.numCtxFor(model),
+    getQueuedModels: async () => {
+        const waiting = (await Promise.all(lanes.all().map(lane => lane.queue.getWaiting(0, 199)))).flat();
+        const counts = new Map();
+        for (const job of waiting) {
+            const model = modelForJob(job);
+            counts.set(model, (counts.get(model) || 0) + 1);
+        }
+        return counts;
+    }
+});
+
+// Large job inputs and results live on disk, compressed and content-addressed;
+// Redis only holds references to them
+const blobs = new BlobStore({
+    dir: process.env.BLOB_STORE_DIR || path.join(os.homedir(), '.cmini', 'blobs'),
+    minBytes: parseInt(process.env.BLOB_MIN_BYTES || '16384', 10)
+});
+
+// Workload lanes (interactive / batch / agent) - No timeout limits for long-running tasks
+// Callers are identified by X-API-Key; each lane is shared between them by weight
+const clients = ClientRegistry.fromEnv();
+const fairShare = new FairQueue({ weightOf: name => clients.weightOf(name) });
+
+const lanes = new LaneSet({
+    redis: { host: 'localhost', port: 6379 },
+    defaultJobOptions: {
+        removeOnComplete: 100,  // Keep more completed jobs for reference
+        removeOnFail: 50,       // Keep failed jobs for debugging
+        attempts: 1,            // Don't retry automatically (let user decide)
+        timeout: undefined,     // NO TIMEOUT - tasks can run for days
+        backoff: {
+            type: 'exponential',
+            delay: 3000
+        }
+    },
+    maxWaitMs: parseInt(process.env.SCHEDULER_MAX_WAIT_MS || '120000', 10),
+    keepAliveFor: model => residency.keepAliveFor(model),
+    windowMs: COALESCE_WINDOW_MS,
+    // 'sjf' serves the shortest expected job first (with aging) within each lane's lookahead
+    policy: process.env.SCHEDULER_POLICY || 'affinity',
+    // Large content/context of new dev-tasks goes to the blob store
+    prepareDevTask: task => blobs.offload(task, 1),
+    fairShare
+});
+// Submissions wait for this (see app.listen): restoring resets each lane's tags
+const fairShareRestored = lanes.restoreFairShare()
+    .catch(error => console.warn(`⚠️  Could not restore fair-share state: ${error.message}`));
+lanes.on('active', job => clients.recordStart(job.data.client));
+lanes.on('completed', (job, result) => clients.recordFinish(job.data.client, job, result));
+lanes.on('failed', job => clients.recordFinish(job.data.client, job, null, true));
+residency.scheduler = lanes;
+residency.start();
+
+// Per-job inference telemetry, aggregated for /api/metrics
+const metrics = new InferenceMetrics();
+metrics.addGauge(async () => {
+    const stats = await lanes.getStats();
+    const samples = key => Object.entries(stats).map(([lane, s]) => ({ labels: { lane }, value: key(s) }));
+    return [
+        { name: 'cmini_lane_depth', help: 'Jobs waiting in each lane', samples: samples(s => s.depth) },
+        { name: 'cmini_lane_active', help: 'Jobs being processed in each lane', samples: samples(s => s.active) },
+        { name: 'cmini_lane_oldest_wait_seconds', help: 'Age of the oldest waiting job in each lane', samples: samples(s => s.wait_ms.oldest_waiting / 1000) }
+    ];
+});
+// Jobs are counted once when they finish; processors record each generation
+const JOB_TASK_TYPES = {
+    'execute-crew': 'crewai-crew',
+    'execute-autogen': 'autogen-team',
+    'expert-crew': 'expert-crew',
+    'expert-crew-advanced': 'expert-crew'
+};
+const jobTaskType = job => JOB_TASK_TYPES[job.name] || job.data.task_type || job.name;
+lanes.on('active', job => {
+    // Retries are active again; the queue wait is the first attempt's
+    if (job.attemptsMade === 0) {
+        metrics.recordQueueWait(jobTaskType(job), modelForJob(job), (job.processedOn || Date.now()) - job.timestamp);
+    }
+});
+lanes.on('completed', (job, result) => {
+    metrics.recordJob(jobTaskType(job), (result && result.model_used) || modelForJob(job), 'completed');
+});
+lanes.on('failed', job => {
+    // Bull reports every failed attempt; only the last one fails the job
+    if (job.attemptsMade >= (job.opts.attempts || 1)) {
+        metrics.recordJob(jobTaskType(job), modelForJob(job), 'failed');
+    }
+});
+
+// Job durations learned from completed jobs; feeds SJF scheduling and crew estimates
+const estimator = new DurationEstimator({
+    path: process.env.DURATION_MODEL_PATH || path.join(os.homedir(), '.cmini', 'duration-model.json')
+}).load().start();
+lanes.on('completed', (job, result) => estimator.observeJob(job, result));
+lanes.getJobs(['completed'], 0, 199)
+    .then(jobs => estimator.train(jobs))
+    .catch(error => console.warn(`⚠️  Could not train duration model from history: ${error.message}`));
+
+// Background resource sampling (1s/1m/1h history) next to queue depth and throughput
+const sampler = new SystemSampler({
+    getQueue: async () => {
+        const { active, waiting, delayed } = await lanes.getCounts();
+        return { active, waiting: waiting + delayed };
+    }
+}).start();
+lanes.on('completed', () => sampler.recordCompletion());
+
+// Conversation sessions: pinned model + Ollama context carried across turns
+const sessions = new SessionStore({
+    idleMs: parseInt(process.env.SESSION_IDLE_MS || '900000', 10),
+    maxSessions: parseInt(process.env.SESSION_MAX || '100', 10),
+    maxContextTokens: parseInt(process.env.SESSION_MAX_CONTEXT_TOKENS || '24000', 10),
+    keepAlive: process.env.SESSION_KEEP_ALIVE || '30m'
+}).start();
+
+const OLLAMA_NUM_PARALLEL = parseInt(process.env.OLLAMA_NUM_PARALLEL || '1', 10);
+// OLLAMA_NUM_PARALLEL is per host, so the pool as a whole takes that many per backend.
+// The lanes' shared slots default to exactly that; only explicit LANE_* settings get here
+if (lanes.totalSlots() > OLLAMA_NUM_PARALLEL * ollama.backends.length) {
+    console.warn(`⚠️  Lanes use ${lanes.totalSlots()} generation slots but OLLAMA_NUM_PARALLEL=${OLLAMA_NUM_PARALLEL} ` +
+        `across ${ollama.backends.length} Ollama backend(s); Ollama will queue the excess and lanes can still delay each other`);
+}
+if (lanes.pool && lanes.reservedSlots() > lanes.pool.total) {
+    console.warn(`⚠️  Lanes reserve ${lanes.reservedSlots()} of ${lanes.pool.total} generation slots; ` +
+        'a lane whose reservation does not fit can be starved while the others hold theirs');
+}
+
 // Development task prompts
 const DEV_PROMPTS = {
     'code-analysis': `Analyze the following code and provide comprehensive feedback:
@@ -172,67 +365,190 @@ Create a detailed team specification including:
 Format the response as a structured AutoGen implementation plan.`
 };
 
+// Changes whenever a prompt template, the routing policy or the cascade setup changes, so clients
+// can invalidate cached results
+const PROMPT_VERSION = crypto.createHash('sha256')
+    .update(JSON.stringify({ DEV_PROMPTS, ROUTING_POLICY, CASCADE_TIERS, CASCADE_TASK_TYPES: [...CASCADE_TASK_TYPES] }))
+    .digest('hex')
+    .slice(0, 12);
+
 // Process development jobs
-devQueue.process('dev-task', async (job) => {
+async function processDevTask(job, scheduler) {
+    const data = await blobs.resolve(job.data, 1);
     const { 
         task_type, 
         content, 
         context = '', 
         temperature = 0.3, 
-        max_tokens = 8192,
-        custom_prompt = null 
-    } = job.data;
+        max_tokens, // Unset: sized from the input by the router
+        custom_prompt = null,
+        session_id = null,
+        session_turn = 1
+    } = data;
+    const session = session_id ? sessions.get(session_id) : null;
+    let model; // Chosen by router.decide() for each generation
     
-    try {
-        const model = DEV_MODELS[task_type] || DEV_MODELS['code-analysis'];
+    // One generation on the routed model, or on `tier` for cascade runs
+    async function runModel(prompt, ollamaContext, tier) {
+        const routing = router.decide(task_type, prompt, {
+            model: session ? session.model : undefined,
+            tier,
+            maxTokens: max_tokens,
+            contextTokens: ollamaContext ? ollamaContext.length : 0
+        });
+        model = routing.model;
+        
+        const expected = estimator.estimateTask(task_type, model, routing.input_tokens);
+        
+        const slotRequestedAt = Date.now();
+        let slotGrantedAt;
+        let response;
+        try {
+            response = await scheduler.run(model, keep_alive => {
+                slotGrantedAt = Date.now();
+                job.progress(25);
+                return ollama.generate({
+                    model,
+                    prompt,
+                    // Sessions keep their pinned model loaded between turns
+                    keep_alive: session ? session.keepAlive : keep_alive,
+                    context: ollamaContext,
+                    options: {
+                        temperature,
+                        num_ctx: routing.num_ctx,
+                        num_predict: routing.num_predict,
+                        top_k: 40,
+                        top_p: 0.9,
+                    },
+                    stream: false
+                }, {
+                    timeout: 0 // No timeout - let it run as long as needed
+                });
+            }, { expectedMs: expected.ms });
+        } catch (error) {
+            metrics.recordFailure(task_type, model);
+            throw error;
+        }
         
+        const telemetry = inferenceTelemetry(job, response.data, slotGrantedAt, slotRequestedAt);
+        metrics.record(task_type, model, telemetry);
+        return { response, routing, telemetry };
+    }
+    
+    async function generate() {
         let prompt;
-        if (custom_prompt) {
+        let ollamaContext;
+        if (session) {
+            sessions.touch(session);
+            ({ prompt, context: ollamaContext } = sessions.prepareTurn(session, data, DEV_PROMPTS));
+        } else if (custom_prompt) {
             prompt = custom_prompt;
         } else {
             const template = DEV_PROMPTS[task_type] || DEV_PROMPTS['code-analysis'];
             prompt = template.replace('{code}', content).replace('{context}', context);
         }
         
-        job.progress(25);
+        job.progress(10);
         
-        const response = await axios.post('http://localhost:11434/api/generate', {
-            model,
-            prompt,
-            options: {
-                temperature,
-                num_predict: max_tokens,
-                top_k: 40,
-                top_p: 0.9,
-            },
-            stream: false
-        }, {
-            timeout: 0 // No timeout - let it run as long as needed
-        });
+        const cascadeMode = usesCascade(data);
+        let { response, routing, telemetry } = await runModel(prompt, ollamaContext,
+            cascadeMode ? CASCADE_TIERS[0] : undefined);
+        
+        let cascade;
+        if (cascadeMode) {
+            cascade = { tiers: [] };
+            for (let tier = 0; ; tier++) {
+                const verdict = await validateOutput(task_type, response.data);
+                cascade.tiers.push({ model, ok: verdict.ok, reason: verdict.reason, blocks_checked: verdict.checked });
+                if (verdict.ok || tier === CASCADE_TIERS.length - 1) break;
+                job.log(`Cascade: ${model} output rejected (${verdict.reason}); escalating`);
+                ({ response, routing, telemetry } = await runModel(prompt, ollamaContext, CASCADE_TIERS[tier + 1]));
+            }
+            cascade.escalated = cascade.tiers.length > 1;
+            cascadeStats.record(task_type, cascade.escalated, cascade.tiers[0].reason);
+        }
         
         job.progress(100);
         
+        if (session) sessions.recordTurn(session, response.data);
+        
         return {
             success: true,
             result: response.data.response,
             model_used: model,
             task_type,
             tokens_generated: response.data.eval_count || 0,
-            tokens_processed: response.data.prompt_eval_count || 0
+            tokens_processed: response.data.prompt_eval_count || 0,
+            session_id: session ? session.id : undefined,
+            session_turn: session ? session.turns : undefined,
+            routing,
+            cascade,
+            ollama_backend: response.backend,
+            telemetry
         };
+    }
+    
+    try {
+        if (session_id && !session) {
+            throw new Error(`Session ${session_id} is closed or expired`);
+        }
+        // Turns of a session run in submission order, each continuing from the previous context
+        return await (session ? sessions.runTurn(session, session_turn, generate) : generate());
     } catch (error) {
         throw new Error(`Development task failed: ${error.message}`);
     }
-});
+}
+
+// Agent-lane generations stream into a checkpoint (checkpoints.js), so a
+// retried or restarted job continues where it stopped
+const CHECKPOINT_INTERVAL_MS = parseInt(process.env.CHECKPOINT_INTERVAL_MS || '15000', 10);
+
+/**
+ * Run one checkpointed model call and record it as a completed step.
+ * Returns { output, model_used, tokens_generated, telemetry, resumed_chars }.
+ */
+async function generateStep(job, scheduler, checkpoint, step, { taskType, model, prompt, routing, options, expectedMs }) {
+    const expected = expectedMs !== undefined ? { ms: expectedMs } : estimator.estimateTask(taskType, model, routing.input_tokens);
+    const slotRequestedAt = Date.now();
+    let slotGrantedAt;
+    let response;
+    try {
+        response = await scheduler.run(model, keep_alive => {
+            slotGrantedAt = Date.now();
+            return generateResumable(ollama, { model, prompt, keep_alive, options }, {
+                checkpoint,
+                step,
+                config: { timeout: 0 } // No timeout - agent jobs can run for days
+            });
+        }, { expectedMs: expected.ms });
+    } catch (error) {
+        metrics.recordFailure(taskType, model);
+        throw error;
+    }
+
+    const telemetry = inferenceTelemetry(job, response.data, slotGrantedAt, slotRequestedAt);
+    metrics.record(taskType, model, telemetry);
+    const generated = {
+        output: response.data.response,
+        model_used: model,
+        tokens_generated: (response.data.eval_count || 0) + response.data.resumed_tokens,
+        telemetry,
+        ...(response.data.resumed_chars ? { resumed_chars: response.data.resumed_chars } : {})
+    };
+    const { output, ...details } = generated;
+    await checkpoint.complete(step, output, details);
+    return generated;
+}
 
 // Process CrewAI crew executions - Now with actual implementation
-devQueue.process('execute-crew', async (job) => {
+async function processCrew(job, scheduler) {
     const { 
         task_description, 
         agents = [], 
         context = '',
         process_type = 'sequential' 
     } = job.data;
+    const model = DEV_MODELS['crewai-crew'];
     
     try {
         job.progress(10);
@@ -268,42 +584,44 @@ Simulate the crew execution and provide the complete output as if the crew actua
 
         job.progress(30);
         
-        const response = await axios.post('http://localhost:11434/api/generate', {
-            model: 'qwen2.5-coder:32b-instruct-q4_K_M',
+        const routing = router.decide('crewai-crew', crewPrompt, { model });
+        const checkpoint = await JobCheckpoint.load(job, { blobs, intervalMs: CHECKPOINT_INTERVAL_MS });
+        const generated = checkpoint.completed('crew') || await generateStep(job, scheduler, checkpoint, 'crew', {
+            taskType: 'crewai-crew',
+            model,
             prompt: crewPrompt,
+            routing,
             options: {
                 temperature: 0.7,
-                num_predict: 16384, // Larger output for crew simulation
+                num_ctx: routing.num_ctx,
+                num_predict: routing.num_predict, // Larger output for crew simulation
                 top_k: 40,
                 top_p: 0.95,
-            },
-            stream: false
-        }, {
-            timeout: 0 // No timeout - crews can run for days
+            }
         });
         
         job.progress(90);
         
-        // Parse and structure the response
-        const crewOutput = response.data.response;
-        
         return {
             success: true,
             task_type: 'crewai-crew',
-            crew_output: crewOutput,
+            crew_output: generated.output,
             task_description,
             process_type,
-            model_used: 'qwen2.5-coder:32b-instruct-q4_K_M',
+            model_used: model,
             execution_time: new Date().toISOString(),
-            tokens_generated: response.data.eval_count || 0
+            tokens_generated: generated.tokens_generated,
+            routing,
+            telemetry: generated.telemetry,
+            recovery: checkpoint.summary()
         };
     } catch (error) {
         throw new Error(`CrewAI execution failed: ${error.message}`);
     }
-});
+}
 
 // Process AutoGen team executions - Now with actual implementation
-devQueue.process('execute-autogen', async (job) => {
+async function processAutogen(job, scheduler) {
     const { 
         task_description,
         agents = [],
@@ -311,6 +629,7 @@ devQueue.process('execute-autogen', async (job) => {
         max_rounds = 10,
         context = ''
     } = job.data;
+    const model = DEV_MODELS['autogen-team'];
     
     try {
         job.progress(10);
@@ -350,43 +669,187 @@ Simulate the complete AutoGen team execution with realistic agent conversations.
 
         job.progress(30);
         
-        const response = await axios.post('http://localhost:11434/api/generate', {
-            model: 'qwen2.5-coder:32b-instruct-q4_K_M',
+        const routing = router.decide('autogen-team', autogenPrompt, { model });
+        const checkpoint = await JobCheckpoint.load(job, { blobs, intervalMs: CHECKPOINT_INTERVAL_MS });
+        const generated = checkpoint.completed('team') || await generateStep(job, scheduler, checkpoint, 'team', {
+            taskType: 'autogen-team',
+            model,
             prompt: autogenPrompt,
+            routing,
             options: {
                 temperature: 0.7,
-                num_predict: 16384, // Larger output for team simulation
+                num_ctx: routing.num_ctx,
+                num_predict: routing.num_predict, // Larger output for team simulation
                 top_k: 40,
                 top_p: 0.95,
-            },
-            stream: false
-        }, {
-            timeout: 0 // No timeout - teams can run for days
+            }
         });
         
         job.progress(90);
         
-        // Parse and structure the response
-        const teamOutput = response.data.response;
-        
         return {
             success: true,
             task_type: 'autogen-team',
-            team_output: teamOutput,
+            team_output: generated.output,
             task_description,
             initial_message,
             max_rounds,
-            model_used: 'qwen2.5-coder:32b-instruct-q4_K_M',
+            model_used: model,
             execution_time: new Date().toISOString(),
-            tokens_generated: response.data.eval_count || 0
+            tokens_generated: generated.tokens_generated,
+            routing,
+            telemetry: generated.telemetry,
+            recovery: checkpoint.summary()
         };
     } catch (error) {
         throw new Error(`AutoGen execution failed: ${error.message}`);
     }
-});
+}
+
+// Process crews designed by CrewAIExpert: one model call per planned task,
+// independent tasks in parallel (see crew-executor.js)
+async function processExpertCrew(job, scheduler) {
+    const { config } = job.data;
+    const parallel = Math.min((config.execution_strategy || {}).parallel_tasks || 1, scheduler.slots);
+    // The crew's max_rpm caps how often its agents call the model
+    const rpmLimit = config.max_rpm ? new TokenBucket({ ratePerMin: config.max_rpm, burst: parallel }) : null;
+    const lastTask = config.tasks[config.tasks.length - 1];
+
+    // Finished tasks and partial generations survive restarts and retries;
+    // progress goes through the checkpoint's write chain so parallel tasks
+    // can't overwrite a newer state
+    const checkpoint = await JobCheckpoint.load(job, { blobs, intervalMs: CHECKPOINT_INTERVAL_MS });
+    const completed = {};
+    for (const task of config.tasks) {
+        const saved = checkpoint.completed(task.id);
+        if (saved) completed[task.id] = saved;
+    }
+    let progressWrites = Promise.resolve();
+    const onUpdate = taskStates => {
+        const done = taskStates.filter(t => !['pending', 'running'].includes(t.status)).length;
+        const snapshot = taskStates.map(t => ({ ...t }));
+        progressWrites = checkpoint.update({ crew_progress: snapshot })
+            .then(() => job.progress(Math.round(5 + 90 * done / taskStates.length)))
+            .catch(error => console.error(`Crew progress update failed for job ${job.id}:`, error.message));
+    };
+
+    const runTask = async (task, agent, dependencyOutputs) => {
+        // The lead's synthesis runs on the manager model, specialist tasks on the agent model
+        const model = (task.context_variables || []).includes('all_outputs')
+            ? config.manager_llm || DEV_MODELS['agent-coordination']
+            : config.agent_llm || DEV_MODELS['agent-coordination'];
+        const prompt = buildTaskPrompt(config, task, agent, dependencyOutputs);
+        const routing = router.decide('expert-crew', prompt, { model });
+        const expected = estimator.estimateRole(task.agent, model, task.max_time * 1000);
+
+        try {
+            if (rpmLimit) await rpmLimit.acquire();
+            job.log(`${task.id} (${task.agent}) started on ${model}`);
+            const generated = await generateStep(job, scheduler, checkpoint, task.id, {
+                taskType: 'expert-crew',
+                model,
+                prompt,
+                routing,
+                expectedMs: expected.ms,
+                options: {
+                    temperature: 0.5,
+                    num_ctx: routing.num_ctx,
+                    num_predict: routing.num_predict,
+                    top_k: 40,
+                    top_p: 0.95,
+                }
+            });
+            job.log(`${task.id} completed: ${generated.tokens_generated} tokens`);
+            return generated;
+        } catch (error) {
+            job.log(`${task.id} failed: ${error.message}`);
+            throw error;
+        }
+    };
+
+    try {
+        job.progress(5);
+        const run = await runCrewPlan(config, { runTask, parallel, onUpdate, completed });
+        await progressWrites;
+
+        if (run.completed === 0) {
+            throw new Error(run.tasks.map(t => `${t.id}: ${t.error}`).join('; '));
+        }
+
+        job.progress(100);
+        return {
+            success: run.failed === 0 && run.skipped === 0,
+            task_type: 'expert-crew',
+            crew_name: config.crew_name,
+            crew_output: run.outputs[lastTask.id] || '',
+            tasks: run.tasks,
+            completed_tasks: run.completed,
+            failed_tasks: run.failed,
+            skipped_tasks: run.skipped,
+            parallel_tasks: run.parallel_tasks,
+            execution_time: new Date().toISOString(),
+            tokens_generated: run.tasks.reduce((sum, t) => sum + (t.tokens_generated || 0), 0),
+            recovery: checkpoint.summary()
+        };
+    } catch (error) {
+        await progressWrites;
+        throw new Error(`Expert crew execution failed: ${error.message}`);
+    }
+}
+
+const JOB_PROCESSORS = {
+    'dev-task': processDevTask,
+    'execute-crew': processCrew,
+    'execute-autogen': processAutogen,
+    'expert-crew': processExpertCrew,
+    'expert-crew-advanced': processExpertCrew
+};
+
+// Each lane runs any job kind it is given, with its own concurrency and slots
+for (const lane of lanes.all()) {
+    lane.queue.process('*', lane.concurrency, async (job) => {
+        const processor = JOB_PROCESSORS[job.name];
+        if (!processor) {
+            throw new Error(`No processor for job type ${job.name}`);
+        }
+        lane.recordStart(job);
+        // Large outputs (including each crew task's) are stored as blob references
+        return blobs.offload(await processor(job, lane.scheduler));
+    });
+}
 
 // Routes
 
+// Job submissions are rate limited per client and tagged with its name (req.client)
+const JOB_SUBMIT_ROUTES = [
+    '/api/dev-task', '/api/dev-tasks/batch', '/api/process-file',
+    '/api/execute-crew', '/api/execute-autogen',
+    '/api/crew/simple', '/api/crew/advanced', '/api/sessions/:id/tasks'
+];
+app.use(JOB_SUBMIT_ROUTES, clients.admit(req => {
+    const tasks = req.body && req.body.tasks;
+    return Array.isArray(tasks) ? Math.max(1, Math.min(tasks.length, MAX_BATCH_TASKS)) : 1;
+}));
+
+// Push-based job lifecycle events (SSE)
+addJobEventEndpoints(app, lanes, { resolveResult: result => blobs.resolve(result) });
+
+// Stored job inputs and results (/api/blobs/:sha)
+addBlobEndpoints(app, blobs);
+
+// Prometheus-style inference metrics
+addMetricsEndpoint(app, metrics);
+
+// Expert-designed crews (/api/crew/*)
+addCrewExpertEndpoints(app, lanes, { estimator, agentSlots: lanes.lanes.agent.slots });
+
+// Multi-turn sessions over one pinned model
+addSessionEndpoints(app, {
+    store: sessions,
+    queue: lanes,
+    modelFor: taskType => DEV_MODELS[taskType] || DEV_MODELS['code-analysis']
+});
+
 // Health check
 app.get('/health', (req, res) => {
     res.json({ 
@@ -398,7 +861,8 @@ app.get('/health', (req, res) => {
             crewai: true,
             autogen: true,
             batch_processing: true,
-            long_running: true
+            long_running: true,
+            lanes: lanes.all().map(lane => lane.name)
         }
     });
 });
@@ -406,13 +870,42 @@ app.get('/health', (req, res) => {
 // Submit development task
 app.post('/api/dev-task', async (req, res) => {
     try {
-        const job = await devQueue.add('dev-task', req.body, {
-            priority: req.body.priority || 0
-        });
+        const [{ job, coalesced, state }] = await lanes.addDevTasks([{ ...req.body, client: req.client }]);
         
         res.json({ 
             success: true, 
             job_id: job.id,
+            queue: 'dev-task',
+            lane: lanes.laneForJobId(job.id).name,
+            coalesced,
+            coalesced_state: coalesced ? state : undefined
+        });
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// Submit many development tasks in one request
+const MAX_BATCH_TASKS = 500;
+
+app.post('/api/dev-tasks/batch', async (req, res) => {
+    try {
+        const { tasks } = req.body;
+        
+        if (!Array.isArray(tasks) || tasks.length === 0) {
+            return res.status(400).json({ error: 'tasks must be a non-empty array' });
+        }
+        if (tasks.length > MAX_BATCH_TASKS) {
+            return res.status(400).json({ error: `At most ${MAX_BATCH_TASKS} tasks per batch` });
+        }
+        
+        // Bulk submissions default to the batch lane so they don't delay interactive work
+        const added = await lanes.addDevTasks(tasks.map(task => ({ ...task, client: req.client })), 'batch');
+        
+        res.json({
+            success: true,
+            job_ids: added.map(a => a.job.id),
+            coalesced: added.map(a => a.coalesced),
             queue: 'dev-task'
         });
     } catch (error) {
@@ -426,21 +919,25 @@ app.post('/api/process-file', upload.single('file'), async (req, res) => {
         const fileContent = await fs.readFile(req.file.path, 'utf-8');
         const { task_type, context } = req.body;
         
-        const job = await devQueue.add('dev-task', {
+        const [{ job, coalesced }] = await lanes.addDevTasks([{
             task_type,
+            lane: req.body.lane,
+            priority: req.body.priority,
+            client: req.client,
             content: fileContent,
             context,
             file_info: {
                 originalName: req.file.originalname,
                 size: req.file.size
             }
-        });
+        }]);
         
         await fs.remove(req.file.path);
         
         res.json({ 
             success: true, 
-            job_id: job.id 
+            job_id: job.id,
+            coalesced
         });
     } catch (error) {
         res.status(500).json({ error: error.message });
@@ -450,19 +947,20 @@ app.post('/api/process-file', upload.single('file'), async (req, res) => {
 // Execute CrewAI crew - Updated endpoint
 app.post('/api/execute-crew', async (req, res) => {
     try {
-        const { task_description, agents, context, process_type } = req.body;
+        const { task_description, agents, context, process_type, priority } = req.body;
         
         if (!task_description) {
             return res.status(400).json({ error: 'task_description is required' });
         }
         
-        const job = await devQueue.add('execute-crew', {
+        const job = await lanes.add('execute-crew', {
             task_description,
             agents: agents || [],
             context: context || '',
-            process_type: process_type || 'sequential'
+            process_type: process_type || 'sequential',
+            priority: priority || 'high', // Crews go ahead of expert crews in the agent lane by default
+            client: req.client
         }, {
-            priority: 1, // Higher priority for crew tasks
             timeout: undefined // No timeout - crews can run for days
         });
         
@@ -480,20 +978,21 @@ app.post('/api/execute-crew', async (req, res) => {
 // Execute AutoGen team - Updated endpoint
 app.post('/api/execute-autogen', async (req, res) => {
     try {
-        const { task_description, agents, initial_message, max_rounds, context } = req.body;
+        const { task_description, agents, initial_message, max_rounds, context, priority } = req.body;
         
         if (!task_description) {
             return res.status(400).json({ error: 'task_description is required' });
         }
         
-        const job = await devQueue.add('execute-autogen', {
+        const job = await lanes.add('execute-autogen', {
             task_description,
             agents: agents || [],
             initial_message: initial_message || task_description,
             max_rounds: max_rounds || 10,
-            context: context || ''
+            context: context || '',
+            priority: priority || 'high', // Teams go ahead of expert crews in the agent lane by default
+            client: req.client
         }, {
-            priority: 1, // Higher priority for team tasks
             timeout: undefined // No timeout - teams can run for days
         });
         
@@ -508,10 +1007,60 @@ app.post('/api/execute-autogen', async (req, res) => {
     }
 });
 
-// Get job status
+// Resolve a projected job view: the result's blob references by default
+// (resolve=none keeps them), the input's only with resolve=all
+async function resolveJobView(view, resolve = 'result') {
+    if (view.result !== undefined && resolve !== 'none') view.result = await blobs.resolve(view.result);
+    if (view.data !== undefined && resolve === 'all') view.data = await blobs.resolve(view.data, 1);
+    return view;
+}
+
+// Get status of many jobs at once (no input payloads); fields=id,state,... projects each job
+app.get('/api/jobs/status', async (req, res) => {
+    try {
+        const ids = [...new Set(String(req.query.ids || '')
+            .split(',')
+            .map(id => id.trim())
+            .filter(Boolean))];
+        
+        if (ids.length === 0) {
+            return res.status(400).json({ error: 'ids query parameter is required' });
+        }
+        if (ids.length > MAX_BATCH_TASKS) {
+            return res.status(400).json({ error: `At most ${MAX_BATCH_TASKS} ids per request` });
+        }
+        
+        const jobs = {};
+        await Promise.all(ids.map(async id => {
+            const job = await lanes.getJob(id);
+            if (!job) {
+                jobs[id] = { id, state: 'missing' };
+                return;
+            }
+            
+            const state = await job.getState();
+            jobs[id] = await resolveJobView(project({
+                id: job.id,
+                state,
+                progress: job.progress(),
+                result: state === 'completed' ? job.returnvalue : undefined,
+                failedReason: job.failedReason,
+                processedOn: job.processedOn,
+                finishedOn: job.finishedOn
+            }, req.query.fields), req.query.resolve);
+        }));
+        
+        res.json({ jobs });
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// Get job status. fields=id,state,result.result,... returns only those fields;
+// large inputs stay blob references unless resolve=all
 app.get('/api/job/:id', async (req, res) => {
     try {
-        const job = await devQueue.getJob(req.params.id);
+        const job = await lanes.getJob(req.params.id);
         
         if (!job) {
             return res.status(404).json({ error: 'Job not found' });
@@ -520,8 +1069,9 @@ app.get('/api/job/:id', async (req, res) => {
         const state = await job.getState();
         const progress = job.progress();
         
-        res.json({
+        res.json(await resolveJobView(project({
             id: job.id,
+            lane: lanes.laneForJobId(job.id).name,
             state,
             progress,
             data: job.data,
@@ -529,7 +1079,7 @@ app.get('/api/job/:id', async (req, res) => {
             failedReason: job.failedReason,
             processedOn: job.processedOn,
             finishedOn: job.finishedOn
-        });
+        }, req.query.fields), req.query.resolve));
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -538,12 +1088,9 @@ app.get('/api/job/:id', async (req, res) => {
 // Get queue statistics
 app.get('/api/stats', async (req, res) => {
     try {
-        const [waiting, active, completed, failed, delayed] = await Promise.all([
-            devQueue.getWaitingCount(),
-            devQueue.getActiveCount(),
-            devQueue.getCompletedCount(),
-            devQueue.getFailedCount(),
-            devQueue.getDelayedCount()
+        const [{ waiting, active, completed, failed, delayed }, laneStats] = await Promise.all([
+            lanes.getCounts(),
+            lanes.getStats()
         ]);
         
         res.json({
@@ -556,6 +1103,23 @@ app.get('/api/stats', async (req, res) => {
                 delayed,
                 total: waiting + active + completed + failed + delayed
             },
+            lanes: laneStats,
+            sessions: sessions.getStats(),
+            routing: router.getStats(),
+            cascade: {
+                tiers: CASCADE_TIERS,
+                task_types: [...CASCADE_TASK_TYPES],
+                by_task_type: cascadeStats.getStats()
+            },
+            estimator: estimator.getStats(),
+            blobs: blobs.getStats(),
+            clients: clients.getStats(fairShare.queuedByClient()),
+            scheduler: {
+                ...lanes.schedulerStats(),
+                ollama_num_parallel: OLLAMA_NUM_PARALLEL,
+                residency: residency.getStats()
+            },
+            ollama_pool: ollama.getStats(),
             capabilities: {
                 crewai: 'Ready for CrewAI crew execution (no timeout)',
                 autogen: 'Ready for AutoGen team execution (no timeout)',
@@ -572,13 +1136,19 @@ app.get('/api/stats', async (req, res) => {
 // List available models
 app.get('/api/models', async (req, res) => {
     try {
-        const response = await axios.get('http://localhost:11434/api/tags');
-        const installedModels = response.data.models.map(m => m.name);
+        await ollama.refresh();
+        const installedModels = ollama.installedModels();
+        if (installedModels.length === 0) throw new Error('No Ollama backend reachable');
         
         res.json({
             configured: DEV_MODELS,
+            routing: { enabled: router.enabled, policy: ROUTING_POLICY },
+            prompt_version: PROMPT_VERSION,
+            // Context each model runs with; clients size their chunks to it
+            num_ctx: Object.fromEntries(Object.values(DEV_MODELS).map(model => [model, router.numCtxFor(model)])),
             installed: installedModels,
             missing: Object.values(DEV_MODELS).filter(m => !installedModels.includes(m)),
+            backends: ollama.getStats(),
             ready_for: {
                 crewai: installedModels.includes('qwen2.5-coder:32b-instruct-q4_K_M'),
                 autogen: installedModels.includes('qwen2.5-coder:32b-instruct-q4_K_M'),
@@ -588,6 +1158,7 @@ app.get('/api/models', async (req, res) => {
     } catch (error) {
         res.json({
             configured: DEV_MODELS,
+            prompt_version: PROMPT_VERSION,
             installed: [],
             missing: Object.values(DEV_MODELS),
             error: 'Could not fetch installed models'
@@ -595,17 +1166,37 @@ app.get('/api/models', async (req, res) => {
     }
 });
 
+// Delete stored blobs no remaining job refers to. Bull drops old jobs on its
+// own (removeOnComplete/removeOnFail), so this also runs periodically.
+const BLOB_SWEEP_INTERVAL_MS = 60 * 60 * 1000;
+
+async function sweepBlobs(graceMs = BLOB_SWEEP_INTERVAL_MS) {
+    const live = new Set();
+    for (const lane of lanes.all()) {
+        const jobs = await lane.queue.getJobs(['waiting', 'active', 'delayed', 'paused', 'completed', 'failed'], 0, -1);
+        for (const job of jobs.filter(Boolean)) BlobStore.refsIn([job.data, job.returnvalue], live);
+    }
+    return blobs.sweep(live, graceMs);
+}
+
+const blobSweeper = setInterval(() => {
+    sweepBlobs().catch(error => console.warn(`⚠️  Blob sweep failed: ${error.message}`));
+}, BLOB_SWEEP_INTERVAL_MS);
+blobSweeper.unref();
+
 // Clean old jobs
 app.post('/api/clean', async (req, res) => {
     try {
         const { grace = 3600000 } = req.body; // Default 1 hour
         
-        await devQueue.clean(grace, 'completed');
-        await devQueue.clean(grace, 'failed');
+        await lanes.clean(grace, 'completed');
+        await lanes.clean(grace, 'failed');
+        const blobsRemoved = await sweepBlobs(grace);
         
         res.json({ 
             success: true, 
-            message: 'Old jobs cleaned' 
+            message: 'Old jobs cleaned',
+            blobs_removed: blobsRemoved
         });
     } catch (error) {
         res.status(500).json({ error: error.message });
@@ -616,12 +1207,17 @@ app.post('/api/clean', async (req, res) => {
 app.get('/api/system-stats', async (req, res) => {
     try {
         const stats = await monitoring.getSystemStats();
+        // Measured CPU from the sampler rather than the load-average estimate
+        if (sampler.latest) stats.cpuUsage = sampler.latest.cpu;
         res.json(stats);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+// Sampled resource usage over time (/api/system-stats/history)
+addSystemHistoryEndpoint(app, sampler);
+
 app.get('/api/process-stats', async (req, res) => {
     try {
         const stats = await monitoring.getProcessStats();
@@ -631,17 +1227,30 @@ app.get('/api/process-stats', async (req, res) => {
     }
 });
 
+// Recently finished jobs, newest first: offset/limit page through them, and
+// results are only included (and resolved) with include=result
+const MAX_RECENT_JOBS = 200;
+
 app.get('/api/jobs/recent', async (req, res) => {
     try {
-        const jobs = await devQueue.getJobs(['completed', 'failed'], 0, 50);
-        const jobData = jobs.map(job => ({
+        const offset = Math.max(0, parseInt(req.query.offset || '0', 10) || 0);
+        const limit = Math.min(MAX_RECENT_JOBS, Math.max(1, parseInt(req.query.limit || '50', 10) || 50));
+        const includeResult = req.query.include === 'result';
+        
+        // Lanes are merged by finish time, so every lane is read up to offset + limit
+        const jobs = (await lanes.getJobs(['completed', 'failed'], 0, offset + limit - 1)).slice(offset);
+        const jobData = await Promise.all(jobs.map(async job => project({
             id: job.id,
+            lane: job.lane,
             type: job.data.task_type || job.name,
             status: job.finishedOn ? 'completed' : 'failed',
             duration: job.finishedOn - job.processedOn,
             finishedOn: job.finishedOn,
-            result: job.returnvalue
-        }));
+            result: includeResult ? await blobs.resolve(job.returnvalue) : undefined
+        }, req.query.fields)));
+        if (jobData.length === limit) {
+            res.set('X-Next-Offset', String(offset + limit));
+        }
         res.json(jobData);
     } catch (error) {
         res.status(500).json({ error: error.message });
@@ -650,7 +1259,7 @@ app.get('/api/jobs/recent', async (req, res) => {
 
 app.get('/api/jobs/active', async (req, res) => {
     try {
-        const jobs = await devQueue.getActive();
+        const jobs = await lanes.getJobs(['active'], 0, 199);
         const jobData = await Promise.all(jobs.map(async job => {
             // Get progress from job.progress() method
             let progress = 0;
@@ -663,30 +1272,42 @@ app.get('/api/jobs/active', async (req, res) => {
             
             return {
                 id: job.id,
+                lane: job.lane,
                 type: job.data?.task_type || job.name || 'unknown',
                 progress: progress || 0,
-                started: job.processedOn || job.timestamp
+                started: job.processedOn || job.timestamp,
+                queued_ms: (job.processedOn || job.timestamp) - job.timestamp
             };
         }));
+        
+        // include=lanes adds per-lane depth and wait times next to the job list
+        if (req.query.include === 'lanes') {
+            return res.json({ jobs: jobData, lanes: await lanes.getStats() });
+        }
         res.json(jobData);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
-// Start server
-app.listen(port, '0.0.0.0', () => {
+// Start server once fair-share state is back, so no new job's tags are wiped by the restore
+fairShareRestored.then(() => app.listen(port, '0.0.0.0', () => {
     console.log(`🚀 Dev Task Queue Server running on port ${port}`);
     console.log(`📍 Accessible via Tailscale network`);
     console.log(`🔗 http://100.114.129.95:${port}`);
     console.log(`🔗 http://10.0.10.244:${port}`);
     console.log(`✅ CrewAI and AutoGen support enabled`);
-});
+}));
 
 // Graceful shutdown
 process.on('SIGTERM', async () => {
     console.log('SIGTERM received, shutting down gracefully...');
-    await devQueue.close();
+    residency.stop();
+    sessions.stop();
+    estimator.stop();
+    sampler.stop();
+    ollama.stop();
+    await lanes.close();
     redis.quit();
     process.exit(0);
 });
\ No newline at end of file
@@ -0,0 +1,52 @@
+/**
+ * BlobStore deduplication and sweeping.
+ *
+ *   node --test server/test/
+ */
+
+const assert = require('assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const test = require('node:test');
+
+const { BlobStore } = require('../blob-store');
+
+const DAY_MS = 24 * 3600 * 1000;
+
+function tempStore() {
+    return new BlobStore({ dir: fs.mkdtempSync(path.join(os.tmpdir(), 'blobs-')), minBytes: 1 });
+}
+
+function age(store, ref, ms) {
+    const then = new Date(Date.now() - ms);
+    fs.utimesSync(store._path(ref.$blob), then, then);
+}
+
+test('an old blob stored again survives the next sweep', async () => {
+    const store = tempStore();
+    const ref = await store.put('large input');
+    age(store, ref, 3 * DAY_MS);
+
+    // A new job is about to refer to the same content; its reference isn't live yet
+    const again = await store.put('large input');
+    assert.strictEqual(again.$blob, ref.$blob);
+    assert.strictEqual(store.getStats().deduplicated, 1);
+
+    assert.strictEqual(await store.sweep(new Set()), 0);
+    assert.strictEqual(await store.get(again), 'large input');
+});
+
+test('sweep removes old blobs no job refers to', async () => {
+    const store = tempStore();
+    const kept = await store.put('kept');
+    const dropped = await store.put('dropped');
+    const fresh = await store.put('fresh');
+    age(store, kept, 3 * DAY_MS);
+    age(store, dropped, 3 * DAY_MS);
+
+    assert.strictEqual(await store.sweep(new Set([kept.$blob])), 1);
+    assert.strictEqual(await store.readCompressed(dropped.$blob), null);
+    assert.strictEqual(await store.get(kept), 'kept');
+    assert.strictEqual(await store.get(fresh), 'fresh');
+});